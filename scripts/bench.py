@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite and compare it against the stored baseline.
+
+Usage: python scripts/bench.py [--only NAME ...] [--repeat 5] [--quick] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--threshold 0.25] [--update-baseline]
+
+Benchmarks compile every template, execute plans with the noop handler and
+against a simulated guild, snapshot a synthetic 500-channel guild, and run a
+backup/restore round trip (see `src/conditor/benchmarks.py`). Prints the
+results, with a per-benchmark comparison against the baseline, as JSON. Exits
+with status 1 when a benchmark regressed. `--update-baseline` writes the
+results as the new baseline instead of comparing.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.conditor.benchmarks import (  # noqa: E402
+    BASELINE_PATH,
+    BENCHMARKS,
+    DEFAULT_THRESHOLD,
+    compare,
+    regressions,
+    run_benchmarks,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="small inputs, for smoke tests")
+    parser.add_argument("--output", type=Path, help="also write the results to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    # retries against the simulated rate limits are expected; keep the output to the JSON
+    logging.basicConfig(level=logging.ERROR)
+    results = asyncio.run(run_benchmarks(args.only, repeat=args.repeat, quick=args.quick))
+
+    failed = []
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("config", {}).get("quick") != args.quick:
+            print("warning: baseline was recorded with different --quick setting", file=sys.stderr)
+        results["comparison"] = compare(results, baseline, args.threshold)
+        failed = regressions(results["comparison"])
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if failed:
+        print(f"regressed: {', '.join(failed)}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
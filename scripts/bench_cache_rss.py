@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Compare bot memory (RSS) across cache profiles under a fake gateway load.
+
+Usage: python scripts/bench_cache_rss.py [--guilds 200] [--members 500] [--messages 5000] [--profiles low,full]
+
+Each profile runs in a fresh subprocess: a client is built with the profile's
+`client_kwargs()`, then synthetic GUILD_CREATE payloads (roles, channels and
+members) and MESSAGE_CREATE payloads are fed straight into its connection
+state, as the gateway would. No network connection is made. Prints one JSON
+object with RSS before and after the load per profile.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SELF_ID = 1
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # peak RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _user(uid: int) -> dict:
+    return {"id": str(uid), "username": f"user{uid}", "discriminator": "0", "global_name": None, "avatar": None}
+
+
+def guild_payload(gid: int, members: int, roles: int = 30, channels: int = 40) -> dict:
+    base = gid * 1_000_000
+    member_ids = [SELF_ID] + [base + 10_000 + i for i in range(members)]
+    return {
+        "id": str(gid),
+        "name": f"guild {gid}",
+        "owner_id": str(member_ids[-1]),
+        "member_count": len(member_ids),
+        "large": False,
+        "roles": [
+            {"id": str(gid if i == 0 else base + i), "name": f"role {i}", "permissions": "0", "position": i,
+             "color": 0, "hoist": False, "managed": False, "mentionable": False}
+            for i in range(roles)
+        ],
+        "channels": [
+            {"id": str(base + 1000 + i), "type": 0, "name": f"channel-{i}", "position": i, "permission_overwrites": []}
+            for i in range(channels)
+        ],
+        "members": [
+            {"user": _user(uid), "roles": [str(base + 1 + (uid % (roles - 1)))], "joined_at": "2024-01-01T00:00:00+00:00",
+             "deaf": False, "mute": False, "flags": 0}
+            for uid in member_ids
+        ],
+        "emojis": [], "stickers": [], "features": [], "threads": [], "voice_states": [], "presences": [],
+        "stage_instances": [], "guild_scheduled_events": [], "soundboard_sounds": [],
+    }
+
+
+def message_payload(mid: int, guild: dict) -> dict:
+    channel = guild["channels"][mid % len(guild["channels"])]
+    author = guild["members"][1 + mid % (len(guild["members"]) - 1)] if len(guild["members"]) > 1 else guild["members"][0]
+    return {
+        "id": str(10**15 + mid), "channel_id": channel["id"], "guild_id": guild["id"], "author": author["user"],
+        "member": {k: v for k, v in author.items() if k != "user"},
+        "content": f"message {mid} " + "x" * 80, "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+        "pinned": False, "type": 0,
+    }
+
+
+async def _load(profile: str, guilds: int, members: int, messages: int) -> dict:
+    import discord
+    from src.conditor.cache_policy import PROFILES
+
+    policy = PROFILES[profile]
+    client = discord.Client(**policy.client_kwargs())
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=_user(SELF_ID))
+    gc.collect()
+    before = rss_kb()
+    payloads = []
+    for g in range(guilds):
+        data = guild_payload(10_000 + g, members)
+        state._get_create_guild(data)
+        payloads.append(data)
+    for m in range(messages):
+        state.parse_message_create(message_payload(m, payloads[m % len(payloads)]))
+    del payloads
+    gc.collect()
+    after = rss_kb()
+    return {
+        "profile": profile,
+        "policy": {k: getattr(policy, k) for k in policy.__dataclass_fields__},
+        "guilds": len(client.guilds),
+        "cached_members": sum(len(g.members) for g in client.guilds),
+        "cached_messages": len(state._messages or ()),
+        "rss_before_kb": before,
+        "rss_after_kb": after,
+        "rss_delta_kb": after - before,
+    }
+
+
+def run_profile(profile: str, args) -> dict:
+    cmd = [sys.executable, __file__, "--child", profile, "--guilds", str(args.guilds),
+           "--members", str(args.members), "--messages", str(args.messages)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, env=dict(os.environ, PYTHONHASHSEED="0"))
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--members", type=int, default=500, help="members per guild in GUILD_CREATE")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--profiles", default="low,full")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(asyncio.run(_load(args.child, args.guilds, args.members, args.messages))))
+        return
+    results = [run_profile(p.strip(), args) for p in args.profiles.split(",") if p.strip()]
+    print(json.dumps({"guilds": args.guilds, "members_per_guild": args.members, "messages": args.messages,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Precompile templates, locale bundles and default plans into the startup snapshot.
+
+Usage: python scripts/build_snapshot.py [--check]
+
+Run at image build time so container starts load one file instead of parsing
+`data/`. With `--check`, only report whether the existing snapshot is fresh
+(exit status 1 when it is not).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.conditor import data_snapshot  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only check freshness")
+    parser.add_argument("--output", type=Path, default=data_snapshot.SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+    if args.check:
+        snapshot = data_snapshot.read_snapshot(args.output)
+        fresh = snapshot is not None and data_snapshot.is_fresh(snapshot)
+        print(f"{args.output}: {'fresh' if fresh else 'stale or missing'}")
+        return 0 if fresh else 1
+    snapshot = data_snapshot.build_snapshot(args.output)
+    print(
+        f"Wrote {args.output} ({args.output.stat().st_size} bytes, hash {snapshot.source_hash[:12]}): "
+        f"{len(snapshot.templates)} templates, {len(snapshot.locales)} locales, "
+        f"{len(snapshot.questionnaires)} questionnaires, {len(snapshot.plans)} plans"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
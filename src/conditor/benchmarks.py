@@ -0,0 +1,266 @@
+"""Benchmarks for plan compilation, execution, template autocomplete, guild
+snapshots and restores.
+
+Each benchmark is a coroutine registered with `@benchmark(name)`. It runs one
+iteration and returns its metrics. It times only the measured part itself,
+so guild setup does not count, and reports the time as `seconds`.
+`run_benchmarks` runs each `repeat` times and keeps the median of every
+metric. `compare` checks `seconds` against a stored baseline. A benchmark
+regresses when it is more than `threshold` slower and at least
+`MIN_REGRESSION_SECONDS` slower in absolute terms.
+
+Discord is simulated in-process (`fake_discord`), so the numbers only depend
+on this code and the machine. `python scripts/bench.py` runs the suite,
+prints JSON and compares against `benchmarks/baseline.json`.
+"""
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+RESULTS_FORMAT = 1
+ROOT = Path(__file__).resolve().parents[2]
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+MIN_REGRESSION_SECONDS = 0.005
+
+BenchFunc = Callable[[bool, Path], Awaitable[Dict[str, float]]]
+BENCHMARKS: Dict[str, BenchFunc] = {}
+
+
+def benchmark(name: str):
+    def register(fn: BenchFunc) -> BenchFunc:
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def _scaled_buckets(factor: float):
+    from .fake_discord import DEFAULT_BUCKETS
+
+    return {route: (calls, per / factor) for route, (calls, per) in DEFAULT_BUCKETS.items()}
+
+
+def _zero_delays(plan):
+    for step in plan.steps:
+        step.estimated_delay = 0.0
+    return plan
+
+
+def _template_sources():
+    """Parsed questionnaires and templates (by name) from data/."""
+    import json
+
+    data = ROOT / "data"
+    questionnaires = [json.loads(p.read_text(encoding="utf-8")) for p in sorted((data / "questionnaire").glob("*.json"))]
+    templates = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in sorted((data / "templates").glob("*.json"))}
+    return questionnaires, templates
+
+
+def _synthetic_guild(quick: bool, messages: int):
+    from .fake_discord import FakeDiscord, SimConfig
+
+    backend = FakeDiscord(SimConfig(buckets={}, global_bucket=None))
+    if quick:
+        return backend.guild("synthetic").populate(categories=2, channels_per_category=10, roles=5, messages_per_channel=min(messages, 2))
+    # 10 categories + 490 channels: Discord's 500 channel cap
+    return backend.guild("synthetic").populate(categories=10, channels_per_category=49, roles=50, messages_per_channel=messages)
+
+
+@benchmark("compile_templates")
+async def bench_compile_templates(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .core.intent.models import merge_spec
+    from .core.planner import compile_spec_to_plan
+
+    questionnaires, templates = _template_sources()
+    rounds = 1 if quick else 20
+    steps = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name, tpl in templates.items():
+            steps += len(compile_spec_to_plan(merge_spec(questionnaires, [tpl]), name=name).steps)
+    seconds = time.perf_counter() - started
+    compiled = rounds * len(templates)
+    return {"seconds": seconds, "templates": len(templates), "plans_per_second": compiled / seconds, "us_per_step": seconds / steps * 1e6}
+
+
+@benchmark("template_autocomplete")
+async def bench_template_autocomplete(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .storage import PrefixIndex
+
+    names = 2000 if quick else 20000
+    queries = 100 if quick else 1000
+    index = PrefixIndex(f"template-{i:05d}" for i in range(names))
+    started = time.perf_counter()
+    for i in range(queries):
+        index.complete(f"template-{i % (names // 100):03d}", 25)
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "names": names, "us_per_query": seconds / queries * 1e6}
+
+
+@benchmark("execute_noop")
+async def bench_execute_noop(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .core.executor import Executor, SimulatedHandler
+    from .core.planner.models import BuildPlan, BuildStep, StepType
+
+    count = 8 if quick else 40
+    plan = BuildPlan(name="bench-noop")
+    for i in range(count):
+        plan.add_step(BuildStep(id=f"role-{i}", type=StepType.CREATE_ROLE, payload={"name": f"role-{i}"}, estimated_delay=0.0))
+    handler = SimulatedHandler()
+    started = time.perf_counter()
+    await Executor(storage_dir=workdir, plan_retry_budget=None).run_plan(plan, handler, resume=False)
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "steps": count,
+        "steps_per_second": count / seconds,
+        "handler_seconds": handler.api_seconds,
+        "overhead_ms_per_step": (seconds - handler.api_seconds) / count * 1000,
+    }
+
+
+@benchmark("execute_simulated")
+async def bench_execute_simulated(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .core.executor import Executor
+    from .core.executor.discord_handler import make_discord_handler
+    from .core.persistence.backup import snapshot_guild_to_plan_async
+    from .fake_discord import FakeDiscord, SimConfig
+
+    # template plans are only a handful of steps; replay a synthetic guild's snapshot instead
+    source = FakeDiscord(SimConfig(buckets={}, global_bucket=None)).guild("source")
+    if quick:
+        source.populate(categories=1, channels_per_category=5, roles=2, messages_per_channel=1)
+    else:
+        source.populate(categories=3, channels_per_category=20, roles=10, messages_per_channel=1)
+    plan = _zero_delays(await snapshot_guild_to_plan_async(source, name="bench-simulated", messages_per_channel=1))
+    # Discord's bucket windows, 20x shorter, so a run hits 429s without taking minutes
+    backend = FakeDiscord(SimConfig(latency=0.002, jitter=0.001, seed=1, buckets=_scaled_buckets(20.0), global_bucket=(50, 0.05)))
+    guild = backend.guild("bench")
+    started = time.perf_counter()
+    state = await Executor(storage_dir=workdir).run_plan(plan, make_discord_handler(None, guild), resume=False)
+    seconds = time.perf_counter() - started
+    stats = backend.stats()
+    failed = sum(1 for s in state["steps"].values() if s.get("status") != "success")
+    return {
+        "seconds": seconds,
+        "steps": len(plan.steps),
+        "failed_steps": failed,
+        "steps_per_second": len(plan.steps) / seconds,
+        "api_calls": sum(stats["calls"].values()),
+        "rate_limited": sum(stats["rate_limited"].values()),
+        "simulated_api_seconds": stats["api_seconds"],
+    }
+
+
+@benchmark("snapshot_500")
+async def bench_snapshot(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .core.persistence.backup import snapshot_guild_to_plan_async
+
+    guild = _synthetic_guild(quick, messages=10)
+    started = time.perf_counter()
+    plan = await snapshot_guild_to_plan_async(guild, messages_per_channel=10)
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "channels": len(guild.channels), "steps": len(plan.steps), "history_calls": guild.backend.calls["history"]}
+
+
+@benchmark("backup_restore_roundtrip")
+async def bench_backup_restore(quick: bool, workdir: Path) -> Dict[str, float]:
+    from .core.executor import Executor
+    from .core.executor.discord_handler import make_discord_handler
+    from .core.persistence.archive import load_snapshot_plan, write_archive
+    from .core.persistence.backup import snapshot_guild_to_plan_async
+    from .fake_discord import FakeDiscord, SimConfig
+
+    source = _synthetic_guild(quick, messages=2)
+    if not quick:
+        # replaying all 500 channels and their messages takes minutes; three categories keep it bounded
+        keep = set(source.categories[:3])
+        source.channels = [c for c in source.channels if c in keep or getattr(c, "category", None) in keep]
+    target = FakeDiscord(SimConfig(buckets={}, global_bucket=None)).guild("restored")
+    path = workdir / "roundtrip.cnda"
+
+    started = time.perf_counter()
+    plan = await snapshot_guild_to_plan_async(source, messages_per_channel=2)
+    snapshotted = time.perf_counter()
+    write_archive(plan, path, meta={"guild_id": source.id}, fsync=False)
+    restored_plan = _zero_delays(load_snapshot_plan(path))
+    archived = time.perf_counter()
+    state = await Executor(storage_dir=workdir).run_plan(restored_plan, make_discord_handler(None, target), resume=False)
+    finished = time.perf_counter()
+
+    def shape(guild):
+        return sorted((c.name, type(c).__name__, getattr(c.category, "name", None)) for c in guild.channels)
+
+    if shape(target) != shape(source):
+        raise AssertionError("backup/restore round trip did not reproduce the channel structure")
+    return {
+        "seconds": finished - started,
+        "snapshot_seconds": snapshotted - started,
+        "archive_seconds": archived - snapshotted,
+        "restore_seconds": finished - archived,
+        "steps": len(restored_plan.steps),
+        "failed_steps": sum(1 for s in state["steps"].values() if s.get("status") != "success"),
+        "archive_bytes": path.stat().st_size,
+    }
+
+
+def machine_info() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+async def run_benchmarks(names: Optional[Iterable[str]] = None, repeat: int = 5, quick: bool = False,
+                         workdir: Optional[Path] = None) -> Dict[str, Any]:
+    """Run the selected benchmarks `repeat` times each; returns the results document."""
+    selected = list(names) if names else list(BENCHMARKS)
+    unknown = [n for n in selected if n not in BENCHMARKS]
+    if unknown:
+        raise KeyError(f"unknown benchmarks: {', '.join(unknown)}")
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="conditor-bench-", dir=workdir) as tmp:
+        for name in selected:
+            runs: List[Dict[str, float]] = []
+            for i in range(max(1, repeat)):
+                run_dir = Path(tmp) / f"{name}-{i}"
+                run_dir.mkdir()
+                runs.append(await BENCHMARKS[name](quick, run_dir))
+            metrics = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+            results[name] = {"seconds": metrics.pop("seconds"), "runs": [r["seconds"] for r in runs], "metrics": metrics}
+    return {
+        "format": RESULTS_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "config": {"quick": quick, "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Dict[str, Any]]:
+    """Per-benchmark comparison of median `seconds`; status is ok, regressed, improved or new."""
+    base = baseline.get("results", {})
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, result in current.get("results", {}).items():
+        now = result["seconds"]
+        before = base.get(name, {}).get("seconds")
+        if before is None:
+            out[name] = {"status": "new", "current": now}
+            continue
+        ratio = now / before if before else float("inf")
+        if ratio > 1 + threshold and now - before >= MIN_REGRESSION_SECONDS:
+            status = "regressed"
+        elif ratio < 1 - threshold and before - now >= MIN_REGRESSION_SECONDS:
+            status = "improved"
+        else:
+            status = "ok"
+        out[name] = {"status": status, "baseline": before, "current": now, "ratio": round(ratio, 3)}
+    return out
+
+
+def regressions(comparison: Dict[str, Dict[str, Any]]) -> List[str]:
+    return [name for name, entry in comparison.items() if entry["status"] == "regressed"]
+
@@ -6,44 +6,83 @@ import discord
 from discord.ext import commands
 import logging
 
+from .cache_policy import policy_from_env
+from .cluster import ClusterConfig, ClusterRouter, JobQueue
+from .metrics import BUILD_QUEUE_DEPTH
+from .startup import load_cogs, load_deferred_cogs, startup_report
+
 load_dotenv()
 
 TOKEN = os.getenv("CONDITOR_TOKEN")
 GUILD_ID = os.getenv("CONDITOR_GUILD_ID") or os.getenv("CONDITOR_GUILD")
 
-intents = discord.Intents.default()
-intents.guilds = True
-intents.members = True
-intents.message_content = True
+# intents and cache sizes come from the cache policy (low-memory by default, see cache_policy)
+cache_policy = policy_from_env()
+intents = cache_policy.intents()
+
+# shard range owned by this process (single cluster unless CONDITOR_CLUSTER_COUNT > 1, see cluster)
+cluster_config = ClusterConfig.from_env()
 
 
-class ConditorBot(commands.Bot):
+class ConditorBot(commands.AutoShardedBot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     async def setup_hook(self):
-        # Load cogs before the bot connects so commands/registers persist in this loop
+        startup_report.mark("setup_hook")
+        # optional local metrics endpoint (CONDITOR_METRICS_PORT)
         try:
-            await load_cogs(self)
+            from .metrics import start_metrics_server
+            self.metrics_server = await start_metrics_server()
+        except Exception:
+            logging.getLogger("conditor.bot").exception("Failed to start metrics endpoint")
+        # loop lag / blocking-call watchdog (disable with CONDITOR_LOOP_WATCHDOG=0)
+        if os.getenv("CONDITOR_LOOP_WATCHDOG", "1") != "0":
+            from .loop_watchdog import watchdog
+            watchdog.start()
+        # templates, locales and default plans from the precompiled snapshot (CONDITOR_SNAPSHOT=0 disables)
+        if os.getenv("CONDITOR_SNAPSHOT", "1") != "0":
+            try:
+                from .data_snapshot import load_snapshot
+                await asyncio.to_thread(load_snapshot)
+                startup_report.mark("snapshot_loaded")
+            except Exception:
+                logging.getLogger("conditor.bot").exception("Failed to load the startup snapshot; using JSON sources")
+        # pick up edits to data/locales without a restart (CONDITOR_LOCALE_POLL_SECONDS=0 disables)
+        poll = float(os.getenv("CONDITOR_LOCALE_POLL_SECONDS", "5") or 0)
+        if poll > 0:
+            from .i18n import locale_registry
+            self.locale_watch_task = asyncio.create_task(locale_registry.watch(poll))
+        # Load cogs before the bot connects so commands/registers persist in this loop;
+        # rarely used cogs (CONDITOR_LAZY_COGS) are deferred until ready
+        self.deferred_cogs = []
+        try:
+            self.deferred_cogs = await load_cogs(self)
         except Exception as e:
             logging.getLogger("conditor.bot").exception("Failed to load cogs in setup_hook")
 
-        # If a development guild is provided, copy globals to that guild for fast iteration
+        # If a development guild is provided, copy globals to that guild for fast iteration.
+        # Commands are only synced when their payload hash changed since the last sync;
+        # `sync_commands` (AdminTools) forces a sync.
         try:
+            from . import storage
+            from .command_sync import sync_commands
+            storage.init_db()
             if GUILD_ID:
                 try:
                     gid = int(GUILD_ID)
                     guild = discord.Object(id=gid)
-                    self.tree.copy_global_to_guild(guild)
-                    await self.tree.sync(guild=guild)
-                    print(f"Application commands synced to guild {gid}.")
+                    self.tree.copy_global_to(guild=guild)
+                    if await sync_commands(self.tree, guild=guild):
+                        print(f"Application commands synced to guild {gid}.")
                 except Exception as e:
                     print("Failed to sync to guild in setup_hook:", e)
             else:
-                await self.tree.sync()
-                print("Application commands synced (global) in setup_hook.")
+                if await sync_commands(self.tree):
+                    print("Application commands synced (global) in setup_hook.")
         except Exception as e:
             print("Failed to sync application commands in setup_hook:", e)
+        startup_report.mark("commands_synced")
         # Debug: list loaded extensions and commands
         try:
             log = logging.getLogger("conditor.bot")
@@ -57,7 +96,7 @@ class ConditorBot(commands.Bot):
 
 
 # Use 'C!' as the prefix per project convention
-bot = ConditorBot(command_prefix="C!", intents=intents)
+bot = ConditorBot(command_prefix="C!", **cache_policy.client_kwargs(), **cluster_config.client_kwargs())
 
 # Configure bot owners: can be overridden with CONDITOR_OWNER_IDS (comma-separated)
 owners_env = os.getenv("CONDITOR_OWNER_IDS") or os.getenv("CONDITOR_OWNERS")
@@ -87,57 +126,55 @@ async def _conditor_help(interaction: discord.Interaction):
 
 # Shared build queue for jobs
 build_queue: asyncio.Queue = asyncio.Queue()
+BUILD_QUEUE_DEPTH.set_function(build_queue.qsize)
+
+# builds for guilds owned by another cluster go through the shared job queue
+build_router = ClusterRouter(
+    cluster_config, build_queue.put, JobQueue(cluster_config.queue_path) if cluster_config.clustered else None
+)
+
+
+async def submit_build(item: dict) -> int:
+    """Queue a build item on the cluster that owns its guild; returns that cluster's id."""
+    return await build_router.submit(item)
 
 
 @bot.event
 async def on_ready():
-    # start build worker and ensure application commands are synced
-    bot.loop.create_task(build_worker())
-    try:
-        # If a development guild is provided, copy globals to that guild for fast iteration
-        if GUILD_ID:
-            try:
-                gid = int(GUILD_ID)
-                guild = discord.Object(id=gid)
-                bot.tree.copy_global_to_guild(guild)
-                await bot.tree.sync(guild=guild)
-                print(f"Application commands synced to guild {gid}.")
-            except Exception as e:
-                print("Failed to sync to guild:", e)
-        else:
-            await bot.tree.sync()
-            print("Application commands synced (global).")
-    except Exception as e:
-        print("Failed to sync application commands:", e)
+    # on_ready fires again after reconnects: start the build worker once.
+    # Commands are synced (when changed) in setup_hook, not here.
+    if getattr(bot, "build_worker_task", None) is None or bot.build_worker_task.done():
+        bot.build_worker_task = bot.loop.create_task(build_worker())
+    if build_router.queue is not None and (getattr(bot, "cluster_poll_task", None) is None or bot.cluster_poll_task.done()):
+        bot.cluster_poll_task = bot.loop.create_task(build_router.poll())
     # Log registered application commands for debugging
     try:
         cmds = list(bot.tree.get_commands())
         print(f"Registered application commands (count={len(cmds)}): {[c.name for c in cmds]}")
     except Exception:
         pass
-    print(f"Bot ready: {bot.user} (guilds: {len(bot.guilds)})")
+    if "ready" not in startup_report.phases:
+        took = startup_report.mark("ready")
+        logging.getLogger("conditor.bot").info("Ready %.2fs after process start\n%s", took, startup_report.render())
+        if getattr(bot, "deferred_cogs", None):
+            bot.loop.create_task(load_deferred_cogs(bot, bot.deferred_cogs))
+    print(f"Bot ready: {bot.user} (guilds: {len(bot.guilds)}, cluster {cluster_config.cluster_id}, shards {bot.shard_ids or 'auto'})")
 
 
 async def build_worker():
     from .core.planner.models import BuildPlan
     from .core.executor import Executor
     from .core.executor.discord_handler import make_discord_handler
+    from .circuit_breaker import breakers
+    from .permissions import missing_build_permissions
+    from .metrics import instrument_executor
 
     executor = Executor(storage_dir=Path(__file__).parent / 'data' / 'runtime')
+    instrument_executor(executor)
 
     while True:
         item = await build_queue.get()
         try:
-            # legacy BuildJob support: object with run()
-            if hasattr(item, 'run') and callable(getattr(item, 'run')):
-                try:
-                    await item.run()
-                except Exception as exc:
-                    print('Build job failed:', exc)
-                finally:
-                    build_queue.task_done()
-                continue
-
             # plan-based item
             if isinstance(item, dict) and item.get('type') == 'plan':
                 plan = item.get('plan')
@@ -147,31 +184,44 @@ async def build_worker():
                     build_queue.task_done()
                     continue
 
-                # choose guild: prefer guild_id provided when enqueuing the plan
-                guild = None
-                gid = item.get('guild_id') if isinstance(item, dict) else None
-                if gid:
-                    try:
-                        guild = bot.get_guild(int(gid))
-                    except Exception:
-                        guild = None
-                if guild is None:
-                    # fallback to first guild the bot is in
-                    if len(bot.guilds) > 0:
-                        guild = bot.guilds[0]
+                # plans only ever run against the guild they were enqueued for
+                gid = item.get('guild_id')
+                if gid is None:
+                    print('Plan item without guild_id on queue')
+                    await build_router.complete(item, 'missing guild_id')
+                    build_queue.task_done()
+                    continue
+                if not cluster_config.owns_guild(int(gid)):
+                    # enqueued here by mistake: hand it to the owning cluster
+                    await build_router.submit(item)
+                    build_queue.task_done()
+                    continue
+                guild = bot.get_guild(int(gid))
                 if guild is None:
-                    print('No guild available to run plan')
+                    print(f'Guild {gid} is not available on this cluster; plan {getattr(plan, "name", "?")} not run')
+                    await build_router.complete(item, f'guild {gid} unavailable')
                     build_queue.task_done()
                     continue
 
+                # trip breakers up front for routes the bot has no permission for
+                for route, reason in missing_build_permissions(guild).items():
+                    breakers.trip(guild.id, route, reason)
+
                 # namespace the resource map using the plan name to avoid cross-plan reuse
                 ns = plan.name if hasattr(plan, 'name') else None
                 handler = make_discord_handler(bot, guild, storage_dir=executor.storage_dir, namespace=ns)
+                reporter = item.get('reporter')
+                detach = reporter.attach(executor, plan) if reporter else None
+                error = None
                 try:
-                    await executor.run_plan(plan, handler, resume=False)
+                    await executor.run_plan(plan, handler, resume=False, guild_id=guild.id)
                 except Exception as exc:
+                    error = str(exc) or exc.__class__.__name__
                     print('Plan execution failed:', exc)
                 finally:
+                    if detach:
+                        detach()
+                    await build_router.complete(item, error)
                     build_queue.task_done()
                 continue
 
@@ -182,24 +232,6 @@ async def build_worker():
             build_queue.task_done()
 
 
-async def load_cogs(bot: commands.Bot):
-    here = Path(__file__).parent
-    cogs_dir = here / "cogs"
-    logging.getLogger("conditor.bot").info("Discovered cog files: %s", [p.name for p in cogs_dir.glob("*.py")])
-    for p in cogs_dir.glob("*.py"):
-        if p.name.startswith("_"):
-            continue
-        ext = f"{__package__}.cogs.{p.stem}"
-        try:
-            logging.getLogger("conditor.bot").info("Loading extension: %s", ext)
-            await bot.load_extension(ext)
-            logging.getLogger("conditor.bot").info("Loaded cog: %s", ext)
-        except Exception as e:
-            import traceback
-            logging.getLogger("conditor.bot").error("Failed to load cog %s: %s", ext, e)
-            logging.getLogger("conditor.bot").error(traceback.format_exc())
-
-
 if __name__ == "__main__":
     if not TOKEN:
         raise RuntimeError("CONDITOR_TOKEN not set in environment")
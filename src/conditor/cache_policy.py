@@ -0,0 +1,105 @@
+"""Gateway intents and cache configuration.
+
+The build workload only needs guilds, roles, channels and the bot's own
+member (which discord.py always caches), so the default `low` profile turns
+off the privileged members intent, member caching and startup chunking, and
+keeps a small message cache. `full` restores discord.py's memory-hungry
+defaults for features that need member lists.
+
+Environment (each overrides the chosen profile):
+- `CONDITOR_CACHE_PROFILE`: `low` (default) or `full`.
+- `CONDITOR_MEMBERS_INTENT`: `1`/`0`.
+- `CONDITOR_MEMBER_CACHE`: `none`, `voice`, `joined` or `all`.
+- `CONDITOR_CHUNK_AT_STARTUP`: `1`/`0`.
+- `CONDITOR_MAX_MESSAGES`: message cache size; `0` disables it.
+- `CONDITOR_MESSAGE_CONTENT`: `1`/`0`, needed for `C!` prefix commands.
+"""
+import os
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+import discord
+
+MEMBER_CACHE_MODES = ("none", "voice", "joined", "all")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    members_intent: bool = False
+    member_cache: str = "none"
+    chunk_guilds_at_startup: bool = False
+    max_messages: Optional[int] = 100
+    message_content: bool = True
+
+    def __post_init__(self):
+        if self.member_cache not in MEMBER_CACHE_MODES:
+            raise ValueError(f"member_cache must be one of {MEMBER_CACHE_MODES}, got {self.member_cache!r}")
+        if self.member_cache in ("joined", "all") and not self.members_intent:
+            raise ValueError(f"member_cache={self.member_cache!r} requires the members intent")
+        if self.chunk_guilds_at_startup and not self.members_intent:
+            raise ValueError("chunking at startup requires the members intent")
+
+    def intents(self) -> discord.Intents:
+        intents = discord.Intents.default()
+        intents.guilds = True
+        intents.members = self.members_intent
+        intents.message_content = self.message_content
+        return intents
+
+    def member_cache_flags(self, intents: Optional[discord.Intents] = None) -> discord.MemberCacheFlags:
+        if self.member_cache == "all":
+            return discord.MemberCacheFlags.from_intents(intents or self.intents())
+        flags = discord.MemberCacheFlags.none()
+        if self.member_cache == "voice":
+            flags.voice = True
+        elif self.member_cache == "joined":
+            flags.joined = True
+        return flags
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for `discord.Client` / `commands.Bot`."""
+        intents = self.intents()
+        return {
+            "intents": intents,
+            "member_cache_flags": self.member_cache_flags(intents),
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+            "max_messages": self.max_messages or None,
+        }
+
+
+PROFILES = {
+    "low": CachePolicy(),
+    "full": CachePolicy(members_intent=True, member_cache="all", chunk_guilds_at_startup=True, max_messages=1000),
+}
+
+
+def _env_flag(name: str) -> Optional[bool]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return None
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def policy_from_env() -> CachePolicy:
+    profile = (os.getenv("CONDITOR_CACHE_PROFILE") or "low").strip().lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown CONDITOR_CACHE_PROFILE {profile!r} (expected one of {sorted(PROFILES)})")
+    changes: Dict[str, Any] = {}
+    for field_name, env in (
+        ("members_intent", "CONDITOR_MEMBERS_INTENT"),
+        ("chunk_guilds_at_startup", "CONDITOR_CHUNK_AT_STARTUP"),
+        ("message_content", "CONDITOR_MESSAGE_CONTENT"),
+    ):
+        flag = _env_flag(env)
+        if flag is not None:
+            changes[field_name] = flag
+    if os.getenv("CONDITOR_MEMBER_CACHE"):
+        changes["member_cache"] = os.getenv("CONDITOR_MEMBER_CACHE").strip().lower()
+    if os.getenv("CONDITOR_MAX_MESSAGES"):
+        changes["max_messages"] = int(os.getenv("CONDITOR_MAX_MESSAGES"))
+    base = PROFILES[profile]
+    if changes.get("members_intent") is False and "member_cache" not in changes and base.member_cache in ("joined", "all"):
+        # turning the intent off downgrades a profile's member cache instead of failing
+        changes["member_cache"] = "none"
+        changes.setdefault("chunk_guilds_at_startup", False)
+    return replace(base, **changes)
@@ -0,0 +1,127 @@
+"""Per-guild, per-route circuit breakers for permanent Discord failures.
+
+A guild that lacks Manage Roles / Manage Channels (or whose bot role is too
+low) answers every call on that route with 403 / 50013. After `threshold`
+such failures the breaker for `(guild_id, route)` opens and callers fail fast
+with `CircuitOpenError` instead of burning retries and rate-limit budget. After
+`cooldown` seconds one trial call is let through (half-open): success closes
+the breaker, another permission failure re-opens it.
+"""
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .core.planner.models import BuildStep, StepType
+
+# Discord JSON error codes that mean "the bot is not allowed to do this"
+PERMISSION_CODES = {50001, 50013}
+
+STEP_ROUTES = {
+    StepType.CREATE_ROLE: "roles",
+    StepType.CREATE_CATEGORY: "channels",
+    StepType.CREATE_CHANNEL: "channels",
+    StepType.APPLY_PERMISSIONS: "channels",
+    StepType.POST_MESSAGE: "messages",
+}
+
+
+def route_for_step(step: BuildStep) -> Optional[str]:
+    return STEP_ROUTES.get(step.type)
+
+
+def is_permission_error(exc: BaseException) -> bool:
+    return getattr(exc, "status", None) == 403 or getattr(exc, "code", None) in PERMISSION_CODES
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its breaker is open."""
+
+    def __init__(self, guild_id: Any, route: str, reason: str):
+        super().__init__(f"circuit open for {route} in guild {guild_id}: {reason}")
+        self.guild_id = guild_id
+        self.route = route
+        self.reason = reason
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = max(1, int(threshold))
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.reason = ""
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._trial_running = False
+        if self.state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def open(self, reason: str):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self.reason = reason
+        self._trial_running = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reason = ""
+        self._trial_running = False
+
+    def release(self):
+        """Free the half-open trial slot of a call that ended without an outcome (e.g. cancelled)."""
+        self._trial_running = False
+
+    def record_failure(self, exc: BaseException):
+        if not is_permission_error(exc):
+            # transient errors neither trip nor close the breaker; free the trial slot
+            self._trial_running = False
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.open(str(exc) or type(exc).__name__)
+
+
+class BreakerRegistry:
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._breakers: Dict[Tuple[Hashable, str], CircuitBreaker] = {}
+
+    def get(self, guild_id: Hashable, route: str) -> CircuitBreaker:
+        key = (guild_id, route)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(self.threshold, self.cooldown, self.clock)
+        return self._breakers[key]
+
+    def check(self, guild_id: Hashable, route: str):
+        breaker = self.get(guild_id, route)
+        if not breaker.allow():
+            raise CircuitOpenError(guild_id, route, breaker.reason)
+
+    def trip(self, guild_id: Hashable, route: str, reason: str):
+        self.get(guild_id, route).open(reason)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            f"{gid}:{route}": {"state": b.state, "failures": b.failures, "reason": b.reason}
+            for (gid, route), b in self._breakers.items()
+            if b.state != CircuitBreaker.CLOSED or b.failures
+        }
+
+
+# module-level singleton
+breakers = BreakerRegistry()
@@ -0,0 +1,286 @@
+"""Multi-process clustering with shard-aware build routing.
+
+A deployment runs `CONDITOR_CLUSTER_COUNT` processes, each with its own
+`CONDITOR_CLUSTER_ID`. The `CONDITOR_SHARD_COUNT` gateway shards are split
+into contiguous ranges and each process connects only its own range, so every
+guild has exactly one owning process (`cluster_for_guild`).
+
+Build items for guilds owned elsewhere are written to a shared SQLite job
+queue (`CONDITOR_CLUSTER_QUEUE`, a file on the same machine or volume); each
+process polls the queue for its own cluster id and feeds claimed jobs into its
+local build queue. Claims happen inside an IMMEDIATE transaction, so a job is
+handed to exactly one process. With a single cluster nothing touches the
+queue and builds stay in-process.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = Path(__file__).parent.parent / "data" / "cluster_queue.db"
+
+JOB_QUEUED = "queued"
+JOB_CLAIMED = "claimed"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """The gateway shard Discord delivers `guild_id` on."""
+    return (int(guild_id) >> 22) % shard_count
+
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    cluster_id: int = 0
+    cluster_count: int = 1
+    # None lets discord.py pick the recommended shard count (single cluster only)
+    shard_count: Optional[int] = None
+    queue_path: Path = DEFAULT_QUEUE_PATH
+
+    def __post_init__(self):
+        if self.cluster_count < 1 or not 0 <= self.cluster_id < self.cluster_count:
+            raise ValueError(f"cluster id {self.cluster_id} out of range for {self.cluster_count} clusters")
+        if self.clustered and self.shard_count is None:
+            raise ValueError("a shard count is required when running more than one cluster")
+        if self.shard_count is not None and self.shard_count < self.cluster_count:
+            raise ValueError(f"{self.shard_count} shards cannot be split across {self.cluster_count} clusters")
+
+    @property
+    def clustered(self) -> bool:
+        return self.cluster_count > 1
+
+    def shard_range(self, cluster_id: int) -> range:
+        count = self.shard_count or 1
+        return range(count * cluster_id // self.cluster_count, count * (cluster_id + 1) // self.cluster_count)
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return list(self.shard_range(self.cluster_id))
+
+    def cluster_for_guild(self, guild_id: int) -> int:
+        if not self.clustered:
+            return self.cluster_id
+        shard = shard_for_guild(guild_id, self.shard_count)
+        for cluster_id in range(self.cluster_count):
+            if shard in self.shard_range(cluster_id):
+                return cluster_id
+        raise AssertionError(f"shard {shard} is not covered by any cluster")
+
+    def owns_guild(self, guild_id: int) -> bool:
+        return self.cluster_for_guild(guild_id) == self.cluster_id
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for `commands.AutoShardedBot`."""
+        if self.shard_count is None:
+            return {}
+        return {"shard_count": self.shard_count, "shard_ids": self.shard_ids}
+
+    @classmethod
+    def from_env(cls) -> "ClusterConfig":
+        shards = os.getenv("CONDITOR_SHARD_COUNT")
+        return cls(
+            cluster_id=int(os.getenv("CONDITOR_CLUSTER_ID") or 0),
+            cluster_count=int(os.getenv("CONDITOR_CLUSTER_COUNT") or 1),
+            shard_count=int(shards) if shards else None,
+            queue_path=Path(os.getenv("CONDITOR_CLUSTER_QUEUE") or DEFAULT_QUEUE_PATH),
+        )
+
+
+@dataclass
+class Job:
+    id: int
+    cluster_id: int
+    guild_id: int
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+class JobQueue:
+    """Build jobs shared between cluster processes through one SQLite file.
+
+    Methods block; call them off the event loop (`asyncio.to_thread`).
+    """
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH, timeout: float = 30.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS build_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cluster_id INTEGER NOT NULL,
+                    guild_id INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    claimed_at REAL,
+                    claimed_by TEXT,
+                    finished_at REAL,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_build_jobs_claim ON build_jobs(cluster_id, status, id)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit mode: transactions are opened explicitly where claims need them
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def put(self, cluster_id: int, guild_id: int, payload: Dict[str, Any]) -> int:
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "INSERT INTO build_jobs (cluster_id, guild_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                (cluster_id, int(guild_id), json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            return cur.lastrowid
+        finally:
+            conn.close()
+
+    def claim(self, cluster_id: int, worker: Optional[str] = None) -> Optional[Job]:
+        """Take the oldest queued job for `cluster_id`, or None when there is none."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, guild_id, payload, attempts FROM build_jobs WHERE cluster_id = ? AND status = ? ORDER BY id LIMIT 1",
+                (cluster_id, JOB_QUEUED),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE build_jobs SET status = ?, attempts = attempts + 1, claimed_at = ?, claimed_by = ? WHERE id = ?",
+                (JOB_CLAIMED, time.time(), worker or f"{socket.gethostname()}:{os.getpid()}", row[0]),
+            )
+            conn.execute("COMMIT")
+            return Job(id=row[0], cluster_id=cluster_id, guild_id=row[1], payload=json.loads(row[2]), attempts=row[3] + 1)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, error: Optional[str] = None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE build_jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (JOB_FAILED if error else JOB_DONE, time.time(), error, job_id),
+            )
+        finally:
+            conn.close()
+
+    def release_claims(self, cluster_id: int) -> int:
+        """Requeue jobs a previous run of `cluster_id` claimed but never finished."""
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE build_jobs SET status = ?, claimed_at = NULL, claimed_by = NULL WHERE cluster_id = ? AND status = ?",
+                (JOB_QUEUED, cluster_id, JOB_CLAIMED),
+            )
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def counts(self, cluster_id: Optional[int] = None) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            sql = "SELECT status, COUNT(*) FROM build_jobs"
+            args: tuple = ()
+            if cluster_id is not None:
+                sql += " WHERE cluster_id = ?"
+                args = (cluster_id,)
+            return dict(conn.execute(sql + " GROUP BY status", args).fetchall())
+        finally:
+            conn.close()
+
+
+def encode_build_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON form of a plan build item; process-local parts (the progress reporter) are dropped."""
+    return {"plan": item["plan"].to_dict(), "dry_run": bool(item.get("dry_run", False)), "guild_id": int(item["guild_id"])}
+
+
+def decode_build_item(job: Job) -> Dict[str, Any]:
+    from .core.persistence.backup import plan_from_dict
+
+    return {
+        "type": "plan",
+        "plan": plan_from_dict(job.payload["plan"]),
+        "dry_run": job.payload.get("dry_run", False),
+        "guild_id": job.guild_id,
+        "job_id": job.id,
+    }
+
+
+class ClusterRouter:
+    """Send build items to the process that owns their guild."""
+
+    def __init__(self, config: ClusterConfig, local_put: Callable[[Dict[str, Any]], Awaitable[None]], queue: Optional[JobQueue] = None):
+        self.config = config
+        self.local_put = local_put
+        self.queue = queue
+
+    async def submit(self, item: Dict[str, Any]) -> int:
+        """Queue `item` locally or for its owning cluster; returns the cluster id it went to."""
+        gid = item.get("guild_id")
+        if self.queue is None or gid is None or self.config.owns_guild(int(gid)):
+            await self.local_put(item)
+            return self.config.cluster_id
+        target = self.config.cluster_for_guild(int(gid))
+        job_id = await asyncio.to_thread(self.queue.put, target, int(gid), encode_build_item(item))
+        logger.info("Routed %s for guild %s to cluster %s (job %s)", getattr(item.get("plan"), "name", "plan"), gid, target, job_id)
+        return target
+
+    async def complete(self, item: Dict[str, Any], error: Optional[str] = None):
+        """Mark a build item that came off the shared queue as finished."""
+        if self.queue is not None and item.get("job_id") is not None:
+            await asyncio.to_thread(self.queue.complete, item["job_id"], error)
+
+    async def poll(self, interval: float = 1.0, stop: Optional[asyncio.Event] = None):
+        """Feed this cluster's shared-queue jobs into the local build queue until `stop` is set."""
+        if self.queue is None:
+            return
+        released = await asyncio.to_thread(self.queue.release_claims, self.config.cluster_id)
+        if released:
+            logger.warning("Requeued %d unfinished cluster jobs from a previous run", released)
+        while stop is None or not stop.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.config.cluster_id)
+            except sqlite3.Error:
+                logger.exception("Failed to poll the cluster job queue")
+                job = None
+            if job is None:
+                if stop is None:
+                    await asyncio.sleep(interval)
+                else:
+                    try:
+                        await asyncio.wait_for(stop.wait(), interval)
+                    except asyncio.TimeoutError:
+                        pass
+                continue
+            try:
+                item = decode_build_item(job)
+            except Exception as exc:
+                logger.exception("Dropping malformed cluster job %s", job.id)
+                await asyncio.to_thread(self.queue.complete, job.id, f"malformed: {exc}")
+                continue
+            await self.local_put(item)
@@ -2,6 +2,12 @@ import discord
 from discord.ext import commands
 from typing import Optional
 
+from ..circuit_breaker import breakers
+from .. import command_sync
+from ..loop_watchdog import watchdog
+from ..request_scheduler import scheduler_stats
+from ..startup import startup_report
+
 
 class AdminTools(commands.Cog):
     """Admin utilities for managing application commands."""
@@ -12,7 +18,7 @@ class AdminTools(commands.Cog):
     @commands.is_owner()
     @commands.hybrid_command(name="sync_commands", with_app_command=True)
     async def sync_commands(self, ctx: commands.Context, guild_id: Optional[int] = None):
-        """Sync application commands. Owner-only.
+        """Force-sync application commands, even if unchanged. Owner-only.
 
         Usage: `C!sync_commands` or `/sync_commands guild_id:optional`
         If `guild_id` is provided the bot will copy globals to that guild and sync there for instant visibility.
@@ -21,12 +27,12 @@ class AdminTools(commands.Cog):
         try:
             if guild_id:
                 guild = discord.Object(id=guild_id)
-                self.bot.tree.copy_global_to_guild(guild)
-                await self.bot.tree.sync(guild=guild)
+                self.bot.tree.copy_global_to(guild=guild)
+                await command_sync.sync_commands(self.bot.tree, guild=guild, force=True)
                 cmds = list(self.bot.tree.get_commands(guild=guild))
                 await ctx.followup.send(f"Synced commands to guild {guild_id}. Count={len(cmds)}")
             else:
-                await self.bot.tree.sync()
+                await command_sync.sync_commands(self.bot.tree, force=True)
                 cmds = list(self.bot.tree.get_commands())
                 await ctx.followup.send(f"Synced global commands. Count={len(cmds)}")
         except Exception as e:
@@ -44,8 +50,8 @@ class AdminTools(commands.Cog):
         try:
             guild = discord.Object(id=guild_id)
             # copy globals to the target guild and sync
-            self.bot.tree.copy_global_to_guild(guild)
-            await self.bot.tree.sync(guild=guild)
+            self.bot.tree.copy_global_to(guild=guild)
+            await command_sync.sync_commands(self.bot.tree, guild=guild, force=True)
             cmds = list(self.bot.tree.get_commands(guild=guild))
             msg = f"Force-synced commands to guild {guild_id}. Count={len(cmds)}"
             cid = client_id or (getattr(self.bot.user, "id", None))
@@ -56,6 +62,56 @@ class AdminTools(commands.Cog):
         except Exception as e:
             await ctx.followup.send(f"Force resync failed: {e}")
 
+    @commands.is_owner()
+    @commands.command(name="api_queue_stats")
+    async def api_queue_stats(self, ctx: commands.Context):
+        """Show API request queue-wait metrics per priority class. Owner-only."""
+        lines = []
+        for name, s in scheduler_stats().items():
+            lines.append(
+                f"{name}: submitted={int(s['submitted'])} waiting={int(s['waiting'])} "
+                f"avg_wait={s['wait_avg'] * 1000:.1f}ms max_wait={s['wait_max'] * 1000:.1f}ms"
+            )
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    @commands.is_owner()
+    @commands.command(name="circuit_breakers")
+    async def circuit_breakers(self, ctx: commands.Context):
+        """List open or failing per-guild circuit breakers. Owner-only."""
+        snap = breakers.snapshot()
+        if not snap:
+            await ctx.send("All circuit breakers are closed.")
+            return
+        lines = [f"{key}: {b['state']} failures={b['failures']} {b['reason']}" for key, b in snap.items()]
+        await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+    @commands.is_owner()
+    @commands.command(name="loop_lag")
+    async def loop_lag(self, ctx: commands.Context, limit: int = 3, reset: str = ""):
+        """Show event-loop lag and the code sites that blocked it longest. Owner-only.
+
+        Usage: `C!loop_lag [limit] [reset]`
+        """
+        if not watchdog.running:
+            await ctx.send("Loop watchdog is not running (CONDITOR_LOOP_WATCHDOG=0?).")
+            return
+        lines = [
+            f"lag={watchdog.last_lag * 1000:.1f}ms max={watchdog.max_lag * 1000:.1f}ms "
+            f"stalls={watchdog.stalls} threshold={watchdog.threshold * 1000:.0f}ms"
+        ]
+        for o in watchdog.report(max(1, min(limit, 10))):
+            lines.append(f"\n{o.site}: worst={o.worst * 1000:.0f}ms count={o.count} total={o.total:.2f}s")
+            lines.extend(o.stack[-4:])
+        if reset.lower() == "reset":
+            watchdog.reset()
+        await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+    @commands.is_owner()
+    @commands.command(name="startup_report")
+    async def show_startup_report(self, ctx: commands.Context):
+        """Show startup phase times and per-cog import/load timings. Owner-only."""
+        await ctx.send("```\n" + (startup_report.render() or "No startup data recorded.")[:1900] + "\n```")
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AdminTools(bot))
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+from .. import storage
+
+PAGE_SIZE = 10
+
+KIND_ALIASES = {"template": "template_*", "templates": "template_*", "approvals": "approval"}
+
+
+def _parse_time(text: str) -> float:
+    when = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    return (when if when.tzinfo else when.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def parse_filters(args: List[str]) -> Dict[str, Any]:
+    """Turn `user:<id|mention> plan:<name> kind:<kind> since:<iso> until:<iso>` into query kwargs."""
+    filters: Dict[str, Any] = {}
+    for arg in args:
+        key, sep, value = arg.partition(":")
+        key = key.lower()
+        if not sep or not value:
+            raise commands.BadArgument(f"Expected key:value, got '{arg}'")
+        if key == "user":
+            filters["user_id"] = int(value.strip("<@!>"))
+        elif key == "plan":
+            filters["plan_name"] = value
+        elif key == "kind":
+            filters["kind"] = KIND_ALIASES.get(value.lower(), value.lower())
+        elif key in ("since", "until"):
+            try:
+                filters[key] = _parse_time(value)
+            except ValueError:
+                raise commands.BadArgument(f"Invalid {key} timestamp '{value}' (use ISO-8601)")
+        else:
+            raise commands.BadArgument(f"Unknown filter '{key}'")
+    return filters
+
+
+def format_entry(rec: Dict[str, Any]) -> str:
+    when = datetime.fromtimestamp(rec["ts"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+    subject = rec.get("plan_name") or rec.get("template") or "-"
+    who = rec.get("user_name") or rec.get("user_id") or "?"
+    return f"#{rec['id']} {when} {rec['kind']:<16} {subject} by {who}"
+
+
+class AuditPager(discord.ui.View):
+    """Older/Newer buttons over keyset pages of `storage.query_audit`."""
+
+    def __init__(self, author_id: int, filters: Dict[str, Any], timeout: float = 180.0):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.filters = filters
+        # `before_id` cursors of the pages shown so far; None is the newest page
+        self.cursors: List[Optional[int]] = [None]
+        self.rows: List[Dict[str, Any]] = []
+        self.has_more = False
+
+    def load(self):
+        rows = storage.query_audit(before_id=self.cursors[-1], limit=PAGE_SIZE + 1, **self.filters)
+        self.has_more = len(rows) > PAGE_SIZE
+        self.rows = rows[:PAGE_SIZE]
+        self.newer.disabled = len(self.cursors) == 1
+        self.older.disabled = not self.has_more
+
+    def render(self) -> str:
+        if not self.rows:
+            return "No audit entries match."
+        body = "\n".join(format_entry(r) for r in self.rows)
+        return f"Audit log (page {len(self.cursors)})\n```\n{body[:1900]}\n```"
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.grey)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.grey)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_more and self.rows:
+            self.cursors.append(self.rows[-1]["id"])
+        self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+
+class AuditCog(commands.Cog):
+    """Browse the approval and template-edit audit log."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="audit")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_audit(self, ctx: commands.Context, *args: str):
+        """Page through this server's audit log.
+
+        Usage: C!audit [user:<id|@mention>] [plan:<name>] [kind:approval|template] [since:<iso>] [until:<iso>]
+        """
+        try:
+            filters = parse_filters(list(args))
+        except (commands.BadArgument, ValueError) as exc:
+            await ctx.send(str(exc))
+            return
+        filters["guild_id"] = ctx.guild.id
+        view = AuditPager(ctx.author.id, filters)
+        view.load()
+        await ctx.send(view.render(), view=view if view.has_more else None)
+
+
+async def setup(bot: commands.Bot):
+    storage.init_db()
+    await bot.add_cog(AuditCog(bot))
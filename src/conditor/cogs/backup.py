@@ -1,10 +1,48 @@
 import json
+import os
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence, Tuple
 
 import discord
 from discord.ext import commands
 from ..i18n import Localizer
+from ..request_scheduler import Priority, run_scheduled
+from .. import storage
+from ..file_writer import file_writer
+from ..core.persistence.archive import ARCHIVE_SUFFIX, SnapshotArchive, find_snapshot, list_snapshots
+from ..core.persistence.scheduler import BackupScheduler
+from ..core.planner.models import BuildPlan
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_when(text: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp (UTC when no offset is given); None means latest."""
+    if not text or text.lower() == "latest":
+        return None
+    when = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+def parse_restore_args(args: Sequence[str]) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """Split `[timestamp|latest] [names...]` into `(when, names)`.
+
+    The first argument is the snapshot time only when it parses as one;
+    otherwise every argument is a name.
+    """
+    if args:
+        try:
+            _parse_when(args[0])
+        except ValueError:
+            return None, tuple(args)
+        return args[0], tuple(args[1:])
+    return None, ()
 
 
 class BackupCog(commands.Cog):
@@ -12,6 +50,25 @@ class BackupCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.scheduler = BackupScheduler(
+            bot,
+            storage.list_backup_schedule,
+            tick=_env_number("CONDITOR_BACKUP_TICK", 600),
+            min_interval=_env_number("CONDITOR_BACKUP_INTERVAL", 6 * 3600),
+            jitter=_env_number("CONDITOR_BACKUP_JITTER", 300),
+            max_concurrency=int(_env_number("CONDITOR_BACKUP_CONCURRENCY", 2)),
+            keep=int(_env_number("CONDITOR_BACKUP_KEEP", 7)),
+            max_age=_env_number("CONDITOR_BACKUP_MAX_AGE_DAYS", 30) * 86400,
+            api_calls=int(_env_number("CONDITOR_BACKUP_API_BUDGET", 600)),
+            api_window=_env_number("CONDITOR_BACKUP_API_WINDOW", 3600),
+        )
+
+    async def cog_load(self):
+        if os.getenv("CONDITOR_BACKUP_SCHEDULER", "1").lower() not in ("0", "false", "no"):
+            self.scheduler.start()
+
+    async def cog_unload(self):
+        await self.scheduler.stop()
 
     def _snapshot_path(self, guild: discord.Guild) -> Path:
         base = Path(__file__).parent.parent.parent
@@ -44,10 +101,10 @@ class BackupCog(commands.Cog):
             data["channels"].append(self._serialize_channel(ch))
             # archive recent messages for text channels
             if isinstance(ch, discord.TextChannel):
-                msgs = []
-                try:
+                async def _fetch_history(ch=ch):
+                    collected = []
                     async for m in ch.history(limit=50):
-                        msgs.append({
+                        collected.append({
                             "id": m.id,
                             "author": m.author.display_name,
                             "content": m.content,
@@ -55,13 +112,132 @@ class BackupCog(commands.Cog):
                             "attachments": [a.url for a in m.attachments],
                             "embeds": [e.to_dict() for e in m.embeds],
                         })
+                    return collected
+
+                try:
+                    msgs = await run_scheduled(Priority.BULK, guild.id, _fetch_history)
                 except Exception:
                     msgs = []
                 data.setdefault("messages", {}).setdefault(ch.name, msgs)
 
-        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        await file_writer.write_atomic(path, json.dumps(data, indent=2))
         await ctx.send(localizer.get("build_complete", roles=len(data["roles"]), channels=len(data["channels"])))
 
+    @commands.command(name="conditor_backup_schedule")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_backup_schedule(self, ctx: commands.Context, state: str = "on"):
+        """Opt this guild in or out of scheduled backups. Usage: C!conditor_backup_schedule on|off"""
+        enabled = state.lower() in ("on", "true", "1", "yes")
+        storage.set_backup_schedule(ctx.guild.id, enabled)
+        if enabled:
+            hours = self.scheduler.min_interval / 3600
+            await ctx.send(f"Scheduled backups enabled (at most every {hours:g}h, keeping {self.scheduler.keep} snapshots).")
+        else:
+            await ctx.send("Scheduled backups disabled for this server.")
+
+    def _open_archive(self, guild: discord.Guild, when: Optional[str]) -> Optional[SnapshotArchive]:
+        path = find_snapshot(guild.id, _parse_when(when), self.scheduler.backup_dir)
+        if path is None or path.suffix != ARCHIVE_SUFFIX:
+            return None
+        return SnapshotArchive(path)
+
+    async def _resolve_channel(self, ctx: commands.Context, archive: SnapshotArchive, ref: str) -> Optional[Dict[str, Any]]:
+        """The snapshot channel `ref` names; replies and returns None when it is missing or ambiguous."""
+        matches = archive.find_channels(ref)
+        if not matches:
+            await ctx.send(f"Channel '{ref}' is not in snapshot {archive.path.name}.")
+            return None
+        if len(matches) > 1:
+            lines = [f"{len(matches)} channels in snapshot {archive.path.name} match '{ref}'. Run the command again with one of these ids:"]
+            for c in matches:
+                cid = c["key"][len("chan-"):] if c["key"].startswith("chan-") else c["key"]
+                lines.append(f"- {cid}: #{c['name']} in {c.get('category') or 'no category'} ({archive.message_count(c['key'])} messages)")
+            await ctx.send("\n".join(lines))
+            return None
+        return matches[0]
+
+    @commands.command(name="conditor_snapshots")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_snapshots(self, ctx: commands.Context):
+        """List scheduled snapshots available for point-in-time restore."""
+        snaps = list_snapshots(ctx.guild.id, self.scheduler.backup_dir)
+        if not snaps:
+            await ctx.send("No scheduled snapshots for this server.")
+            return
+        lines = [f"- {ts.isoformat()} ({p.stat().st_size // 1024} KiB)" for ts, p in snaps[-20:]]
+        await ctx.send("Snapshots (newest last):\n" + "\n".join(lines))
+
+    @commands.command(name="conditor_backup_preview")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_backup_preview(self, ctx: commands.Context, channel: str, when: Optional[str] = None):
+        """Preview one channel from a snapshot. Usage: C!conditor_backup_preview <channel name|id|#mention> [timestamp]"""
+        try:
+            archive = self._open_archive(ctx.guild, when)
+        except ValueError as exc:
+            await ctx.send(f"Invalid timestamp: {exc}")
+            return
+        if archive is None:
+            await ctx.send("No snapshot found for that time.")
+            return
+        with archive:
+            entry = await self._resolve_channel(ctx, archive, channel)
+            if entry is None:
+                return
+            steps = archive.channel_steps(entry["key"], include_messages=False)
+            chan = steps[-1].payload
+            msgs = archive.read_segment(f"messages:{entry['key']}")[:5]
+            lines = [
+                f"Snapshot {archive.path.name}: #{chan.get('name')} ({chan.get('type')}) in {chan.get('category') or 'no category'}",
+                f"Messages captured: {archive.message_count(entry['key'])}",
+            ]
+            lines.extend(f"> {m.payload.get('author_name', '?')}: {(m.payload.get('content') or '')[:80]}" for m in msgs)
+        await ctx.send("\n".join(lines))
+
+    async def _enqueue_partial(self, ctx: commands.Context, plan: BuildPlan):
+        from ..bot import submit_build
+
+        await submit_build({'type': 'plan', 'plan': plan, 'dry_run': False, 'guild_id': ctx.guild.id})
+        await ctx.send(f"Queued {plan.name} ({len(plan.steps)} steps).")
+
+    @commands.command(name="conditor_restore_channel")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_restore_channel(self, ctx: commands.Context, channel: str, when: Optional[str] = None):
+        """Restore a single channel and its messages. Usage: C!conditor_restore_channel <channel name|id|#mention> [timestamp]"""
+        try:
+            archive = self._open_archive(ctx.guild, when)
+        except ValueError as exc:
+            await ctx.send(f"Invalid timestamp: {exc}")
+            return
+        if archive is None:
+            await ctx.send("No snapshot found for that time.")
+            return
+        with archive:
+            entry = await self._resolve_channel(ctx, archive, channel)
+            if entry is None:
+                return
+            plan = BuildPlan(name=f"restore-{entry['name']}-{archive.path.stem}")
+            for step in archive.channel_steps(entry["key"]):
+                plan.add_step(step)
+        await self._enqueue_partial(ctx, plan)
+
+    @commands.command(name="conditor_restore_roles")
+    @commands.has_guild_permissions(administrator=True)
+    async def cmd_restore_roles(self, ctx: commands.Context, *args: str):
+        """Restore roles from a snapshot. Usage: C!conditor_restore_roles [timestamp|latest] [role names...]"""
+        when, names = parse_restore_args(args)
+        archive = self._open_archive(ctx.guild, when)
+        if archive is None:
+            await ctx.send("No snapshot found for that time.")
+            return
+        with archive:
+            plan = BuildPlan(name=f"restore-roles-{archive.path.stem}")
+            for step in archive.role_steps(names or None):
+                plan.add_step(step)
+        if not plan.steps:
+            await ctx.send("No matching roles in that snapshot.")
+            return
+        await self._enqueue_partial(ctx, plan)
+
     @commands.command(name="conditor_restore")
     @commands.has_guild_permissions(administrator=True)
     async def cmd_restore(self, ctx: commands.Context):
@@ -80,11 +256,12 @@ class BackupCog(commands.Cog):
 
         # Attempt structural restore: create roles, categories, channels, then replay messages via webhooks
         # Note: this operation will modify the guild. Ensure bot has appropriate permissions.
+        # Every call is bulk traffic, so it yields to interactive commands in the scheduler.
         # Roles
         created_roles = {}
         for r in roles:
             try:
-                role = await guild.create_role(name=r.get("name"), colour=discord.Colour.from_str(r.get("color", "#000000")), permissions=discord.Permissions(r.get("permissions", 0)), reason="Conditor restore")
+                role = await run_scheduled(Priority.BULK, guild.id, guild.create_role, name=r.get("name"), colour=discord.Colour.from_str(r.get("color", "#000000")), permissions=discord.Permissions(r.get("permissions", 0)), reason="Conditor restore")
                 created_roles[r.get("name")] = role
             except Exception:
                 continue
@@ -93,7 +270,7 @@ class BackupCog(commands.Cog):
         category_map = {}
         for c in cats:
             try:
-                category_map[c.get("name")] = await guild.create_category(c.get("name"))
+                category_map[c.get("name")] = await run_scheduled(Priority.BULK, guild.id, guild.create_category, c.get("name"))
             except Exception:
                 continue
 
@@ -103,13 +280,13 @@ class BackupCog(commands.Cog):
             try:
                 if ch.get("type", "text").lower().startswith("text"):
                     category = category_map.get(ch.get("category"))
-                    new_ch = await guild.create_text_channel(ch.get("name"), category=category)
+                    new_ch = await run_scheduled(Priority.BULK, guild.id, guild.create_text_channel, ch.get("name"), category=category)
                     # create webhook for replay
                     try:
-                        wh = await new_ch.create_webhook(name="Conditor Replay")
+                        wh = await run_scheduled(Priority.BULK, guild.id, new_ch.create_webhook, name="Conditor Replay")
                         for msg in reversed(messages.get(ch.get("name"), [])):
                             try:
-                                await wh.send(content=msg.get("content") or "[embed/attachment]", username=msg.get("author", "unknown"))
+                                await run_scheduled(Priority.BULK, guild.id, wh.send, content=msg.get("content") or "[embed/attachment]", username=msg.get("author", "unknown"))
                             except Exception:
                                 continue
                     except Exception:
@@ -117,7 +294,7 @@ class BackupCog(commands.Cog):
                         pass
                 else:
                     # create voice/stage as text channel stand-in
-                    await guild.create_text_channel(ch.get("name"))
+                    await run_scheduled(Priority.BULK, guild.id, guild.create_text_channel, ch.get("name"))
             except Exception:
                 continue
 
@@ -125,4 +302,5 @@ class BackupCog(commands.Cog):
 
 
 async def setup(bot: commands.Bot):
+    storage.init_db()
     await bot.add_cog(BackupCog(bot))
@@ -1,158 +1,169 @@
 import asyncio
 import json
+import logging
 import math
 import random
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import discord
 from discord.ext import commands
 from ..i18n import Localizer
-from .. import storage
-from ..rate_limiter import run_with_rate_limit
-from ..permissions import apply_channel_overwrites, ensure_bot_role_position
+from .. import data_snapshot, storage
+from ..request_scheduler import Priority, run_scheduled
+from ..core.planner.models import StepType
+from ..core.planner.preview import PlanPreview, PlanPreviewView
+from ..core.executor.worker import ExecutorEvent, PLAN_FINISHED, STEP_FAILED, STEP_SUCCEEDED
 import io
 
+logger = logging.getLogger(__name__)
 
-PERMISSION_PROFILES = {
-    "admin": discord.Permissions(administrator=True),
-    "moderation": discord.Permissions(kick_members=True, ban_members=True, manage_messages=True),
-    "member": discord.Permissions(send_messages=True, read_messages=True),
+
+def parse_template_ref(ref: str) -> Tuple[str, Optional[int]]:
+    """Split `name@v3` / `name@3` into `("name", 3)`; a bare name has version None."""
+    name, sep, version = ref.rpartition("@")
+    if not sep:
+        return ref, None
+    return name, int(version.lstrip("vV"))
+
+
+# localized progress line shown for each step type while a plan runs
+STEP_PROGRESS_KEYS = {
+    StepType.CREATE_ROLE: "forging_roles",
+    StepType.CREATE_CATEGORY: "organising_categories",
+    StepType.CREATE_CHANNEL: "constructing_channels",
+    StepType.APPLY_PERMISSIONS: "binding_permissions",
 }
 
 
 class ProgressReporter:
-    def __init__(self, ctx: commands.Context):
+    """Progress message that coalesces updates into at most one edit per `interval`.
+
+    `update` only records the latest text and never waits on Discord: a
+    background flush sends it as soon as the interval has elapsed, and whatever
+    is latest by then wins. A slow or rate-limited edit therefore cannot hold up
+    the executor that emits the updates. `flush` forces the final state out. If the message can no longer be
+    edited a single replacement is posted and edited from then on.
+    `attach(executor, plan)` subscribes it to that plan's executor events; the
+    final report then runs as `finish_task`.
+    """
+
+    def __init__(self, ctx: commands.Context, localizer: Localizer = None, interval: float = 2.0):
         self.ctx = ctx
+        self.localizer = localizer or Localizer()
+        self.interval = interval
         self.message = None
+        # progress edits are rate limited per channel, not per guild
+        self.key = ("progress", getattr(ctx.channel, "id", None))
+        self._pending = None
+        self._last_edit = 0.0
+        self._flush_task = None
+        self._editing = False
+        self.finish_task = None
+        self._totals = Counter()
+        self._done = Counter()
+        self._ok = Counter()
+
+    async def _send(self, content: str):
+        return await run_scheduled(Priority.PROGRESS, self.key, self.ctx.send, content)
 
     async def start(self, text: str):
-        self.message = await self.ctx.send(text)
+        self.message = await self._send(text)
+        self._last_edit = time.monotonic()
 
-    async def update(self, content: str):
-        if self.message:
+    async def _edit(self, content: str):
+        self._last_edit = time.monotonic()
+        if self.message is not None:
             try:
-                await self.message.edit(content=content)
+                await run_scheduled(Priority.PROGRESS, self.key, self.message.edit, content=content)
+                return
             except discord.HTTPException:
-                await self.ctx.send(content)
-        else:
-            await self.ctx.send(content)
+                self.message = None
+        self.message = await self._send(content)
+
+    async def _flush_pending(self):
+        content, self._pending = self._pending, None
+        if content is not None:
+            await self._edit(content)
+
+    async def _delayed_flush(self, wait: float):
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            return
+        self._editing = True
+        try:
+            await self._flush_pending()
+        except Exception:
+            logger.exception("Progress update failed")
+        finally:
+            self._editing = False
+            self._flush_task = None
+        # updates that arrived while the edit was in flight
+        if self._pending is not None:
+            self._schedule()
+
+    def _schedule(self):
+        if self._flush_task is None:
+            wait = max(0.0, self.interval - (time.monotonic() - self._last_edit))
+            self._flush_task = asyncio.create_task(self._delayed_flush(wait))
+
+    async def update(self, content: str):
+        """Record `content` as the latest state; the edit happens in the background, never in the caller."""
+        self._pending = content
+        self._schedule()
+
+    async def flush(self):
+        while self._flush_task is not None:
+            task = self._flush_task
+            if self._editing:
+                # let an edit in flight finish rather than dropping its content
+                await asyncio.gather(task, return_exceptions=True)
+            else:
+                self._flush_task = None
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await self._flush_pending()
 
     async def error(self, text: str):
-        await self.ctx.send(f"Error: {text}")
+        await self.flush()
+        await self._send(f"Error: {text}")
         if self.message:
             try:
-                await self.message.edit(content=f"Failed: {text}")
+                await run_scheduled(Priority.PROGRESS, self.key, self.message.edit, content=f"Failed: {text}")
             except Exception:
                 pass
 
-
-class BuildJob:
-    def __init__(self, guild: discord.Guild, template: Dict[str, Any], reporter: ProgressReporter, localizer: Localizer, dry_run: bool = False):
-        self.guild = guild
-        self.template = template
-        self.reporter = reporter
-        self.localizer = localizer
-        self.dry_run = dry_run
-
-    async def run(self):
-        await self.reporter.update(self.localizer.get("estimate_ops", total_ops=0, eta=0))
-        # Basic validations
-        if not getattr(self.guild.me, "guild_permissions", None) or not self.guild.me.guild_permissions.manage_guild:
-            await self.reporter.error(self.localizer.get("missing_permissions", permission="Manage Guild"))
+    def attach(self, executor, plan) -> Callable[[], None]:
+        """Follow `plan` on `executor`'s event stream; returns a detach function."""
+        self._totals = Counter(s.type for s in plan.steps)
+        self._done = Counter()
+        self._ok = Counter()
+        detach = [executor.subscribe(name, self.on_event, plan=plan) for name in (STEP_SUCCEEDED, STEP_FAILED, PLAN_FINISHED)]
+        return lambda: [d() for d in detach]
+
+    async def on_event(self, event: ExecutorEvent):
+        if event.name == PLAN_FINISHED:
+            # the final flush may wait on an edit in flight; keep it off the executor
+            self.finish_task = asyncio.create_task(self.finish(event.state or {}))
             return
-        role_defs = self.template.get("roles", [])
-        cat_defs = self.template.get("categories", [])
-        ch_defs = self.template.get("channels", [])
-
-        total_ops = len(role_defs) + len(cat_defs) + len(ch_defs)
-        base_delay = max(0.2, min(1.5, 0.15 * math.sqrt(max(1, total_ops))))
-        eta = int(total_ops * base_delay)
-
-        await self.reporter.update(self.localizer.get("estimate_ops", total_ops=total_ops, eta=eta))
-
-        # Roles
-        created_roles = {}
-        for i, rd in enumerate(sorted(role_defs, key=lambda r: -r.get("position", 0))):
-            name = rd.get("name") or rd.get("name_key")
-            color = rd.get("color", "#000000")
-            profile = rd.get("profile")
-            perms = PERMISSION_PROFILES.get(profile, discord.Permissions())
-            await self.reporter.update(self.localizer.get("forging_roles", current=i+1, total=len(role_defs)))
-            if not self.dry_run:
-                try:
-                    async def _create_role():
-                        return await self.guild.create_role(name=name, colour=discord.Colour.from_str(color), permissions=perms, reason="Conditor build")
-
-                    role = await run_with_rate_limit(self.guild.id, _create_role)
-                    created_roles[rd.get("key", name)] = role
-                except Exception as exc:
-                    await self.reporter.error(self.localizer.get("failed_role_create", name=name, reason=str(exc)))
-                    raise
-            await asyncio.sleep(base_delay * 1.2)
-
-        # Categories (merge by name)
-        existing_cats = {c.name: c for c in self.guild.categories}
-        category_map = {}
-        for i, cd in enumerate(sorted(cat_defs, key=lambda c: c.get("position", 0))):
-            name = cd.get("name") or cd.get("name_key")
-            await self.reporter.update(self.localizer.get("organising_categories", current=i+1, total=len(cat_defs)))
-            if name in existing_cats:
-                category_map[name] = existing_cats[name]
-            else:
-                if not self.dry_run:
-                    try:
-                        async def _create_cat():
-                            return await self.guild.create_category(name)
-
-                        category_map[name] = await run_with_rate_limit(self.guild.id, _create_cat)
-                    except Exception as exc:
-                        await self.reporter.error(self.localizer.get("failed_channel_create", name=name, reason=str(exc)))
-                        raise
-            await asyncio.sleep(base_delay)
-
-        # Channels
-        for i, ch in enumerate(ch_defs):
-            name = ch.get("name") or ch.get("name_key")
-            ctype = ch.get("type", "text")
-            cat_name = ch.get("category") or ch.get("category_key")
-            category = category_map.get(cat_name)
-            await self.reporter.update(self.localizer.get("constructing_channels", current=i+1, total=len(ch_defs)))
-            if not self.dry_run:
-                try:
-                    # create channel via rate-limited wrapper
-                    async def _create_channel():
-                        if ctype == "text":
-                            return await self.guild.create_text_channel(name, category=category)
-                        elif ctype == "voice":
-                            return await self.guild.create_voice_channel(name, category=category)
-                        elif ctype == "announcement":
-                            return await self.guild.create_text_channel(name, category=category, news=True)
-                        else:
-                            return await self.guild.create_text_channel(name, category=category)
-
-                    new_ch = await run_with_rate_limit(self.guild.id, _create_channel)
-                    # apply overwrites if present
-                    overwrites = ch.get("overwrites") or ch.get("overrides")
-                    if overwrites:
-                        try:
-                            await apply_channel_overwrites(self.guild, new_ch, overwrites)
-                        except Exception as exc:
-                            await self.reporter.error(self.localizer.get("failed_channel_create", name=name, reason=str(exc)))
-                            raise
-                except discord.HTTPException as exc:
-                    await self.reporter.error(self.localizer.get("failed_channel_create", name=name, reason=str(exc)))
-                    raise
-            await asyncio.sleep(base_delay)
-
-        # Permissions application and localization would be next — simplified here
-        await self.reporter.update(self.localizer.get("binding_permissions"))
-        await asyncio.sleep(base_delay * 1.3)
-
-        await self.reporter.update(self.localizer.get("snapshotting"))
-        await asyncio.sleep(0.5)
-
-        await self.reporter.update(self.localizer.get("build_complete", roles=len(created_roles), channels=len(ch_defs)))
+        step = event.step
+        self._done[step.type] += 1
+        if event.name == STEP_SUCCEEDED:
+            self._ok[step.type] += 1
+        key = STEP_PROGRESS_KEYS.get(step.type)
+        if key:
+            await self.update(self.localizer.get(key, current=self._done[step.type], total=self._totals[step.type]))
+
+    async def finish(self, state: Dict[str, Any]):
+        text = self.localizer.get("build_complete", roles=self._ok[StepType.CREATE_ROLE], channels=self._ok[StepType.CREATE_CHANNEL])
+        failed = sum(1 for s in state.get("steps", {}).values() if s.get("status") == "failed")
+        if failed:
+            text += f" ({failed} step(s) failed)"
+        await self.update(text)
+        await self.flush()
 
 
 class BuilderCog(commands.Cog):
@@ -162,23 +173,40 @@ class BuilderCog(commands.Cog):
         self.bot = bot
 
     def _load_template(self, name: str) -> dict:
+        return self._load_pinned_template(name)[0]
+
+    def _load_pinned_template(self, ref: str) -> Tuple[dict, str, Optional[int]]:
+        """Resolve `name` or `name@<version>` to `(template, name, version)`.
+
+        DB templates are pinned to a stored version; file templates have version None.
+        """
+        name, version = parse_template_ref(ref)
+        found = storage.load_template_version(name, version)
+        if found:
+            return json.loads(found[1]), name, found[0]
+        if version is not None:
+            raise FileNotFoundError(f"{name}@v{version}")
         # Prefer DB-backed template
         db_content = storage.load_template(name)
         if db_content:
-            return json.loads(db_content)
+            return json.loads(db_content), name, None
+        snapshot = data_snapshot.current()
+        tpl = snapshot.template(name) if snapshot is not None else None
+        if tpl is not None:
+            return tpl, name, None
         base = Path(__file__).parent.parent.parent
         tpl_path = base / "data" / "templates" / f"{name}.json"
         if not tpl_path.exists():
             raise FileNotFoundError(str(tpl_path))
-        return json.loads(tpl_path.read_text(encoding="utf-8"))
+        return json.loads(tpl_path.read_text(encoding="utf-8")), name, None
 
     @commands.command(name="conditor_build")
     @commands.has_guild_permissions(administrator=True)
     async def cmd_build(self, ctx: commands.Context, template_name: str, dry: str = "false"):
-        """Queue a Conditor build. Usage: !conditor_build example_template [dry=true]"""
+        """Queue a Conditor build. Usage: !conditor_build example_template[@version] [dry=true]"""
         try:
-            tpl = self._load_template(template_name)
-        except FileNotFoundError:
+            tpl, template_name, template_version = self._load_pinned_template(template_name)
+        except (FileNotFoundError, ValueError):
             await ctx.send(f"Template not found: {template_name}")
             return
 
@@ -186,51 +214,46 @@ class BuilderCog(commands.Cog):
         locale = getattr(ctx.guild, "preferred_locale", None) or tpl.get("meta", {}).get("languages", [None])[0] or "en"
         localizer = Localizer(locale)
 
-        reporter = ProgressReporter(ctx)
+        reporter = ProgressReporter(ctx, localizer)
         await reporter.start(localizer.get("preflight_preview", roles=len(tpl.get("roles", [])), channels=len(tpl.get("channels", [])), eta=tpl.get("meta", {}).get("estimated_build_seconds", 0)))
         dry_run = dry.lower() in ("true", "1", "yes")
 
         # compile template into a BuildPlan and enqueue it for execution (include invoking guild id)
-        from ..bot import build_queue
+        from ..bot import submit_build
         from ..core.intent.models import ServerSpec
         from ..core.planner import compile_spec_to_plan
 
         spec = ServerSpec()
         spec.extras.setdefault('templates', []).append(tpl)
         plan = compile_spec_to_plan(spec, name=f"build-{tpl.get('meta', {}).get('name', template_name)}")
+        # pin the exact template version this build was compiled from
+        plan.meta['template'] = {'name': template_name, 'version': template_version}
 
-        # present human approval preview before enqueueing
-        preview_lines = [f"Plan: {plan.name} (steps={len(plan.steps)})"]
-        for i, s in enumerate(plan.steps[:40]):
-            preview_lines.append(f"{i+1}. {s.type.value} -> {s.payload}")
-        preview_text = "\n".join(preview_lines)
-        if len(preview_text) > 1500:
-            preview_text = preview_text[:1400] + "\n... (truncated)"
+        # present human approval preview before enqueueing (paginated, rendered as pages are viewed)
+        pinned = f" from {template_name}@v{template_version}" if template_version else ""
+        preview = PlanPreview(plan, title=f"Preflight plan preview: {plan.name}{pinned}")
 
         # present approval UI using buttons
-        class ApprovalView(discord.ui.View):
+        class ApprovalView(PlanPreviewView):
             def __init__(self, requester_id: int, timeout: float = 300.0):
-                super().__init__(timeout=timeout)
+                super().__init__(preview, requester_id, timeout=timeout)
                 self.requester_id = requester_id
                 self.result = None
 
-            async def interaction_check(self, interaction: discord.Interaction) -> bool:
-                return interaction.user.id == self.requester_id
-
             @discord.ui.button(label="Approve", style=discord.ButtonStyle.green)
-            async def approve(self, button: discord.ui.Button, interaction: discord.Interaction):
+            async def approve(self, interaction: discord.Interaction, button: discord.ui.Button):
                 self.result = {"approved": True, "user": {"id": interaction.user.id, "name": str(interaction.user)}}
                 await interaction.response.edit_message(content=f"Approved by {interaction.user}", view=None)
                 self.stop()
 
             @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red)
-            async def cancel(self, button: discord.ui.Button, interaction: discord.Interaction):
+            async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
                 self.result = {"approved": False, "user": {"id": interaction.user.id, "name": str(interaction.user)}}
                 await interaction.response.edit_message(content=f"Cancelled by {interaction.user}", view=None)
                 self.stop()
 
         view = ApprovalView(requester_id=ctx.author.id, timeout=300.0)
-        approval_msg = await ctx.send(f"**Preflight plan preview**\n```\n{preview_text}\n```", view=view)
+        approval_msg = await ctx.send(view.render(), view=view)
 
         await view.wait()
         if not getattr(view, 'result', None):
@@ -267,15 +290,17 @@ class BuilderCog(commands.Cog):
             'approved_at': datetime.utcnow().isoformat() + 'Z',
             'guild_id': ctx.guild.id,
             'plan_name': plan.name,
+            'template': template_name,
+            'template_version': template_version,
             'resource_map': str(map_path),
             'resource_map_snapshot': map_snapshot,
         }
         try:
-            append_approval(audit_entry)
+            await append_approval(audit_entry)
         except Exception:
             pass
 
-        await build_queue.put({'type': 'plan', 'plan': plan, 'dry_run': dry_run, 'guild_id': ctx.guild.id})
+        await submit_build({'type': 'plan', 'plan': plan, 'dry_run': dry_run, 'guild_id': ctx.guild.id, 'reporter': reporter})
         await ctx.send(localizer.get("preflight_preview", roles=len(tpl.get("roles", [])), channels=len(tpl.get("channels", [])), eta=tpl.get("meta", {}).get("estimated_build_seconds", 0)))
 
     @commands.command(name="conditor_simulate")
@@ -4,9 +4,11 @@ from typing import Optional
 import discord
 from discord.ext import commands
 
+from .. import data_snapshot
 from ..core.intent.models import load_template, discover_and_merge
 from ..core.planner import compile_spec_to_plan
-from ..core.executor import Executor, default_noop_handler
+from ..core.planner.preview import PlanPreview, PlanPreviewView
+from ..core.executor import SampleRunner
 from ..core.safety import validate_plan, permission_sanity_checks
 
 
@@ -17,55 +19,65 @@ class EngineCog(commands.Cog):
         self.bot = bot
         base = Path(__file__).parent.parent.parent
         self.base_path = base
-        self.executor = Executor(storage_dir=base / 'data' / 'runtime')
+        self.samples = SampleRunner(storage_dir=base / 'data' / 'runtime' / 'samples')
+
+    def cog_unload(self):
+        self.samples.cancel_all()
+
+    def _default_plan(self, template_name: Optional[str], name: str):
+        """The precompiled plan from the startup snapshot, or None to compile from the JSON files."""
+        snapshot = data_snapshot.current()
+        plan = snapshot.plan(template_name or 'auto') if snapshot is not None else None
+        if plan is not None:
+            plan.name = name
+        return plan
 
     @commands.command(name="plan_preview")
     @commands.has_guild_permissions(administrator=True)
     async def plan_preview(self, ctx: commands.Context, template_name: Optional[str] = None):
         """Compile a plan from templates/questionnaires and preview its steps."""
-        if template_name:
-            tpl_path = self.base_path / 'data' / 'templates' / f"{template_name}.json"
-            if not tpl_path.exists():
-                await ctx.send(f"Template not found: {template_name}")
-                return
-            spec = discover_and_merge(self.base_path)
-            # merge template into spec extras for deterministic plan
-            try:
-                tpl = load_template(tpl_path)
-                spec.extras.setdefault('templates', []).append(tpl)
-            except Exception:
-                pass
-        else:
-            spec = discover_and_merge(self.base_path)
-
-        plan = compile_spec_to_plan(spec, name=f"preview-{template_name or 'auto'}")
+        plan = self._default_plan(template_name, f"preview-{template_name or 'auto'}")
+        if plan is None:
+            if template_name:
+                tpl_path = self.base_path / 'data' / 'templates' / f"{template_name}.json"
+                if not tpl_path.exists():
+                    await ctx.send(f"Template not found: {template_name}")
+                    return
+                spec = discover_and_merge(self.base_path)
+                # merge template into spec extras for deterministic plan
+                try:
+                    tpl = load_template(tpl_path)
+                    spec.extras.setdefault('templates', []).append(tpl)
+                except Exception:
+                    pass
+            else:
+                spec = discover_and_merge(self.base_path)
+            plan = compile_spec_to_plan(spec, name=f"preview-{template_name or 'auto'}")
         ok, errs = validate_plan(plan)
         if not ok:
             await ctx.send(f"Plan validation failed: {errs}")
             return
 
-        # prepare human readable summary
-        lines = [f"Plan: {plan.name} (steps={len(plan.steps)})"]
-        for i, s in enumerate(plan.steps):
-            lines.append(f"{i+1}. {s.type.value} -> {s.payload}")
-        blob = "\n".join(lines)
-        # send a code block with the plan
-        await ctx.send(f"```\n{blob}\n```")
+        # paginated preview; pages are formatted as they are viewed
+        view = PlanPreviewView(PlanPreview(plan), ctx.author.id)
+        await ctx.send(view.render(), view=view)
 
     @commands.command(name="plan_run_sample")
     @commands.has_guild_permissions(administrator=True)
     async def plan_run_sample(self, ctx: commands.Context, template_name: Optional[str] = None):
         """Compile a plan and execute it locally with a noop handler (no Discord API calls)."""
-        spec = discover_and_merge(self.base_path)
-        if template_name:
-            tpl_path = self.base_path / 'data' / 'templates' / f"{template_name}.json"
-            if tpl_path.exists():
-                try:
-                    tpl = load_template(tpl_path)
-                    spec.extras.setdefault('templates', []).append(tpl)
-                except Exception:
-                    pass
-        plan = compile_spec_to_plan(spec, name=f"sample-{template_name or 'auto'}")
+        plan = self._default_plan(template_name, f"sample-{template_name or 'auto'}")
+        if plan is None:
+            spec = discover_and_merge(self.base_path)
+            if template_name:
+                tpl_path = self.base_path / 'data' / 'templates' / f"{template_name}.json"
+                if tpl_path.exists():
+                    try:
+                        tpl = load_template(tpl_path)
+                        spec.extras.setdefault('templates', []).append(tpl)
+                    except Exception:
+                        pass
+            plan = compile_spec_to_plan(spec, name=f"sample-{template_name or 'auto'}")
 
         ok, errs = validate_plan(plan)
         if not ok:
@@ -76,12 +88,43 @@ class EngineCog(commands.Cog):
             await ctx.send(f"Permission sanity failed: {errs2}")
             return
 
-        # run plan using the noop handler and report summary
-        state = self.executor.run_plan(plan, default_noop_handler, resume=False)
-        # return summary
-        successes = sum(1 for s in state.get('steps', {}).values() if s.get('status') == 'success')
-        fails = sum(1 for s in state.get('steps', {}).values() if s.get('status') == 'failed')
-        await ctx.send(f"Sample plan executed. successes={successes} failed={fails}")
+        # run in the background with the noop handler; the report is posted when it ends
+        async def _report(run):
+            await ctx.send(run.report())
+
+        try:
+            run = self.samples.start(plan, requested_by=ctx.author.id, on_finish=_report)
+        except RuntimeError as exc:
+            await ctx.send(f"Cannot start a sample run: {exc}")
+            return
+        await ctx.send(
+            f"Sample run #{run.run_id} started for {run.plan_name} ({run.total} steps). "
+            f"Check it with `C!plan_run_status {run.run_id}`, stop it with `C!plan_run_cancel {run.run_id}`."
+        )
+
+    @commands.command(name="plan_run_status")
+    @commands.has_guild_permissions(administrator=True)
+    async def plan_run_status(self, ctx: commands.Context, run_id: Optional[int] = None):
+        """Show live stats for a sample run, or list recent runs."""
+        if run_id is not None:
+            run = self.samples.get(run_id)
+            await ctx.send(run.report() if run is not None else f"Unknown sample run #{run_id}")
+            return
+        runs = self.samples.runs()
+        if not runs:
+            await ctx.send("No sample runs yet.")
+            return
+        lines = [f"#{r.run_id} {r.plan_name} {r.status} {r.done}/{r.total} ({r.elapsed:.1f}s)" for r in runs[:10]]
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    @commands.command(name="plan_run_cancel")
+    @commands.has_guild_permissions(administrator=True)
+    async def plan_run_cancel(self, ctx: commands.Context, run_id: int):
+        """Cancel a running sample run (the final report follows)."""
+        if not self.samples.cancel(run_id):
+            await ctx.send(f"Sample run #{run_id} is not running.")
+            return
+        await ctx.send(f"Cancelling sample run #{run_id}...")
 
 
 async def setup(bot: commands.Bot):
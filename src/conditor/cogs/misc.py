@@ -3,10 +3,14 @@ from typing import Optional
 import discord
 from discord.ext import commands
 
+from .. import storage
+from ..core.safety.wordfilter import DEFAULT_BANNED_WORDS, word_filter
+from ..request_scheduler import Priority, run_scheduled
+
 FEEDBACK_CHANNEL_ID = 1462000202410889340
 
-# Expand banned words as needed
-BANNED_WORDS = {"shota", "lolicoin", "badword1"}
+# always banned; servers add their own with `C!banned_words add`
+BANNED_WORDS = DEFAULT_BANNED_WORDS
 
 def _parse_color(candidate: Optional[str]) -> Optional[int]:
     """Parse hex color strings like '#ff9900' to int, or None if invalid."""
@@ -19,10 +23,9 @@ def _parse_color(candidate: Optional[str]) -> Optional[int]:
         return int(c, 16)
     return None
 
-def contains_banned(text: str) -> bool:
-    """Check if the text contains any banned words (basic filter)."""
-    t = re.sub(r"[^a-z0-9]", "", text.lower())
-    return any(w in t for w in BANNED_WORDS)
+def contains_banned(text: str, guild_id: Optional[int] = None) -> bool:
+    """Check if the text contains any word banned globally or in `guild_id`."""
+    return word_filter.contains(text, guild_id)
 
 class MiscCog(commands.Cog):
     """Utility commands: embed, say, feedback (prefix + slash/hybrid)."""
@@ -33,9 +36,9 @@ class MiscCog(commands.Cog):
     async def _respond(self, ctx: commands.Context, content=None, embed=None, ephemeral=False):
         inter = getattr(ctx, "interaction", None)
         if inter and hasattr(inter, "response") and not inter.response.is_done():
-            await inter.response.send_message(content=content, embed=embed, ephemeral=ephemeral)
+            await run_scheduled(Priority.INTERACTIVE, None, inter.response.send_message, content=content, embed=embed, ephemeral=ephemeral)
         else:
-            await ctx.send(content=content, embed=embed)
+            await run_scheduled(Priority.INTERACTIVE, None, ctx.send, content=content, embed=embed)
 
     # ---------------- EMBED COMMAND ----------------
     @commands.command(name="embed")
@@ -70,7 +73,7 @@ class MiscCog(commands.Cog):
     # ---------------- SAY COMMAND ----------------
     @commands.command(name="say")
     async def say_prefix(self, ctx: commands.Context, *, text: str):
-        if contains_banned(text):
+        if contains_banned(text, ctx.guild.id if ctx.guild else None):
             await ctx.send("Message contains forbidden content.", delete_after=5)
             return
         try:
@@ -82,11 +85,33 @@ class MiscCog(commands.Cog):
 
     @commands.hybrid_command(name="say", with_app_command=True)
     async def say_slash(self, ctx: commands.Context, text: str):
-        if contains_banned(text):
+        if contains_banned(text, ctx.guild.id if ctx.guild else None):
             await self._respond(ctx, content="Message contains forbidden content.", ephemeral=True)
             return
         await self._respond(ctx, content=text)
 
+    # ---------------- BANNED WORDS ----------------
+    @commands.command(name="banned_words")
+    @commands.guild_only()
+    @commands.has_guild_permissions(manage_guild=True)
+    async def banned_words(self, ctx: commands.Context, action: str = "list", *words: str):
+        """Manage this server's banned words. Usage: C!banned_words [list|add|remove] [words...]"""
+        action = action.lower()
+        if action == "list":
+            own = storage.load_banned_words(ctx.guild.id)
+            text = ", ".join(own) if own else "(none)"
+            await ctx.send(f"Server banned words ({len(own)}): {text}"[:1900] + f"\nPlus {len(word_filter.words())} global words.")
+            return
+        if action not in ("add", "remove") or not words:
+            await ctx.send("Usage: C!banned_words [list|add|remove] [words...]")
+            return
+        if action == "add":
+            n = word_filter.add_words(ctx.guild.id, words, added_by=ctx.author.id)
+            await ctx.send(f"Added {n} word(s).")
+        else:
+            n = word_filter.remove_words(ctx.guild.id, words)
+            await ctx.send(f"Removed {n} word(s).")
+
     # ---------------- FEEDBACK COMMAND ----------------
     @commands.command(name="feedback")
     async def feedback_prefix(self, ctx: commands.Context, *, text: str):
@@ -115,6 +140,7 @@ class MiscCog(commands.Cog):
 
 
 async def setup(bot: commands.Bot):
+    storage.init_db()
     await bot.add_cog(MiscCog(bot))
     try:
         import logging
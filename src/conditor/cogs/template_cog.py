@@ -2,14 +2,15 @@ import json
 import difflib
 from pathlib import Path
 from datetime import datetime
+from typing import List
+from discord import app_commands
 from discord.ext import commands
 import discord
 
 from .. import storage
 
-ROOT = Path(__file__).resolve().parents[3]
-AUDIT_DIR = ROOT / "data" / "audit"
-AUDIT_DIR.mkdir(parents=True, exist_ok=True)
+# names shown by C!template_list before asking for a narrower query
+LIST_LIMIT = 50
 
 
 class TemplateEditModal(discord.ui.Modal):
@@ -56,7 +57,7 @@ class ConfirmSaveView(discord.ui.View):
         self.existing_text = existing_text
         self.initiator_id = initiator_id
 
-    async def _log_audit(self, user: discord.User, guild_id: int, action: str):
+    async def _log_audit(self, user: discord.User, guild_id: int, action: str, version: int = None):
         rec = {
             "ts": datetime.utcnow().isoformat() + "Z",
             "user_id": user.id,
@@ -64,10 +65,11 @@ class ConfirmSaveView(discord.ui.View):
             "guild_id": guild_id,
             "template": self.template_name,
             "action": action,
+            "version": version,
         }
-        f = AUDIT_DIR / "templates.log"
-        with f.open("a", encoding="utf-8") as fh:
-            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        await storage.record_audit(
+            f"template_{action}", guild_id=guild_id, user_id=user.id, user_name=str(user), template=self.template_name, data=rec
+        )
 
     @discord.ui.button(label="Confirm Save", style=discord.ButtonStyle.green)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -75,9 +77,9 @@ class ConfirmSaveView(discord.ui.View):
             await interaction.response.send_message("Only the editor may confirm this save.", ephemeral=True)
             return
         # save and acknowledge
-        storage.save_template(self.template_name, self.new_text)
-        await self._log_audit(interaction.user, interaction.guild.id if interaction.guild else None, "save")
-        await interaction.response.send_message(f"Template '{self.template_name}' saved.", ephemeral=True)
+        version = storage.save_template(self.template_name, self.new_text, author_id=interaction.user.id)
+        await self._log_audit(interaction.user, interaction.guild.id if interaction.guild else None, "save", version)
+        await interaction.response.send_message(f"Template '{self.template_name}' saved as v{version}.", ephemeral=True)
         self.stop()
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.grey)
@@ -97,12 +99,15 @@ class TemplateCog(commands.Cog):
 
     @commands.command(name="template_list")
     @commands.has_guild_permissions(administrator=True)
-    async def template_list(self, ctx: commands.Context):
-        names = storage.list_templates()
+    async def template_list(self, ctx: commands.Context, *, query: str = None):
+        """List templates, or search names, meta, roles and channels. Usage: C!template_list [query]"""
+        names = storage.search_templates(query, limit=LIST_LIMIT + 1) if query else storage.list_templates()
         if not names:
-            await ctx.send("No templates in database.")
+            await ctx.send("No matching templates." if query else "No templates in database.")
             return
-        await ctx.send("Templates:\n" + "\n".join(names))
+        shown = names[:LIST_LIMIT]
+        more = f"\n…and {len(names) - LIST_LIMIT}+ more; narrow it down with `C!template_list <query>`." if len(names) > LIST_LIMIT else ""
+        await ctx.send("Templates:\n" + "\n".join(shown) + more)
 
     @commands.command(name="template_save")
     @commands.has_guild_permissions(administrator=True)
@@ -126,13 +131,19 @@ class TemplateCog(commands.Cog):
             await ctx.send(f"Invalid JSON: {exc}")
             return
 
-        storage.save_template(name, content)
-        await ctx.send(f"Template '{name}' saved to DB.")
+        version = storage.save_template(name, content, author_id=ctx.author.id)
+        await ctx.send(f"Template '{name}' saved to DB (v{version}).")
 
     @commands.command(name="template_get")
     @commands.has_guild_permissions(administrator=True)
     async def template_get(self, ctx: commands.Context, name: str):
-        content = storage.load_template(name)
+        """Download a template. Usage: C!template_get name[@version]"""
+        name, _, version = name.partition("@")
+        try:
+            content = storage.load_template(name, int(version.lstrip("vV")) if version else None)
+        except ValueError:
+            await ctx.send("Version must be a number, e.g. `name@3`.")
+            return
         if not content:
             await ctx.send("Template not found.")
             return
@@ -141,7 +152,40 @@ class TemplateCog(commands.Cog):
         bio = io.BytesIO()
         bio.write(content.encode("utf-8"))
         bio.seek(0)
-        await ctx.send(file=discord.File(fp=bio, filename=f"{name}.json"))
+        await ctx.send(file=discord.File(fp=bio, filename=f"{name}{'_v' + version.lstrip('vV') if version else ''}.json"))
+
+    @commands.command(name="template_history")
+    @commands.has_guild_permissions(administrator=True)
+    async def template_history(self, ctx: commands.Context, name: str, limit: int = 15):
+        """List stored versions of a template, newest first."""
+        versions = storage.list_template_versions(name, limit=max(1, min(limit, 50)))
+        if not versions:
+            await ctx.send("Template not found.")
+            return
+        lines = []
+        for v in versions:
+            when = datetime.utcfromtimestamp(v["created_at"]).strftime("%Y-%m-%d %H:%M")
+            author = f" by <@{v['author_id']}>" if v["author_id"] else ""
+            lines.append(f"v{v['version']} {when}{author} {v['size']}B {v['hash'][:10]}")
+        await ctx.send(f"History for `{name}`:\n" + "\n".join(lines))
+
+    @commands.command(name="template_diff")
+    @commands.has_guild_permissions(administrator=True)
+    async def template_diff(self, ctx: commands.Context, name: str, old: int, new: int = None):
+        """Show the diff between two template versions. Usage: C!template_diff name <old> [new=latest]"""
+        diff_text = storage.diff_template_versions(name, old, new)
+        if diff_text is None:
+            await ctx.send("Template version not found.")
+            return
+        if not diff_text:
+            await ctx.send("Versions are identical.")
+            return
+        if len(diff_text) > 1800:
+            import io
+
+            await ctx.send(file=discord.File(fp=io.BytesIO(diff_text.encode("utf-8")), filename=f"{name}_v{old}.diff"))
+            return
+        await ctx.send(f"```diff\n{diff_text}\n```")
 
     @commands.hybrid_command(name="template_edit", with_app_command=True)
     @commands.has_guild_permissions(administrator=True)
@@ -152,7 +196,14 @@ class TemplateCog(commands.Cog):
         # `send_modal` is available on both contexts and interactions
         await ctx.send_modal(modal)
 
+    @template_edit.autocomplete("name")
+    async def _template_name_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        # served from the in-memory prefix index: no DB round trip inside the 3s window
+        return [app_commands.Choice(name=n, value=n) for n in storage.complete_template_names(current, 25)]
+
 
 async def setup(bot: commands.Bot):
     storage.init_db()
+    # warm the autocomplete index so the first lookup does not hit the DB
+    storage.complete_template_names("")
     await bot.add_cog(TemplateCog(bot))
@@ -0,0 +1,55 @@
+"""Sync application commands only when they changed.
+
+`tree.sync()` is a heavily rate-limited endpoint, so instead of syncing on
+every start and reconnect we hash the exact payload Discord would receive for
+a scope (global, or one guild) and compare it with the hash stored after the
+last successful sync. Scopes are keyed by application id so switching bot
+tokens still triggers a sync.
+"""
+import hashlib
+import inspect
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+
+def _command_dict(cmd: Any, tree: app_commands.CommandTree) -> Dict[str, Any]:
+    # `to_dict` takes the tree from discord.py 2.4 on; 2.3 (still allowed by requirements.txt) takes nothing
+    if "tree" in inspect.signature(cmd.to_dict).parameters:
+        return cmd.to_dict(tree)
+    return cmd.to_dict()
+
+
+def tree_payload(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> List[Dict[str, Any]]:
+    payload = [_command_dict(cmd, tree) for cmd in tree.get_commands(guild=guild)]
+    return sorted(payload, key=lambda c: (c.get("type", 1), c.get("name", "")))
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """Stable sha256 of the command payload for `guild` (global when None)."""
+    blob = json.dumps(tree_payload(tree, guild), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def scope_key(application_id: Optional[int], guild: Optional[discord.abc.Snowflake] = None) -> str:
+    return f"{application_id or 'unknown'}:{'guild:%s' % guild.id if guild else 'global'}"
+
+
+async def sync_commands(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> bool:
+    """Sync `tree` for `guild` (global when None) if its hash changed; returns True when a sync happened."""
+    scope = scope_key(getattr(tree.client, "application_id", None), guild)
+    digest = tree_hash(tree, guild)
+    if not force and storage.get_command_hash(scope) == digest:
+        logger.info("Application commands for %s unchanged; skipping sync", scope)
+        return False
+    await tree.sync(guild=guild)
+    storage.set_command_hash(scope, digest)
+    logger.info("Application commands synced for %s", scope)
+    return True
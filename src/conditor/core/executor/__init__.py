@@ -1,3 +1,4 @@
-from .worker import Executor, default_noop_handler
+from .worker import Executor, ExecutorEvent, default_noop_handler
+from .sample_runs import SampleRun, SampleRunner, SimulatedHandler
 
-__all__ = ["Executor", "default_noop_handler"]
+__all__ = ["Executor", "ExecutorEvent", "default_noop_handler", "SampleRun", "SampleRunner", "SimulatedHandler"]
@@ -2,7 +2,8 @@ from typing import Any, Dict, Optional
 import json
 from pathlib import Path
 import discord
-from ...rate_limiter import run_with_rate_limit
+from ...file_writer import file_writer
+from ...request_scheduler import Priority, run_scheduled
 from ...permissions import apply_channel_overwrites, ensure_bot_role_position
 from ..planner.models import BuildStep, StepType
 
@@ -57,6 +58,14 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
 
     # initialize persistent store from provided args
     _init_persistent(storage_dir, namespace)
+
+    async def _save_persistent():
+        if not map_path:
+            return
+        try:
+            await file_writer.write_atomic(map_path, json.dumps(persistent, ensure_ascii=False, indent=2))
+        except Exception:
+            pass
     
 
     async def handler(step: BuildStep) -> Dict[str, Any]:
@@ -100,7 +109,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
                     kwargs['colour'] = discord.Colour(parsed)
                 return await guild.create_role(**kwargs)
 
-            role = await run_with_rate_limit(gid, _create)
+            role = await run_scheduled(Priority.BULK, gid, _create)
             # register mappings
             created_roles[step.id] = role
             created_roles[role.name] = role
@@ -120,11 +129,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
             except Exception:
                 pass
             persistent.setdefault('roles', {})[step.id] = role_meta
-            if map_path:
-                try:
-                    map_path.write_text(json.dumps(persistent, ensure_ascii=False, indent=2), encoding='utf-8')
-                except Exception:
-                    pass
+            await _save_persistent()
 
             return {'role_id': getattr(role, 'id', None), 'name': getattr(role, 'name', None)}
 
@@ -139,7 +144,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
             async def _create():
                 return await guild.create_category(name)
 
-            cat = await run_with_rate_limit(gid, _create)
+            cat = await run_scheduled(Priority.BULK, gid, _create)
             created_categories[step.id] = cat
             created_categories[cat.name] = cat
 
@@ -152,11 +157,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
             except Exception:
                 pass
             persistent.setdefault('categories', {})[step.id] = cat_meta
-            if map_path:
-                try:
-                    map_path.write_text(json.dumps(persistent, ensure_ascii=False, indent=2), encoding='utf-8')
-                except Exception:
-                    pass
+            await _save_persistent()
 
             return {'category_id': getattr(cat, 'id', None), 'name': getattr(cat, 'name', None)}
 
@@ -182,7 +183,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
                 entry = persistent['channels'][step.id]
                 return {'channel_id': entry.get('id'), 'name': entry.get('name')}
 
-            ch = await run_with_rate_limit(gid, _create)
+            ch = await run_scheduled(Priority.BULK, gid, _create)
             created_channels[step.id] = ch
             created_channels[ch.name] = ch
 
@@ -219,11 +220,7 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
             except Exception:
                 pass
             persistent.setdefault('channels', {})[step.id] = ch_meta
-            if map_path:
-                try:
-                    map_path.write_text(json.dumps(persistent, ensure_ascii=False, indent=2), encoding='utf-8')
-                except Exception:
-                    pass
+            await _save_persistent()
             return {'channel_id': getattr(ch, 'id', None), 'name': getattr(ch, 'name', None)}
 
         if t == StepType.APPLY_PERMISSIONS:
@@ -290,10 +287,10 @@ def make_discord_handler(bot: discord.Client, guild: discord.Guild, storage_dir:
                         webhooks = await target.webhooks()
                         if webhooks:
                             wh = webhooks[0]
-                            return await run_with_rate_limit(gid, lambda: wh.send(content, username=payload.get('author_name', '')))
+                            return await run_scheduled(Priority.BULK, gid, lambda: wh.send(content, username=payload.get('author_name', '')))
                     except Exception:
                         pass
-                msg = await run_with_rate_limit(gid, _send)
+                msg = await run_scheduled(Priority.BULK, gid, _send)
                 return {'message_id': getattr(msg, 'id', None)}
             return {'ok': False, 'reason': 'channel not found'}
 
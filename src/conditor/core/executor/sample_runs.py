@@ -0,0 +1,178 @@
+"""Sample plan runs in the background, tracked by run id.
+
+`SampleRunner.start` runs a plan on the executor in its own task and returns
+a `SampleRun` right away. Step events update the run's counters while it
+executes, so status can be read at any point. A run can be cancelled; the
+executor stops at the step in flight. Steps go through `SimulatedHandler`
+(by default wrapping `default_noop_handler`), which measures the time spent
+inside the handler as simulated API time. The rest of the wall time is the
+executor's own pacing and bookkeeping.
+
+Runs are in-memory only. The last `history` finished runs are kept for
+status lookups, and each run's executor state file is removed when it ends.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional
+
+from ..planner.models import BuildPlan, BuildStep
+from .worker import STEP_FAILED, STEP_SUCCEEDED, Executor, ExecutorEvent, default_noop_handler
+
+logger = logging.getLogger(__name__)
+
+RUN_RUNNING = "running"
+RUN_FINISHED = "finished"
+RUN_CANCELLED = "cancelled"
+RUN_FAILED = "failed"
+
+
+class SimulatedHandler:
+    """Step handler that times an inner (simulated) handler as API time."""
+
+    def __init__(self, inner: Callable[[BuildStep], Awaitable[Any]] = default_noop_handler):
+        self.inner = inner
+        self.calls = 0
+        self.api_seconds = 0.0
+
+    async def __call__(self, step: BuildStep):
+        started = time.perf_counter()
+        try:
+            return await self.inner(step)
+        finally:
+            self.calls += 1
+            self.api_seconds += time.perf_counter() - started
+
+
+@dataclass
+class SampleRun:
+    run_id: int
+    plan_name: str
+    total: int
+    requested_by: Optional[int] = None
+    status: str = RUN_RUNNING
+    done: int = 0
+    successes: int = 0
+    failures: int = 0
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+    handler: Optional[SimulatedHandler] = field(default=None, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status == RUN_RUNNING
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def api_seconds(self) -> float:
+        return self.handler.api_seconds if self.handler is not None else 0.0
+
+    @property
+    def steps_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        text = (
+            f"Sample run #{self.run_id} ({self.plan_name}) {self.status}: "
+            f"{self.done}/{self.total} steps, successes={self.successes} failed={self.failures}, "
+            f"{self.elapsed:.1f}s wall, {self.steps_per_second:.2f} steps/s, "
+            f"simulated API {self.api_seconds:.2f}s, pacing/overhead {max(self.elapsed - self.api_seconds, 0.0):.2f}s"
+        )
+        if self.error:
+            text += f"\nError: {self.error}"
+        return text
+
+
+class SampleRunner:
+    def __init__(self, storage_dir: Path, history: int = 20, max_active: int = 3):
+        self.executor = Executor(storage_dir=storage_dir)
+        self.history = history
+        self.max_active = max_active
+        self._runs: "OrderedDict[int, SampleRun]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def get(self, run_id: int) -> Optional[SampleRun]:
+        return self._runs.get(run_id)
+
+    def runs(self) -> List[SampleRun]:
+        """Tracked runs, newest first."""
+        return list(reversed(self._runs.values()))
+
+    def active(self) -> List[SampleRun]:
+        return [run for run in self._runs.values() if run.active]
+
+    def start(self, plan: BuildPlan, handler: Optional[SimulatedHandler] = None, requested_by: Optional[int] = None,
+              on_finish: Optional[Callable[[SampleRun], Awaitable[None]]] = None) -> SampleRun:
+        """Launch `plan` in the background and return its run; raises RuntimeError when too many are active."""
+        if len(self.active()) >= self.max_active:
+            raise RuntimeError(f"{self.max_active} sample runs are already in progress")
+        run_id = next(self._ids)
+        # executor state is keyed by plan name; keep concurrent runs of one template apart
+        plan.name = f"{plan.name}-run{run_id}"
+        run = SampleRun(run_id=run_id, plan_name=plan.name, total=len(plan.steps), requested_by=requested_by,
+                        handler=handler or SimulatedHandler())
+        self._runs[run_id] = run
+        self._prune()
+        run.task = asyncio.create_task(self._run(run, plan, on_finish), name=f"conditor-sample-run-{run_id}")
+        logger.info("Started sample run %s for %s (%d steps)", run_id, plan.name, run.total)
+        return run
+
+    def cancel(self, run_id: int) -> bool:
+        run = self._runs.get(run_id)
+        if run is None or not run.active or run.task is None:
+            return False
+        return run.task.cancel()
+
+    def cancel_all(self):
+        for run in self.active():
+            self.cancel(run.run_id)
+
+    def _prune(self):
+        finished = [rid for rid, run in self._runs.items() if not run.active]
+        for rid in finished[: max(0, len(self._runs) - self.history)]:
+            del self._runs[rid]
+
+    async def _run(self, run: SampleRun, plan: BuildPlan, on_finish):
+        def _count(event: ExecutorEvent):
+            run.done += 1
+            if event.name == STEP_SUCCEEDED:
+                run.successes += 1
+            else:
+                run.failures += 1
+
+        unsubscribe = [self.executor.subscribe(name, _count, plan=plan) for name in (STEP_SUCCEEDED, STEP_FAILED)]
+        try:
+            await self.executor.run_plan(plan, run.handler, resume=False)
+            run.status = RUN_FINISHED
+        except asyncio.CancelledError:
+            run.status = RUN_CANCELLED
+            raise
+        except Exception as exc:
+            logger.exception("Sample run %s failed", run.run_id)
+            run.status = RUN_FAILED
+            run.error = f"{exc.__class__.__name__}: {exc}"
+        finally:
+            run.finished_at = time.perf_counter()
+            for unsub in unsubscribe:
+                unsub()
+            logger.info("Sample run %s %s after %.1fs", run.run_id, run.status, run.elapsed)
+            # state writes are awaited by the executor, so the file is complete by now
+            try:
+                await self.executor.clear_state(plan)
+            except (OSError, asyncio.CancelledError):
+                pass
+            if on_finish is not None:
+                try:
+                    await on_finish(run)
+                except Exception:
+                    logger.exception("Sample run %s report callback failed", run.run_id)
@@ -4,13 +4,48 @@ import logging
 import asyncio
 import json
 import logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Any, Awaitable
+from typing import Callable, Any, Awaitable, Dict, List, Optional, Tuple
 
 from ..planner.models import BuildPlan, BuildStep
+from ...retry import ErrorClass, RetryBudget, RetryPolicy, call_with_retry, classify_error
+from ...circuit_breaker import BreakerRegistry, CircuitOpenError, breakers as default_breakers, route_for_step
+from ...file_writer import file_writer
 
 logger = logging.getLogger(__name__)
 
+STEP_STARTED = 'step_started'
+STEP_SUCCEEDED = 'step_succeeded'
+STEP_RETRIED = 'step_retried'
+STEP_FAILED = 'step_failed'
+PLAN_FINISHED = 'plan_finished'
+EVENTS = (STEP_STARTED, STEP_SUCCEEDED, STEP_RETRIED, STEP_FAILED, PLAN_FINISHED)
+
+
+@dataclass
+class ExecutorEvent:
+    """Payload passed to executor hooks.
+
+    `elapsed` is seconds since the step started (since the plan started for
+    `plan_finished`). `error` is the exception or fail-fast reason, `delay` the
+    backoff before the next attempt for `step_retried`.
+    """
+    name: str
+    plan: BuildPlan
+    step: Optional[BuildStep] = None
+    index: int = 0
+    total: int = 0
+    attempt: int = 0
+    elapsed: float = 0.0
+    timestamp: float = 0.0
+    result: Any = None
+    error: Any = None
+    error_class: Optional[str] = None
+    delay: Optional[float] = None
+    skipped: bool = False
+    state: Optional[dict] = None
+
 
 class Executor:
     """Executes a BuildPlan step-by-step with retries, backoff, and simple persistence.
@@ -18,11 +53,55 @@ class Executor:
     The executor expects a `step_handler` callable with signature
     `handler(step: BuildStep) -> Any | Awaitable[Any]`. The handler may be async; the
     executor will await it when needed.
+
+    Retries go through the shared engine in `retry`: each step is bounded by its
+    own `retry_policy` and every step of a run draws from one plan-wide
+    `RetryBudget` (`plan_retry_budget`, None for unlimited). Every failed attempt
+    is recorded under the step's `attempts_log` in the persisted state.
+
+    When `run_plan` is given a `guild_id`, each step is gated by the circuit
+    breaker for its route in that guild: open breakers and steps depending on a
+    permanently failed step fail immediately with the reason recorded.
+
+    Observers attach with `subscribe(event, callback, plan=None)` to
+    `step_started`, `step_succeeded`, `step_retried`, `step_failed` and
+    `plan_finished`; callbacks receive an `ExecutorEvent` and may be async.
+    Events are only built when someone is subscribed to them.
     """
 
-    def __init__(self, storage_dir: Path = None):
+    def __init__(self, storage_dir: Path = None, plan_retry_budget: Optional[int] = 20, breakers: Optional[BreakerRegistry] = None):
         self.storage_dir = Path(storage_dir or Path.cwd() / 'data' / 'runtime')
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.plan_retry_budget = plan_retry_budget
+        self.breakers = breakers or default_breakers
+        self._subscribers: Dict[str, List[Tuple[Callable[[ExecutorEvent], Any], Optional[BuildPlan]]]] = {}
+
+    def subscribe(self, event: str, callback: Callable[[ExecutorEvent], Any], plan: Optional[BuildPlan] = None) -> Callable[[], None]:
+        """Register `callback` for `event` (optionally only for `plan`); returns an unsubscribe function."""
+        if event not in EVENTS:
+            raise ValueError(f"Unknown executor event: {event}")
+        entry = (callback, plan)
+        self._subscribers.setdefault(event, []).append(entry)
+
+        def _unsubscribe():
+            subs = self._subscribers.get(event)
+            if subs and entry in subs:
+                subs.remove(entry)
+                if not subs:
+                    del self._subscribers[event]
+
+        return _unsubscribe
+
+    async def _emit(self, name: str, plan: BuildPlan, **fields):
+        for callback, only in list(self._subscribers.get(name, ())):
+            if only is not None and only is not plan:
+                continue
+            try:
+                res = callback(ExecutorEvent(name=name, plan=plan, timestamp=time.time(), **fields))
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception:
+                logger.exception('Executor hook for %s failed', name)
 
     def _state_path(self, plan: BuildPlan) -> Path:
         safe_name = plan.name.replace(' ', '_')
@@ -37,14 +116,37 @@ class Executor:
         except Exception:
             return {"index": 0, "steps": {}}
 
-    def _save_state(self, plan: BuildPlan, state: dict):
-        p = self._state_path(plan)
-        p.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding='utf-8')
+    async def clear_state(self, plan: BuildPlan):
+        """Delete the saved progress of `plan`, so its next run starts from the first step."""
+        await file_writer.submit(self._state_path(plan).unlink, missing_ok=True)
+
+    async def _save_state(self, plan: BuildPlan, state: dict):
+        # serialize on the loop so later mutations of `state` cannot race the write
+        await file_writer.write_atomic(self._state_path(plan), json.dumps(state, ensure_ascii=False, indent=2))
+
+    async def _fail_fast(self, plan: BuildPlan, state: dict, index: int, sid: str, reason: str, error_class: str):
+        logger.error('Step %s failed without calling Discord: %s', sid, reason)
+        state.setdefault('steps', {})[sid] = {
+            'status': 'failed',
+            'attempts': 0,
+            'attempts_log': [],
+            'error': reason,
+            'error_class': error_class,
+        }
+        state['index'] = index + 1
+        await self._save_state(plan, state)
 
-    async def run_plan(self, plan: BuildPlan, step_handler: Callable[[BuildStep], Awaitable[Any]] | Callable[[BuildStep], Any], resume: bool = True):
+    async def run_plan(self, plan: BuildPlan, step_handler: Callable[[BuildStep], Awaitable[Any]] | Callable[[BuildStep], Any], resume: bool = True, guild_id: Optional[int] = None):
+        subs = self._subscribers
+        total = len(plan.steps)
+        plan_started = time.perf_counter()
         state = self._load_state(plan) if resume else {"index": 0, "steps": {}}
         start_index = int(state.get('index', 0))
 
+        budget = RetryBudget(self.plan_retry_budget)
+        # step ids / resource names whose creation failed permanently -> reason
+        blocked = {}
+
         logger.info('Starting executor for plan %s at index %s', plan.name, start_index)
 
         for i in range(start_index, len(plan.steps)):
@@ -54,46 +156,96 @@ class Executor:
             if step_state.get('status') == 'success':
                 logger.debug('Skipping already-successful step %s', sid)
                 state['index'] = i + 1
-                self._save_state(plan, state)
+                await self._save_state(plan, state)
+                if STEP_SUCCEEDED in subs:
+                    await self._emit(STEP_SUCCEEDED, plan, step=step, index=i, total=total, attempt=step_state.get('attempts', 0), result=step_state.get('result'), skipped=True, state=state)
+                continue
+
+            payload = step.payload or {}
+            dep = next((payload.get(k) for k in ('category', 'channel') if payload.get(k) in blocked), None)
+            if dep is not None:
+                await self._fail_fast(plan, state, i, sid, f"depends on failed '{dep}': {blocked[dep]}", 'dependency_failed')
+                blocked[sid] = blocked[dep]
+                if STEP_FAILED in subs:
+                    await self._emit(STEP_FAILED, plan, step=step, index=i, total=total, error=state['steps'][sid]['error'], error_class='dependency_failed', state=state)
                 continue
 
-            retries = int(getattr(step, 'retry_policy', {}).get('retries', 0))
-            backoff = float(getattr(step, 'retry_policy', {}).get('backoff', 2))
-            attempt = 0
-
-            last_exc = None
-            while attempt <= retries:
-                try:
-                    logger.info('Executing step %s (%s) attempt %s', sid, step.type, attempt + 1)
-                    result = step_handler(step)
-                    if asyncio.iscoroutine(result):
-                        result = await result
-                    # record success
-                    state.setdefault('steps', {})[sid] = {
-                        'status': 'success',
-                        'attempts': attempt + 1,
-                        'result': result,
-                    }
-                    state['index'] = i + 1
-                    self._save_state(plan, state)
-                    break
-                except Exception as exc:
-                    last_exc = exc
-                    attempt += 1
-                    logger.warning('Step %s failed on attempt %s: %s', sid, attempt, exc)
-                    if attempt > retries:
-                        logger.error('Step %s exhausted retries, marking failed', sid)
-                        state.setdefault('steps', {})[sid] = {
-                            'status': 'failed',
-                            'attempts': attempt,
-                            'error': str(exc),
-                        }
-                        state['index'] = i + 1
-                        self._save_state(plan, state)
-                        break
-                    sleep_for = backoff ** attempt
-                    logger.info('Backing off for %s seconds before retrying step %s', sleep_for, sid)
-                    await asyncio.sleep(sleep_for)
+            route = route_for_step(step) if guild_id is not None else None
+            breaker = self.breakers.get(guild_id, route) if route else None
+            if breaker is not None and not breaker.allow():
+                reason = str(CircuitOpenError(guild_id, route, breaker.reason))
+                await self._fail_fast(plan, state, i, sid, reason, 'circuit_open')
+                blocked[sid] = reason
+                if payload.get('name'):
+                    blocked[payload['name']] = reason
+                if STEP_FAILED in subs:
+                    await self._emit(STEP_FAILED, plan, step=step, index=i, total=total, error=reason, error_class='circuit_open', state=state)
+                continue
+
+            policy = RetryPolicy.from_step(getattr(step, 'retry_policy', None))
+            attempts = []
+
+            async def _attempt(step=step, sid=sid, attempts=attempts):
+                logger.info('Executing step %s (%s) attempt %s', sid, step.type, len(attempts) + 1)
+                result = step_handler(step)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                return result
+
+            async def _on_retry(record, step=step, sid=sid, attempts=attempts, index=i):
+                logger.warning('Step %s failed on attempt %s (%s): %s; retrying in %.2fs', sid, record.attempt, record.error_class, record.error, record.delay)
+                state.setdefault('steps', {})[sid] = {
+                    'status': 'retrying',
+                    'attempts': len(attempts),
+                    'attempts_log': [a.to_dict() for a in attempts],
+                }
+                state['retry_budget'] = budget.to_dict()
+                await self._save_state(plan, state)
+                if STEP_RETRIED in subs:
+                    await self._emit(STEP_RETRIED, plan, step=step, index=index, total=total, attempt=record.attempt, elapsed=time.perf_counter() - step_started, error=record.error, error_class=record.error_class, delay=record.delay, state=state)
+
+            step_started = time.perf_counter()
+            if STEP_STARTED in subs:
+                await self._emit(STEP_STARTED, plan, step=step, index=i, total=total, attempt=1, state=state)
+            try:
+                result = await call_with_retry(_attempt, policy, budget=budget, attempts=attempts, on_retry=_on_retry)
+                if breaker is not None:
+                    breaker.record_success()
+                # record success
+                state.setdefault('steps', {})[sid] = {
+                    'status': 'success',
+                    'attempts': len(attempts) + 1,
+                    'attempts_log': [a.to_dict() for a in attempts],
+                    'result': result,
+                }
+                event, fields = STEP_SUCCEEDED, {'result': result}
+            except Exception as exc:
+                logger.error('Step %s failed after %s attempt(s), marking failed: %s', sid, len(attempts), exc)
+                error_class = classify_error(exc)
+                state.setdefault('steps', {})[sid] = {
+                    'status': 'failed',
+                    'attempts': len(attempts),
+                    'attempts_log': [a.to_dict() for a in attempts],
+                    'error': str(exc),
+                    'error_class': error_class.value,
+                }
+                if breaker is not None:
+                    breaker.record_failure(exc)
+                if error_class == ErrorClass.PERMANENT:
+                    blocked[sid] = str(exc)
+                    if payload.get('name'):
+                        blocked[payload['name']] = str(exc)
+                event, fields = STEP_FAILED, {'error': exc, 'error_class': error_class.value}
+            except BaseException:
+                # cancelled mid-call: no verdict on the route, but the trial slot must not stay taken
+                if breaker is not None:
+                    breaker.release()
+                raise
+            state['index'] = i + 1
+            state['retry_budget'] = budget.to_dict()
+            await self._save_state(plan, state)
+            if event in subs:
+                await self._emit(event, plan, step=step, index=i, total=total, attempt=state['steps'][sid]['attempts'], elapsed=time.perf_counter() - step_started, state=state, **fields)
 
             # respectful delay between steps
             try:
@@ -104,6 +256,8 @@ class Executor:
                 await asyncio.sleep(delay)
 
         logger.info('Plan %s execution finished', plan.name)
+        if PLAN_FINISHED in subs:
+            await self._emit(PLAN_FINISHED, plan, total=total, elapsed=time.perf_counter() - plan_started, state=state)
         return state
 
 
@@ -113,4 +267,3 @@ async def default_noop_handler(step: BuildStep):
     # simulate small action time
     await asyncio.sleep(0.05)
     return {"ok": True, "id": step.id, "type": step.type.value}
-                                    result = await result
@@ -14,7 +14,10 @@ class ServerSpec:
 
 
 def load_questionnaire(path: Path) -> ServerSpec:
-    data = json.loads(path.read_text(encoding='utf-8'))
+    return spec_from_questionnaire(json.loads(path.read_text(encoding='utf-8')))
+
+
+def spec_from_questionnaire(data: Dict[str, Any]) -> ServerSpec:
     spec = ServerSpec(
         community_type = data.get('community_type') or data.get('type') or data.get('community', ''),
         games = data.get('games', []),
@@ -34,11 +37,28 @@ def merge_spec_from_files(
     questionnaire_paths: Iterable[Path],
     template_paths: Iterable[Path]
 ) -> ServerSpec:
+    questionnaires = []
+    for p in questionnaire_paths:
+        try:
+            questionnaires.append(json.loads(p.read_text(encoding='utf-8')))
+        except Exception:
+            continue
+    templates = []
+    for tpath in template_paths:
+        try:
+            templates.append(load_template(tpath))
+        except Exception:
+            continue
+    return merge_spec(questionnaires, templates)
+
+
+def merge_spec(questionnaires: Iterable[Dict[str, Any]], templates: Iterable[Dict[str, Any]]) -> ServerSpec:
+    """Merge parsed questionnaires and templates into one spec."""
     spec = ServerSpec()
     # merge questionnaires (first writer wins for core fields)
-    for p in questionnaire_paths:
+    for data in questionnaires:
         try:
-            s = load_questionnaire(p)
+            s = spec_from_questionnaire(data)
         except Exception:
             continue
         if s.community_type and not spec.community_type:
@@ -54,12 +74,7 @@ def merge_spec_from_files(
         spec.extras.update(s.extras)
 
     # attach templates into extras for now
-    templates = []
-    for tpath in template_paths:
-        try:
-            templates.append(load_template(tpath))
-        except Exception:
-            continue
+    templates = list(templates)
     if templates:
         spec.extras.setdefault('templates', []).extend(templates)
     return spec
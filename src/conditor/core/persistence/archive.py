@@ -0,0 +1,241 @@
+"""Indexed snapshot archives for partial and point-in-time restore.
+
+An archive stores a snapshot `BuildPlan` as independent JSON segments followed
+by an offset index, so a single channel (with its messages) or a role set can be
+read without decoding the rest of the snapshot. Layout::
+
+    MAGIC (8 bytes) | index offset (u64 LE) | index length (u64 LE)
+    segment bytes ...
+    index JSON
+
+Segments are `roles`, `categories`, `channel:<key>`, `messages:<key>` and
+`other` (permissions, metadata). A channel's key is its step id (`chan-<id>`
+for guild snapshots), so channels sharing a name keep separate segments; the
+index lists each channel's key, name and category for lookups. Archives are read through `mmap`, so opening
+one costs a header and index read regardless of its size.
+"""
+import json
+import mmap
+import re
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ...file_writer import atomic_write
+from ..planner.models import BuildPlan, BuildStep, StepType
+from .backup import import_plan
+
+MAGIC = b"CNDARC1\x00"
+_HEADER = struct.Struct("<8sQQ")
+ARCHIVE_SUFFIX = ".cnda"
+
+BACKUP_DIR = Path(__file__).resolve().parents[3] / "data" / "backups"
+SNAPSHOT_PREFIX = "snapshot_"
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+_CHANNEL_REF = re.compile(r"^(?:<#(\d+)>|(\d+))$")
+
+
+def guild_backup_dir(guild_id: int, base: Optional[Path] = None) -> Path:
+    return Path(base or BACKUP_DIR) / f"guild_{guild_id}"
+
+
+def parse_snapshot_time(path: Path) -> Optional[datetime]:
+    # only finished archives count; in-progress writes end in `.cnda.tmp`
+    if not path.name.startswith(SNAPSHOT_PREFIX) or path.suffix != ARCHIVE_SUFFIX:
+        return None
+    stem = path.name[: -len(ARCHIVE_SUFFIX)]
+    try:
+        return datetime.strptime(stem[len(SNAPSHOT_PREFIX):], TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def list_snapshots(guild_id: int, base: Optional[Path] = None) -> List[Tuple[datetime, Path]]:
+    """Return `(taken_at, path)` for a guild's snapshots, oldest first."""
+    d = guild_backup_dir(guild_id, base)
+    if not d.exists():
+        return []
+    found = []
+    for p in d.glob(f"{SNAPSHOT_PREFIX}*{ARCHIVE_SUFFIX}"):
+        ts = parse_snapshot_time(p)
+        if ts is not None:
+            found.append((ts, p))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def find_snapshot(guild_id: int, at: Optional[datetime] = None, base: Optional[Path] = None) -> Optional[Path]:
+    """Return the newest snapshot taken at or before `at` (latest when `at` is None)."""
+    if at is not None and at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    chosen = None
+    for ts, path in list_snapshots(guild_id, base):
+        if at is not None and ts > at:
+            break
+        chosen = path
+    return chosen
+
+
+def _step_to_dict(s: BuildStep) -> Dict[str, Any]:
+    return {"id": s.id, "type": s.type.value, "payload": s.payload, "retry_policy": s.retry_policy, "estimated_delay": s.estimated_delay}
+
+
+def _step_from_dict(d: Dict[str, Any]) -> BuildStep:
+    return BuildStep(id=d.get("id"), type=StepType(d.get("type")), payload=d.get("payload", {}), retry_policy=d.get("retry_policy", {}), estimated_delay=d.get("estimated_delay", 0.0))
+
+
+def write_archive(plan: BuildPlan, path: Path, meta: Optional[Dict[str, Any]] = None, fsync: bool = True) -> Path:
+    """Write `plan` as an indexed archive at `path` (atomically replaced).
+
+    Blocking; coroutines should run it through `file_writer.submit`.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {"roles": [], "categories": [], "other": []}
+    channels: List[Dict[str, Any]] = []
+    # messages name their channel; snapshots emit them right after it, so the latest channel of that name owns them
+    latest_by_name: Dict[str, str] = {}
+    for s in plan.steps:
+        if s.type == StepType.CREATE_ROLE:
+            key = "roles"
+        elif s.type == StepType.CREATE_CATEGORY:
+            key = "categories"
+        elif s.type == StepType.CREATE_CHANNEL:
+            name = s.payload.get("name")
+            channels.append({"key": s.id, "name": name, "category": s.payload.get("category")})
+            latest_by_name[name] = s.id
+            key = f"channel:{s.id}"
+        elif s.type == StepType.POST_MESSAGE and s.payload.get("channel") is not None:
+            name = s.payload.get("channel")
+            key = f"messages:{latest_by_name.get(name, name)}"
+        else:
+            key = "other"
+        groups.setdefault(key, []).append(_step_to_dict(s))
+
+    body = bytearray()
+    segments: Dict[str, Dict[str, int]] = {}
+    for key, steps in groups.items():
+        blob = json.dumps(steps, ensure_ascii=False).encode("utf-8")
+        segments[key] = {"offset": _HEADER.size + len(body), "length": len(blob), "steps": len(steps)}
+        body.extend(blob)
+
+    index = json.dumps({"name": plan.name, "meta": meta or {}, "channels": channels, "segments": segments}, ensure_ascii=False).encode("utf-8")
+    header = _HEADER.pack(MAGIC, _HEADER.size + len(body), len(index))
+    return atomic_write(path, header + bytes(body) + index, fsync=fsync)
+
+
+class SnapshotArchive:
+    """Read-only, memory-mapped view of an archive written by `write_archive`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fh = self.path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._fh.close()
+            raise
+        magic, offset, length = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a Conditor snapshot archive: {self.path}")
+        self.index = json.loads(self._mm[offset:offset + length].decode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._fh.close()
+
+    @property
+    def name(self) -> str:
+        return self.index.get("name", "snapshot")
+
+    @property
+    def channels(self) -> List[Dict[str, Any]]:
+        """`{"key", "name", "category"}` per channel, in snapshot order."""
+        # archives written before channel keys listed bare names, which were also their keys
+        return [c if isinstance(c, dict) else {"key": c, "name": c, "category": None} for c in self.index.get("channels", [])]
+
+    def find_channels(self, ref: str) -> List[Dict[str, Any]]:
+        """Channels matching a mention (`<#id>`), an id or a name (`#` optional).
+
+        More than one entry means the name is ambiguous and the caller should ask
+        which one is meant.
+        """
+        ref = ref.strip()
+        channels = self.channels
+        m = _CHANNEL_REF.match(ref)
+        if m:
+            key = f"chan-{m.group(1) or m.group(2)}"
+            by_key = [c for c in channels if c["key"] == key]
+            if by_key or m.group(1):
+                return by_key
+        name = ref[1:] if ref.startswith("#") else ref
+        exact = [c for c in channels if c["name"] == name]
+        return exact or [c for c in channels if (c["name"] or "").casefold() == name.casefold()]
+
+    def has_segment(self, key: str) -> bool:
+        return key in self.index.get("segments", {})
+
+    def read_segment(self, key: str) -> List[BuildStep]:
+        seg = self.index.get("segments", {}).get(key)
+        if seg is None:
+            return []
+        raw = self._mm[seg["offset"]:seg["offset"] + seg["length"]]
+        return [_step_from_dict(d) for d in json.loads(raw.decode("utf-8"))]
+
+    def message_count(self, key: str) -> int:
+        seg = self.index.get("segments", {}).get(f"messages:{key}")
+        return seg["steps"] if seg else 0
+
+    def role_steps(self, names: Optional[Iterable[str]] = None) -> List[BuildStep]:
+        steps = self.read_segment("roles")
+        if names is None:
+            return steps
+        wanted = set(names)
+        return [s for s in steps if s.payload.get("name") in wanted]
+
+    def channel_steps(self, key: str, include_messages: bool = True) -> List[BuildStep]:
+        """Steps recreating the channel `key`: its category, the channel and optionally its messages."""
+        chan = self.read_segment(f"channel:{key}")
+        if not chan:
+            return []
+        steps: List[BuildStep] = []
+        cat_names = {s.payload.get("category") for s in chan if s.payload.get("category")}
+        if cat_names:
+            steps.extend(s for s in self.read_segment("categories") if s.payload.get("name") in cat_names)
+        steps.extend(chan)
+        if include_messages:
+            steps.extend(self.read_segment(f"messages:{key}"))
+        return steps
+
+    def to_plan(self, name: Optional[str] = None) -> BuildPlan:
+        plan = BuildPlan(name=name or self.name)
+        for s in self.read_segment("roles") + self.read_segment("categories"):
+            plan.add_step(s)
+        keys = [c["key"] for c in self.channels]
+        for key in keys:
+            for s in self.read_segment(f"channel:{key}") + self.read_segment(f"messages:{key}"):
+                plan.add_step(s)
+        for key in self.index.get("segments", {}):
+            if key.startswith("messages:") and key[len("messages:"):] not in keys:
+                for s in self.read_segment(key):
+                    plan.add_step(s)
+        for s in self.read_segment("other"):
+            plan.add_step(s)
+        return plan
+
+
+def load_snapshot_plan(path: Path) -> BuildPlan:
+    """Load a full plan from either an archive or a plain exported plan."""
+    path = Path(path)
+    if path.suffix == ARCHIVE_SUFFIX:
+        with SnapshotArchive(path) as arc:
+            return arc.to_plan()
+    return import_plan(path)
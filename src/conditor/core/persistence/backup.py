@@ -4,16 +4,26 @@ from typing import Any, List, Dict
 import asyncio
 import discord
 from ..planner.models import BuildPlan, BuildStep, StepType
+from ...file_writer import atomic_write, file_writer
+from ...request_scheduler import Priority, run_scheduled
 
 
 def export_plan(plan: BuildPlan, path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(plan.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
+    atomic_write(path, json.dumps(plan.to_dict(), ensure_ascii=False, indent=2))
+
+
+async def export_plan_async(plan: BuildPlan, path: Path):
+    """Like `export_plan`, but the write happens on the background file writer."""
+    await file_writer.write_atomic(path, json.dumps(plan.to_dict(), ensure_ascii=False, indent=2))
 
 
 def import_plan(path: Path) -> BuildPlan:
-    data = json.loads(path.read_text(encoding='utf-8'))
-    plan = BuildPlan(name=data.get('name', 'imported'))
+    return plan_from_dict(json.loads(path.read_text(encoding='utf-8')))
+
+
+def plan_from_dict(data: Dict[str, Any]) -> BuildPlan:
+    """Inverse of `BuildPlan.to_dict`."""
+    plan = BuildPlan(name=data.get('name', 'imported'), meta=data.get('meta') or {})
     for s in data.get('steps', []):
         stype = StepType(s.get('type'))
         step = BuildStep(id=s.get('id'), type=stype, payload=s.get('payload', {}), retry_policy=s.get('retry_policy', {}), estimated_delay=s.get('estimated_delay', 0.0))
@@ -39,8 +49,10 @@ def snapshot_guild_to_plan(guild: Any, name: str = None) -> BuildPlan:
     for c in guild.categories:
         plan.add_step(BuildStep(id=f"cat-{c.id}", type=StepType.CREATE_CATEGORY, payload={"name": c.name}, estimated_delay=0.3))
 
-    # channels
+    # channels (guild.channels includes the categories handled above)
     for ch in guild.channels:
+        if getattr(ch, 'type', None) == discord.ChannelType.category:
+            continue
         # map minimal channel info
         payload = {"name": ch.name, "category": ch.category.name if ch.category else None, "type": "text" if getattr(ch, 'type', None) is None else 'text'}
         plan.add_step(BuildStep(id=f"chan-{ch.id}", type=StepType.CREATE_CHANNEL, payload=payload, estimated_delay=0.2))
@@ -69,14 +81,18 @@ async def snapshot_guild_to_plan_async(guild: discord.Guild, name: str = None, m
     for c in guild.categories:
         plan.add_step(BuildStep(id=f"cat-{c.id}", type=StepType.CREATE_CATEGORY, payload={"name": c.name}, estimated_delay=0.3))
 
-    # channels and overwrites
+    # channels and overwrites; classified by channel type so simulated guilds snapshot the same way
+    role_ids = {r.id for r in guild.roles}
     for ch in guild.channels:
+        kind = getattr(ch, 'type', None)
+        if kind == discord.ChannelType.category:
+            continue
         ch_type = 'text'
-        if isinstance(ch, discord.VoiceChannel):
+        if kind == discord.ChannelType.voice:
             ch_type = 'voice'
-        elif isinstance(ch, discord.StageChannel):
+        elif kind == discord.ChannelType.stage_voice:
             ch_type = 'stage'
-        elif getattr(ch, 'is_news', False):
+        elif kind == discord.ChannelType.news:
             ch_type = 'announcement'
 
         payload = {"name": ch.name, "category": ch.category.name if ch.category else None, "type": ch_type}
@@ -84,11 +100,10 @@ async def snapshot_guild_to_plan_async(guild: discord.Guild, name: str = None, m
         # collect overwrites as role_name -> {allow:[perm], deny:[perm]}
         overwrites: Dict[str, Dict[str, List[str]]] = {}
         for target, ow in ch.overwrites.items():
-            if isinstance(target, discord.Role):
+            if getattr(target, 'id', None) in role_ids:
                 allow, deny = [], []
-                for attr, val in vars(ow).items():
-                    if attr.startswith('_'):
-                        continue
+                # PermissionOverwrite is slotted; iterating it yields (permission, True/False/None)
+                for attr, val in ow:
                     if val is True:
                         allow.append(attr)
                     elif val is False:
@@ -101,15 +116,19 @@ async def snapshot_guild_to_plan_async(guild: discord.Guild, name: str = None, m
 
         # capture recent messages for text channels
         if getattr(ch, 'history', None) and ch_type == 'text':
-            messages = []
-            try:
+            async def _fetch_history(ch=ch):
+                collected = []
                 async for m in ch.history(limit=messages_per_channel, oldest_first=True):
                     # avoid attachments for now; capture author and content
-                    messages.append({
+                    collected.append({
                         'author_name': getattr(m.author, 'display_name', str(m.author)),
                         'content': m.content,
                         'created_at': m.created_at.isoformat() if getattr(m, 'created_at', None) else None,
                     })
+                return collected
+
+            try:
+                messages = await run_scheduled(Priority.BULK, guild.id, _fetch_history)
             except Exception:
                 messages = []
 
@@ -0,0 +1,201 @@
+"""Scheduled background backups for opted-in guilds.
+
+`BackupScheduler` periodically snapshots every opted-in guild with
+`snapshot_guild_to_plan_async` and stores it as an indexed archive under
+`data/backups/guild_<id>/snapshot_<timestamp>.cnda` (see `archive`). Start
+times are jittered, concurrent snapshots are capped, each guild has a minimum
+interval between snapshots and history fetches are charged against an
+`ApiBudget`. Old snapshots are garbage collected by count and age after each
+successful run. Archive writes and pruning run on the shared file writer
+thread.
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .archive import (
+    ARCHIVE_SUFFIX,
+    BACKUP_DIR,
+    SNAPSHOT_PREFIX,
+    TIMESTAMP_FORMAT,
+    guild_backup_dir,
+    list_snapshots,
+    write_archive,
+)
+from .backup import snapshot_guild_to_plan_async
+from ...file_writer import file_writer
+
+logger = logging.getLogger(__name__)
+
+
+class ApiBudget:
+    """Token bucket limiting the API calls the scheduler may spend per window.
+
+    Waiters are served in FIFO order; a request larger than the whole budget is
+    clamped so it can still run once the bucket is full.
+    """
+
+    def __init__(self, calls: int, window: float):
+        self.capacity = max(1, int(calls))
+        self.window = float(window)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / self.window)
+        self._updated = now
+
+    async def acquire(self, cost: int):
+        cost = min(max(1, int(cost)), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) * self.window / self.capacity)
+
+
+class BackupScheduler:
+    """Periodically snapshot opted-in guilds in the background.
+
+    `guild_ids` is called on every pass and returns the ids of opted-in guilds;
+    guilds the bot cannot see are skipped.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        guild_ids: Callable[[], Iterable[int]],
+        backup_dir: Optional[Path] = None,
+        tick: float = 600.0,
+        min_interval: float = 6 * 3600.0,
+        jitter: float = 300.0,
+        max_concurrency: int = 2,
+        keep: int = 7,
+        max_age: float = 30 * 86400.0,
+        api_calls: int = 600,
+        api_window: float = 3600.0,
+        messages_per_channel: int = 10,
+    ):
+        self.bot = bot
+        self.guild_ids = guild_ids
+        self.backup_dir = Path(backup_dir or BACKUP_DIR)
+        self.tick = tick
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.keep = keep
+        self.max_age = max_age
+        self.messages_per_channel = messages_per_channel
+        self.budget = ApiBudget(api_calls, api_window)
+        self._semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self._last_run: Dict[int, float] = {}
+        self._running: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Scheduled backup pass failed")
+            await asyncio.sleep(self.tick)
+
+    def _last_snapshot_time(self, guild_id: int) -> Optional[float]:
+        if guild_id in self._last_run:
+            return self._last_run[guild_id]
+        snaps = list_snapshots(guild_id, self.backup_dir)
+        if not snaps:
+            return None
+        last = snaps[-1][0].timestamp()
+        self._last_run[guild_id] = last
+        return last
+
+    def is_due(self, guild_id: int) -> bool:
+        last = self._last_snapshot_time(guild_id)
+        return last is None or time.time() - last >= self.min_interval
+
+    def estimate_cost(self, guild: Any) -> int:
+        """Estimate API calls for a snapshot: one history page per text channel."""
+        pages = max(1, math.ceil(self.messages_per_channel / 100))
+        text_channels = getattr(guild, "text_channels", None)
+        if text_channels is None:
+            text_channels = getattr(guild, "channels", [])
+        return max(1, len(text_channels) * pages)
+
+    async def run_once(self) -> List[Path]:
+        """Snapshot every due guild once; returns the written snapshot paths."""
+        due = [gid for gid in self.guild_ids() if gid not in self._running and self.is_due(gid)]
+        if not due:
+            return []
+        results = await asyncio.gather(
+            *(self._run_guild(gid, random.uniform(0, self.jitter) if self.jitter else 0.0) for gid in due),
+            return_exceptions=True,
+        )
+        written = []
+        for gid, res in zip(due, results):
+            if isinstance(res, Exception):
+                logger.warning("Scheduled backup for guild %s failed: %s", gid, res)
+            elif res is not None:
+                written.append(res)
+        return written
+
+    async def _run_guild(self, guild_id: int, delay: float) -> Optional[Path]:
+        self._running.add(guild_id)
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                logger.debug("Skipping scheduled backup for unknown guild %s", guild_id)
+                return None
+            async with self._semaphore:
+                await self.budget.acquire(self.estimate_cost(guild))
+                taken_at = datetime.now(timezone.utc)
+                plan = await snapshot_guild_to_plan_async(guild, messages_per_channel=self.messages_per_channel)
+                path = guild_backup_dir(guild_id, self.backup_dir) / f"{SNAPSHOT_PREFIX}{taken_at.strftime(TIMESTAMP_FORMAT)}{ARCHIVE_SUFFIX}"
+                await file_writer.submit(write_archive, plan, path, meta={"guild_id": guild_id, "taken_at": taken_at.isoformat()})
+                self._last_run[guild_id] = taken_at.timestamp()
+                logger.info("Scheduled backup for guild %s written to %s", guild_id, path)
+            await file_writer.submit(self.collect_garbage, guild_id)
+            return path
+        finally:
+            self._running.discard(guild_id)
+
+    def collect_garbage(self, guild_id: int) -> List[Path]:
+        """Delete snapshots beyond `keep` or older than `max_age`; the newest always survives."""
+        snaps = list_snapshots(guild_id, self.backup_dir)
+        if not snaps:
+            return []
+        cutoff = time.time() - self.max_age if self.max_age else None
+        removed = []
+        for idx, (ts, path) in enumerate(snaps[:-1]):
+            too_many = len(snaps) - idx > self.keep
+            too_old = cutoff is not None and ts.timestamp() < cutoff
+            if too_many or too_old:
+                try:
+                    path.unlink()
+                    removed.append(path)
+                except OSError:
+                    logger.warning("Failed to remove old snapshot %s", path)
+        return removed
@@ -2,10 +2,9 @@
 
 Public API:
 - `compile_spec_to_plan(spec)`
-- `compile_from_files(base_path)`
 """
 
 from .models import BuildPlan, BuildStep, StepType
-from .compiler import compile_spec_to_plan, compile_from_files
+from .compiler import compile_spec_to_plan
 
-__all__ = ["BuildPlan", "BuildStep", "StepType", "compile_spec_to_plan", "compile_from_files"]
+__all__ = ["BuildPlan", "BuildStep", "StepType", "compile_spec_to_plan"]
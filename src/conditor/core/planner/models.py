@@ -22,12 +22,14 @@ class BuildStep:
 class BuildPlan:
     name: str
     steps: List[BuildStep] = field(default_factory=list)
+    # provenance, e.g. {"template": {"name": ..., "version": ...}} for template builds
+    meta: Dict[str, Any] = field(default_factory=dict)
 
     def add_step(self, step: BuildStep):
         self.steps.append(step)
 
     def to_dict(self):
-        return {
+        data = {
             "name": self.name,
             "steps": [
                 {
@@ -40,3 +42,6 @@ class BuildPlan:
                 for s in self.steps
             ],
         }
+        if self.meta:
+            data["meta"] = self.meta
+        return data
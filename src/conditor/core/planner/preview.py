@@ -0,0 +1,114 @@
+"""Paginated plan previews that fit Discord's message limit.
+
+`PlanPreview` formats a plan one page at a time, on demand, behind a
+summary of step counts by type. Only the pages someone actually looks at
+are rendered. The full plan is serialized (gzipped JSON) only when
+`full_plan_file()` is requested. `PlanPreviewView` adds Prev/Next buttons
+and a "Full plan" button that attaches the file.
+"""
+import gzip
+import io
+import json
+import math
+from collections import Counter
+from typing import Dict, List, Optional
+
+import discord
+
+from .models import BuildPlan, BuildStep
+
+MESSAGE_LIMIT = 2000
+PAGE_SIZE = 12
+LINE_LIMIT = 140
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class PlanPreview:
+    def __init__(self, plan: BuildPlan, page_size: int = PAGE_SIZE, title: Optional[str] = None):
+        self.plan = plan
+        self.page_size = max(1, page_size)
+        self.title = title or f"Plan: {plan.name}"
+        self._pages: Dict[int, str] = {}
+        self._summary: Optional[str] = None
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(len(self.plan.steps) / self.page_size))
+
+    def counts(self) -> Dict[str, int]:
+        """Steps per type, in order of first appearance."""
+        return dict(Counter(getattr(s.type, "value", str(s.type)) for s in self.plan.steps))
+
+    def summary(self) -> str:
+        if self._summary is None:
+            groups = ", ".join(f"{name} x{n}" for name, n in self.counts().items()) or "no steps"
+            self._summary = _clip(f"{self.title} (steps={len(self.plan.steps)})\n{groups}", 400)
+        return self._summary
+
+    @staticmethod
+    def format_step(index: int, step: BuildStep) -> str:
+        return _clip(f"{index + 1}. {getattr(step.type, 'value', step.type)} -> {step.payload}", LINE_LIMIT)
+
+    def render_page(self, page: int) -> str:
+        """Message content for `page` (0-based, clamped), always under the message limit."""
+        page = min(max(page, 0), self.page_count - 1)
+        cached = self._pages.get(page)
+        if cached is not None:
+            return cached
+        start = page * self.page_size
+        lines: List[str] = [self.format_step(i, s) for i, s in enumerate(self.plan.steps[start:start + self.page_size], start)]
+        body = "\n".join(lines) or "(empty plan)"
+        head = f"{self.summary()}\nPage {page + 1}/{self.page_count}"
+        room = MESSAGE_LIMIT - len(head) - 12
+        text = f"{head}\n```\n{_clip(body, room)}\n```"
+        self._pages[page] = text
+        return text
+
+    def full_plan_file(self) -> discord.File:
+        """The whole plan as gzipped JSON, built only when asked for."""
+        data = gzip.compress(json.dumps(self.plan.to_dict(), ensure_ascii=False, indent=1).encode("utf-8"))
+        safe = "".join(c for c in self.plan.name if c.isalnum() or c in "-_") or "plan"
+        return discord.File(io.BytesIO(data), filename=f"{safe}.json.gz")
+
+
+class PlanPreviewView(discord.ui.View):
+    """Prev/Next navigation over a `PlanPreview`, plus an on-demand full-plan attachment."""
+
+    def __init__(self, preview: PlanPreview, author_id: int, timeout: float = 300.0):
+        super().__init__(timeout=timeout)
+        self.preview = preview
+        self.author_id = author_id
+        self.page = 0
+        self._sync_buttons()
+
+    def render(self) -> str:
+        return self.preview.render_page(self.page)
+
+    def _sync_buttons(self):
+        self.prev_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.preview.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = min(max(page, 0), self.preview.page_count - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="Prev", style=discord.ButtonStyle.grey)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    @discord.ui.button(label="Full plan", style=discord.ButtonStyle.blurple)
+    async def full_plan(self, interaction: discord.Interaction, button: discord.ui.Button):
+        button.disabled = True
+        await interaction.response.edit_message(view=self)
+        await interaction.followup.send(file=self.preview.full_plan_file(), ephemeral=True)
@@ -1,3 +1,4 @@
 from .validator import validate_plan, permission_sanity_checks
+from .wordfilter import Automaton, WordFilter, word_filter
 
-__all__ = ["validate_plan", "permission_sanity_checks"]
+__all__ = ["validate_plan", "permission_sanity_checks", "Automaton", "WordFilter", "word_filter"]
@@ -0,0 +1,179 @@
+"""Banned-word matching with a compiled Aho-Corasick automaton.
+
+Text is normalized the way the original filter did (lowercase, keep only
+`a-z0-9`), but in one `bytes.translate` pass. The same pass maps each kept
+character straight to its alphabet index 0-35. Patterns are compiled into a
+full transition table over that 36-symbol alphabet, so a scan is one table
+lookup per input byte, whatever the number of patterns.
+
+`WordFilter` keeps one automaton per guild, built from the default words,
+the global list (guild id 0) and the guild's own list in the DB. Automata are
+cached and only rebuilt after the list they came from changes through
+`add_words` or `remove_words`.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = b"abcdefghijklmnopqrstuvwxyz0123456789"
+GLOBAL_GUILD = 0
+# always banned, on top of the stored lists
+DEFAULT_BANNED_WORDS = frozenset({"shota", "lolicoin", "badword1"})
+
+# byte -> alphabet index for kept characters; everything else is deleted
+_TABLE = bytearray(range(256))
+for _i, _c in enumerate(ALPHABET):
+    _TABLE[_c] = _i
+_TABLE = bytes(_TABLE)
+_DELETE = bytes(b for b in range(256) if b not in ALPHABET)
+
+
+def normalize(text: str) -> bytes:
+    """`text` lowercased with everything but ASCII letters and digits removed, as alphabet indices."""
+    # non-ASCII characters are dropped by the encode, ASCII punctuation by the translate
+    return text.lower().encode("ascii", "ignore").translate(_TABLE, _DELETE)
+
+
+def normalize_word(word: str) -> str:
+    """Human-readable normalized form of a word (what gets stored and matched)."""
+    return bytes(ALPHABET[i] for i in normalize(word)).decode("ascii")
+
+
+class Automaton:
+    """Aho-Corasick automaton over the normalized alphabet."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = sorted({p for p in (normalize_word(w) for w in patterns) if p})
+        size = len(ALPHABET)
+        goto: List[List[int]] = [[-1] * size]
+        match: List[int] = [-1]
+        for index, word in enumerate(self.patterns):
+            node = 0
+            for symbol in normalize(word):
+                nxt = goto[node][symbol]
+                if nxt < 0:
+                    nxt = len(goto)
+                    goto[node][symbol] = nxt
+                    goto.append([-1] * size)
+                    match.append(-1)
+                node = nxt
+            match[node] = index
+
+        # breadth-first: fill missing transitions from the failure state, inherit matches
+        fail = [0] * len(goto)
+        order = []
+        root = goto[0]
+        for symbol in range(size):
+            if root[symbol] < 0:
+                root[symbol] = 0
+            else:
+                order.append(root[symbol])
+        head = 0
+        while head < len(order):
+            node = order[head]
+            head += 1
+            if match[node] < 0:
+                match[node] = match[fail[node]]
+            row = goto[node]
+            fail_row = goto[fail[node]]
+            for symbol in range(size):
+                nxt = row[symbol]
+                if nxt < 0:
+                    row[symbol] = fail_row[symbol]
+                else:
+                    fail[nxt] = fail_row[symbol]
+                    order.append(nxt)
+        self._delta = goto
+        self._match = match
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    @property
+    def states(self) -> int:
+        return len(self._delta)
+
+    def find(self, text: str) -> Optional[str]:
+        """The first banned pattern found in `text`, or None."""
+        if not self.patterns:
+            return None
+        delta, match = self._delta, self._match
+        node = 0
+        for symbol in normalize(text):
+            node = delta[node][symbol]
+            if match[node] >= 0:
+                return self.patterns[match[node]]
+        return None
+
+    def contains(self, text: str) -> bool:
+        return self.find(text) is not None
+
+
+class WordFilter:
+    def __init__(self, defaults: Iterable[str] = DEFAULT_BANNED_WORDS, storage=None):
+        self.defaults = frozenset(defaults)
+        self._storage = storage
+        self._automata: Dict[int, Automaton] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from ... import storage
+
+            self._storage = storage
+        return self._storage
+
+    def words(self, guild_id: Optional[int] = None) -> List[str]:
+        """Every word enforced for `guild_id` (defaults, global list and guild list)."""
+        words = set(self.defaults) | set(self.storage.load_banned_words(GLOBAL_GUILD))
+        if guild_id:
+            words.update(self.storage.load_banned_words(guild_id))
+        return sorted(words)
+
+    def automaton(self, guild_id: Optional[int] = None) -> Automaton:
+        key = guild_id or GLOBAL_GUILD
+        automaton = self._automata.get(key)
+        if automaton is None:
+            with self._lock:
+                automaton = self._automata.get(key)
+                if automaton is None:
+                    automaton = self._automata[key] = Automaton(self.words(key))
+                    self.builds += 1
+                    logger.debug("Built banned-word automaton for guild %s (%d words, %d states)", key, len(automaton), automaton.states)
+        return automaton
+
+    def find(self, text: str, guild_id: Optional[int] = None) -> Optional[str]:
+        return self.automaton(guild_id).find(text)
+
+    def contains(self, text: str, guild_id: Optional[int] = None) -> bool:
+        return self.find(text, guild_id) is not None
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Drop cached automata after a list change (the global list affects every guild)."""
+        with self._lock:
+            if not guild_id:
+                self._automata.clear()
+            else:
+                self._automata.pop(guild_id, None)
+
+    def add_words(self, guild_id: Optional[int], words: Sequence[str], added_by: Optional[int] = None) -> int:
+        normalized = sorted({w for w in (normalize_word(w) for w in words) if w})
+        added = self.storage.add_banned_words(guild_id or GLOBAL_GUILD, normalized, added_by)
+        if added:
+            self.invalidate(guild_id)
+        return added
+
+    def remove_words(self, guild_id: Optional[int], words: Sequence[str]) -> int:
+        normalized = sorted({w for w in (normalize_word(w) for w in words) if w})
+        removed = self.storage.remove_banned_words(guild_id or GLOBAL_GUILD, normalized)
+        if removed:
+            self.invalidate(guild_id)
+        return removed
+
+
+# module-level singleton
+word_filter = WordFilter()
@@ -0,0 +1,238 @@
+"""Precompiled startup snapshot of templates, locale bundles and default plans.
+
+At startup the bot would otherwise re-parse every JSON file under `data/`
+(templates, locales and questionnaires) and recompile the default plans. This
+module compiles all of that into one `marshal` blob
+(`data/cache/startup.snapshot`, override with `CONDITOR_SNAPSHOT_PATH`),
+loaded with a single read.
+
+The snapshot records a manifest of its sources (size, mtime and sha256 per
+file, including the compiler modules the plans depend on). It is fresh when
+the same set of files is present and every file either has the recorded
+size and mtime or, after a touch, the recorded content hash. A missing,
+corrupt, stale or foreign-format snapshot (the marshal format is tied to the
+Python version) falls back to the JSON sources and is rebuilt in the
+background.
+
+Build it ahead of time with `python scripts/build_snapshot.py` (the
+Dockerfile does this), or let the first start write it. Edits to `data/`
+files are picked up on the next start.
+"""
+import copy
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .file_writer import atomic_write, file_writer
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+DATA_DIR = PACKAGE_DIR.parent.parent / "data"
+SNAPSHOT_PATH = Path(os.getenv("CONDITOR_SNAPSHOT_PATH") or DATA_DIR / "cache" / "startup.snapshot")
+SNAPSHOT_FORMAT = 1
+MAGIC = b"CONDITOR-SNAPSHOT"
+SOURCE_DIRS = ("templates", "locales", "questionnaire")
+# compiled plans depend on this code as well as on the data
+CODE_SOURCES = (PACKAGE_DIR / "core" / "planner" / "compiler.py", PACKAGE_DIR / "core" / "intent" / "models.py")
+
+# relpath -> (size, mtime_ns, sha256)
+Manifest = Dict[str, Tuple[int, int, str]]
+
+
+@dataclass
+class Snapshot:
+    source_hash: str
+    manifest: Manifest
+    created_at: float = field(default_factory=time.time)
+    templates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    locales: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    questionnaires: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    plans: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # True when loaded from the snapshot file, False when compiled from JSON
+    from_cache: bool = False
+
+    def template(self, name: str) -> Optional[Dict[str, Any]]:
+        tpl = self.templates.get(name)
+        return copy.deepcopy(tpl) if tpl is not None else None
+
+    def plan(self, name: str):
+        """A fresh `BuildPlan` for the default plan `name` (a template name or `auto`), or None."""
+        data = self.plans.get(name)
+        if data is None:
+            return None
+        from .core.persistence.backup import plan_from_dict
+
+        return plan_from_dict(copy.deepcopy(data))
+
+    def to_bytes(self) -> bytes:
+        body = {
+            "format": SNAPSHOT_FORMAT,
+            "source_hash": self.source_hash,
+            "manifest": self.manifest,
+            "created_at": self.created_at,
+            "templates": self.templates,
+            "locales": self.locales,
+            "questionnaires": self.questionnaires,
+            "plans": self.plans,
+        }
+        return _header() + marshal.dumps(body)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional["Snapshot"]:
+        header = _header()
+        if not blob.startswith(header):
+            return None
+        try:
+            body = marshal.loads(blob[len(header):])
+        except (EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(body, dict) or body.get("format") != SNAPSHOT_FORMAT:
+            return None
+        body.pop("format")
+        body["manifest"] = {k: tuple(v) for k, v in body["manifest"].items()}
+        return cls(from_cache=True, **body)
+
+
+def _header() -> bytes:
+    return MAGIC + f":{SNAPSHOT_FORMAT}:py{sys.version_info[0]}.{sys.version_info[1]}\n".encode("ascii")
+
+
+def source_files(data_dir: Path = DATA_DIR) -> Dict[str, Path]:
+    files = {}
+    for sub in SOURCE_DIRS:
+        for path in sorted((data_dir / sub).glob("*.json")):
+            files[f"{sub}/{path.name}"] = path
+    for path in CODE_SOURCES:
+        files[f"code/{path.name}"] = path
+    return files
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def fingerprint(files: Dict[str, Path], previous: Optional[Manifest] = None) -> Manifest:
+    """Manifest of `files`; hashes are reused from `previous` when size and mtime match."""
+    previous = previous or {}
+    manifest: Manifest = {}
+    for rel, path in files.items():
+        st = path.stat()
+        known = previous.get(rel)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            manifest[rel] = known
+        else:
+            manifest[rel] = (st.st_size, st.st_mtime_ns, _sha256(path))
+    return manifest
+
+
+def manifest_hash(manifest: Manifest) -> str:
+    h = hashlib.sha256(f"format={SNAPSHOT_FORMAT}".encode("ascii"))
+    for rel in sorted(manifest):
+        h.update(f"\n{rel}={manifest[rel][2]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def is_fresh(snapshot: Snapshot, data_dir: Path = DATA_DIR) -> bool:
+    files = source_files(data_dir)
+    if set(files) != set(snapshot.manifest):
+        return False
+    try:
+        return manifest_hash(fingerprint(files, snapshot.manifest)) == snapshot.source_hash
+    except OSError:
+        return False
+
+
+def compile_snapshot(data_dir: Path = DATA_DIR) -> Snapshot:
+    """Parse every JSON source and compile the default plans (the slow path)."""
+    import json
+
+    from .core.intent.models import merge_spec
+    from .core.planner import compile_spec_to_plan
+
+    files = source_files(data_dir)
+    # fingerprint before reading so an edit made while compiling leaves the snapshot stale, not wrong
+    manifest = fingerprint(files)
+    parsed: Dict[str, Dict[str, Dict[str, Any]]] = {sub: {} for sub in SOURCE_DIRS}
+    for rel, path in files.items():
+        sub, _, name = rel.partition("/")
+        if sub not in parsed:
+            continue
+        try:
+            parsed[sub][name[:-len(".json")]] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable %s", path)
+    snapshot = Snapshot(
+        source_hash=manifest_hash(manifest),
+        manifest=manifest,
+        templates=parsed["templates"],
+        locales=parsed["locales"],
+        questionnaires=parsed["questionnaire"],
+    )
+    # default plans, compiled the way the engine cog previews them: every questionnaire and
+    # template merged, plus the named template
+    questionnaires = list(snapshot.questionnaires.values())
+    all_templates = list(snapshot.templates.values())
+    for name in [None] + sorted(snapshot.templates):
+        spec = merge_spec(copy.deepcopy(questionnaires), copy.deepcopy(all_templates))
+        if name is not None:
+            spec.extras.setdefault("templates", []).append(copy.deepcopy(snapshot.templates[name]))
+        try:
+            snapshot.plans[name or "auto"] = compile_spec_to_plan(spec, name=f"default-{name or 'auto'}").to_dict()
+        except Exception:
+            logger.exception("Failed to precompile the default plan for %s", name or "auto")
+    return snapshot
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    try:
+        blob = Path(path).read_bytes()
+    except OSError:
+        return None
+    return Snapshot.from_bytes(blob)
+
+
+def write_snapshot(snapshot: Snapshot, path: Path = SNAPSHOT_PATH) -> Path:
+    return atomic_write(path, snapshot.to_bytes())
+
+
+_current: Optional[Snapshot] = None
+
+
+def current() -> Optional[Snapshot]:
+    """The snapshot loaded at startup, or None (callers then read the JSON sources)."""
+    return _current
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH, data_dir: Path = DATA_DIR, rebuild: bool = True) -> Snapshot:
+    """Load the snapshot, falling back to compiling from JSON when it is missing or stale.
+
+    A rebuilt snapshot is written on the background file writer when `rebuild` is true.
+    Blocking; the bot calls it off the event loop.
+    """
+    global _current
+    started = time.perf_counter()
+    snapshot = read_snapshot(path)
+    if snapshot is not None and is_fresh(snapshot, data_dir):
+        logger.info("Loaded startup snapshot %s in %.0fms", snapshot.source_hash[:12], (time.perf_counter() - started) * 1000)
+    else:
+        reason = "missing or unreadable" if snapshot is None else "stale"
+        snapshot = compile_snapshot(data_dir)
+        logger.info("Startup snapshot %s; compiled %s from JSON in %.0fms", reason, snapshot.source_hash[:12], (time.perf_counter() - started) * 1000)
+        if rebuild:
+            file_writer.submit_nowait(write_snapshot, snapshot, path)
+    _current = snapshot
+    return snapshot
+
+
+def build_snapshot(path: Path = SNAPSHOT_PATH, data_dir: Path = DATA_DIR) -> Snapshot:
+    """Compile and write the snapshot now (build-time step)."""
+    snapshot = compile_snapshot(data_dir)
+    write_snapshot(snapshot, path)
+    return snapshot
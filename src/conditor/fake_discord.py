@@ -0,0 +1,426 @@
+"""In-process simulated Discord backend for tests and benchmarks.
+
+`FakeDiscord` hands out `FakeGuild` objects that implement the subset of the
+discord.py guild, channel, role, message and webhook API that the build
+handler (`discord_handler`), `permissions` and the backup code use. Nothing
+touches the network; every API call goes through `FakeDiscord.call`, which
+models what matters for performance:
+
+- latency: `latency` seconds per call plus up to `jitter` more, drawn from an
+  RNG seeded with `seed`, so a run is reproducible;
+- rate limits: per-route buckets (`SimConfig.buckets`, `limit` calls per `per`
+  seconds) scoped by guild or channel like Discord's major parameters, plus
+  a global bucket. An exhausted bucket raises a 429 `discord.HTTPException`
+  carrying `retry_after`, which the shared retry engine honours;
+- resource limits: 250 roles, 500 channels (categories included) and 50
+  channels per category, rejected with Discord's error codes;
+- failures: `error_rate` of calls fail with a 500.
+
+Objects created while setting up a guild (`FakeGuild.add_role`,
+`add_category`, `add_channel`, `populate`) bypass latency and limits. Time
+comes from `clock` (default `time.monotonic`), so tests can drive buckets
+with a fake clock. Counters in `stats()` report calls, 429s and simulated API
+seconds per route.
+"""
+import asyncio
+import itertools
+import random
+import time
+import types
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+# route -> (calls, per seconds); scoped per guild, or per channel for channel routes
+DEFAULT_BUCKETS: Dict[str, Tuple[int, float]] = {
+    "create_role": (10, 10.0),
+    "create_channel": (10, 10.0),
+    "edit_channel": (10, 10.0),
+    "send_message": (5, 5.0),
+    "webhook_send": (5, 2.0),
+    "create_webhook": (10, 10.0),
+    "webhooks": (10, 10.0),
+    "history": (50, 1.0),
+}
+
+MAX_ROLES = 250
+MAX_CHANNELS = 500
+MAX_CHANNELS_PER_CATEGORY = 50
+
+# Discord JSON error codes
+ERROR_MAX_ROLES = 30005
+ERROR_MAX_CHANNELS = 30013
+ERROR_INVALID_FORM = 50035
+
+
+def http_error(status: int, message: str, code: int = 0, retry_after: Optional[float] = None) -> discord.HTTPException:
+    """A `discord.HTTPException` as raised by discord.py for `status`."""
+    headers = {"Retry-After": f"{retry_after:.3f}"} if retry_after is not None else {}
+    response = types.SimpleNamespace(status=status, reason=message, headers=headers)
+    exc = discord.HTTPException(response, {"code": code, "message": message})
+    if retry_after is not None:
+        exc.retry_after = retry_after
+    return exc
+
+
+@dataclass
+class SimConfig:
+    latency: float = 0.0
+    jitter: float = 0.0
+    seed: int = 0
+    buckets: Dict[str, Tuple[int, float]] = field(default_factory=lambda: dict(DEFAULT_BUCKETS))
+    # (calls, per seconds) across every route; None disables
+    global_bucket: Optional[Tuple[int, float]] = (50, 1.0)
+    error_rate: float = 0.0
+    max_roles: int = MAX_ROLES
+    max_channels: int = MAX_CHANNELS
+    max_channels_per_category: int = MAX_CHANNELS_PER_CATEGORY
+
+
+class Bucket:
+    """Fixed-window bucket like Discord's: `limit` calls, then a 429 until the window resets."""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at: Optional[float] = None
+
+    def take(self, now: float) -> Optional[float]:
+        """Consume one call; returns None when allowed, else the seconds to wait."""
+        if self.reset_at is None or now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return None
+
+
+class FakeDiscord:
+    def __init__(self, config: Optional[SimConfig] = None, clock: Callable[[], float] = time.monotonic):
+        self.config = config or SimConfig()
+        self.clock = clock
+        self.rng = random.Random(self.config.seed)
+        self.guilds: Dict[int, "FakeGuild"] = {}
+        self._ids = itertools.count(1)
+        self._buckets: Dict[Tuple[str, int], Bucket] = {}
+        self._global = Bucket(*self.config.global_bucket) if self.config.global_bucket else None
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.api_seconds = 0.0
+
+    def snowflake(self) -> int:
+        return (next(self._ids) << 22) | 1
+
+    def guild(self, name: str = "Fake Guild", guild_id: Optional[int] = None) -> "FakeGuild":
+        guild = FakeGuild(self, guild_id or self.snowflake(), name)
+        self.guilds[guild.id] = guild
+        return guild
+
+    def _bucket(self, route: str, scope: int) -> Optional[Bucket]:
+        spec = self.config.buckets.get(route)
+        if spec is None:
+            return None
+        key = (route, scope)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket(*spec)
+        return bucket
+
+    async def call(self, route: str, scope: int, action: Callable[[], Any]) -> Any:
+        """Run one simulated API call on `route`, scoped to a guild or channel id."""
+        self.calls[route] += 1
+        now = self.clock()
+        for bucket in (self._global, self._bucket(route, scope)):
+            if bucket is None:
+                continue
+            wait = bucket.take(now)
+            if wait is not None:
+                self.rate_limited[route] += 1
+                raise http_error(429, "You are being rate limited.", retry_after=wait)
+        delay = self.config.latency + (self.rng.uniform(0, self.config.jitter) if self.config.jitter else 0.0)
+        self.api_seconds += delay
+        if delay:
+            await asyncio.sleep(delay)
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.errors[route] += 1
+            raise http_error(500, "Internal Server Error")
+        try:
+            return action()
+        except discord.HTTPException:
+            self.errors[route] += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "rate_limited": dict(self.rate_limited),
+            "errors": dict(self.errors),
+            "api_seconds": round(self.api_seconds, 6),
+        }
+
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str, colour: Optional[discord.Colour] = None,
+                 permissions: Optional[discord.Permissions] = None, position: int = 0):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.colour = colour or discord.Colour.default()
+        self.permissions = permissions or discord.Permissions.none()
+        self.position = position
+
+    @property
+    def color(self) -> discord.Colour:
+        return self.colour
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def __repr__(self) -> str:
+        return f"<FakeRole id={self.id} name={self.name!r}>"
+
+
+class FakeMember:
+    def __init__(self, member_id: int, name: str, roles: Iterable[FakeRole] = (), permissions: Optional[discord.Permissions] = None):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.roles = list(roles)
+        self.guild_permissions = permissions or discord.Permissions.all()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel", message_id: int, content: str, author: FakeMember, created_at: datetime):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.created_at = created_at
+        self.attachments: List[Any] = []
+        self.embeds: List[discord.Embed] = []
+
+
+class FakeWebhook:
+    def __init__(self, channel: "FakeTextChannel", webhook_id: int, name: str):
+        self.channel = channel
+        self.id = webhook_id
+        self.name = name
+
+    async def send(self, content: str = "", username: Optional[str] = None, **kwargs) -> FakeMessage:
+        backend = self.channel.guild.backend
+        author = FakeMember(0, username or self.name)
+        return await backend.call("webhook_send", self.channel.id, lambda: self.channel._post(content, author))
+
+
+class FakeGuildChannel:
+    type = discord.ChannelType.text
+
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str, category: Optional["FakeCategory"] = None, position: int = 0):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.category = category
+        self.position = position
+        self.topic: Optional[str] = None
+        self.overwrites: Dict[Any, discord.PermissionOverwrite] = {}
+
+    @property
+    def category_id(self) -> Optional[int]:
+        return self.category.id if self.category else None
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def edit(self, **fields):
+        def _edit():
+            overwrites = fields.pop("permission_overwrites", None)
+            if overwrites is not None:
+                self.overwrites = dict(overwrites)
+            for key, value in fields.items():
+                setattr(self, key, value)
+            return self
+
+        return await self.guild.backend.call("edit_channel", self.id, _edit)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} id={self.id} name={self.name!r}>"
+
+
+class FakeCategory(FakeGuildChannel):
+    type = discord.ChannelType.category
+
+    @property
+    def channels(self) -> List[FakeGuildChannel]:
+        return [c for c in self.guild.channels if c.category is self]
+
+
+class FakeVoiceChannel(FakeGuildChannel):
+    type = discord.ChannelType.voice
+
+
+class FakeTextChannel(FakeGuildChannel):
+    def __init__(self, *args, news: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.type = discord.ChannelType.news if news else discord.ChannelType.text
+        self.messages: List[FakeMessage] = []
+        self._webhooks: List[FakeWebhook] = []
+
+    def is_news(self) -> bool:
+        return self.type == discord.ChannelType.news
+
+    def _post(self, content: str, author: FakeMember, created_at: Optional[datetime] = None) -> FakeMessage:
+        if created_at is None:
+            created_at = datetime.now(timezone.utc)
+        message = FakeMessage(self, self.guild.backend.snowflake(), content, author, created_at)
+        self.messages.append(message)
+        return message
+
+    async def send(self, content: str = "", **kwargs) -> FakeMessage:
+        return await self.guild.backend.call("send_message", self.id, lambda: self._post(content, self.guild.me))
+
+    async def webhooks(self) -> List[FakeWebhook]:
+        return await self.guild.backend.call("webhooks", self.id, lambda: list(self._webhooks))
+
+    async def create_webhook(self, name: str, **kwargs) -> FakeWebhook:
+        def _create():
+            webhook = FakeWebhook(self, self.guild.backend.snowflake(), name)
+            self._webhooks.append(webhook)
+            return webhook
+
+        return await self.guild.backend.call("create_webhook", self.id, _create)
+
+    async def history(self, limit: Optional[int] = 100, oldest_first: Optional[bool] = None, **kwargs):
+        """Newest first by default, like discord.py; one simulated call per 100 messages."""
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        if limit is not None:
+            messages = messages[:limit]
+        for start in range(0, len(messages) or 1, 100):
+            page = await self.guild.backend.call("history", self.id, lambda start=start: messages[start:start + 100])
+            for message in page:
+                yield message
+
+
+class FakeGuild:
+    def __init__(self, backend: FakeDiscord, guild_id: int, name: str):
+        self.backend = backend
+        self.id = guild_id
+        self.name = name
+        self.preferred_locale = "en-US"
+        self.roles: List[FakeRole] = [FakeRole(self, guild_id, "@everyone")]
+        self.channels: List[FakeGuildChannel] = []
+        self.me = FakeMember(backend.snowflake(), "Conditor")
+        self.me.roles = [self.add_role("Conditor")]
+
+    @property
+    def default_role(self) -> FakeRole:
+        return self.roles[0]
+
+    @property
+    def categories(self) -> List[FakeCategory]:
+        return [c for c in self.channels if isinstance(c, FakeCategory)]
+
+    @property
+    def text_channels(self) -> List[FakeTextChannel]:
+        return [c for c in self.channels if isinstance(c, FakeTextChannel)]
+
+    @property
+    def voice_channels(self) -> List[FakeVoiceChannel]:
+        return [c for c in self.channels if isinstance(c, FakeVoiceChannel)]
+
+    def get_channel(self, channel_id: int) -> Optional[FakeGuildChannel]:
+        return next((c for c in self.channels if c.id == channel_id), None)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    # setup helpers: no latency, rate limits or resource limits
+
+    def add_role(self, name: str, colour: Optional[discord.Colour] = None, permissions: Optional[discord.Permissions] = None) -> FakeRole:
+        role = FakeRole(self, self.backend.snowflake(), name, colour, permissions, position=len(self.roles))
+        self.roles.append(role)
+        return role
+
+    def add_category(self, name: str) -> FakeCategory:
+        category = FakeCategory(self, self.backend.snowflake(), name, position=len(self.categories))
+        self.channels.append(category)
+        return category
+
+    def add_channel(self, name: str, category: Optional[FakeCategory] = None, voice: bool = False, news: bool = False) -> FakeGuildChannel:
+        position = len(category.channels) if category else 0
+        if voice:
+            channel = FakeVoiceChannel(self, self.backend.snowflake(), name, category, position)
+        else:
+            channel = FakeTextChannel(self, self.backend.snowflake(), name, category, position, news=news)
+        self.channels.append(channel)
+        return channel
+
+    def populate(self, categories: int = 10, channels_per_category: int = 50, roles: int = 20,
+                 messages_per_channel: int = 0, voice_every: int = 5, overwrite_every: int = 3) -> "FakeGuild":
+        """Fill the guild with a synthetic structure (every `voice_every`-th channel is voice)."""
+        author = FakeMember(self.backend.snowflake(), "member")
+        made_roles = [self.add_role(f"role-{i}", colour=discord.Colour(i * 0x0F0F0F & 0xFFFFFF)) for i in range(roles)]
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for c in range(categories):
+            category = self.add_category(f"category-{c}")
+            for n in range(channels_per_category):
+                voice = bool(voice_every) and n % voice_every == voice_every - 1
+                channel = self.add_channel(f"channel-{c}-{n}", category, voice=voice)
+                if made_roles and overwrite_every and n % overwrite_every == 0:
+                    role = made_roles[(c + n) % len(made_roles)]
+                    channel.overwrites = {role: discord.PermissionOverwrite(view_channel=True, send_messages=False)}
+                if not voice:
+                    for m in range(messages_per_channel):
+                        channel._post(f"message {m} in {channel.name}", author, start + timedelta(minutes=m))
+        return self
+
+    # API calls
+
+    def _check_channel_limits(self, category: Optional[FakeCategory]):
+        if len(self.channels) >= self.backend.config.max_channels:
+            raise http_error(400, f"Maximum number of guild channels reached ({self.backend.config.max_channels})", ERROR_MAX_CHANNELS)
+        if category is not None and len(category.channels) >= self.backend.config.max_channels_per_category:
+            raise http_error(400, "Invalid Form Body: category is full", ERROR_INVALID_FORM)
+
+    async def create_role(self, name: str = "new role", colour: Optional[discord.Colour] = None, color: Optional[discord.Colour] = None,
+                          permissions: Optional[discord.Permissions] = None, **kwargs) -> FakeRole:
+        def _create():
+            if len(self.roles) >= self.backend.config.max_roles:
+                raise http_error(400, f"Maximum number of guild roles reached ({self.backend.config.max_roles})", ERROR_MAX_ROLES)
+            return self.add_role(name, colour or color, permissions)
+
+        return await self.backend.call("create_role", self.id, _create)
+
+    async def create_category(self, name: str, **kwargs) -> FakeCategory:
+        def _create():
+            self._check_channel_limits(None)
+            return self.add_category(name)
+
+        return await self.backend.call("create_channel", self.id, _create)
+
+    async def create_text_channel(self, name: str, category: Optional[FakeCategory] = None, news: bool = False, **kwargs) -> FakeTextChannel:
+        def _create():
+            self._check_channel_limits(category)
+            return self.add_channel(name, category, news=news)
+
+        return await self.backend.call("create_channel", self.id, _create)
+
+    async def create_voice_channel(self, name: str, category: Optional[FakeCategory] = None, **kwargs) -> FakeVoiceChannel:
+        def _create():
+            self._check_channel_limits(category)
+            return self.add_channel(name, category, voice=True)
+
+        return await self.backend.call("create_channel", self.id, _create)
+
+    def __repr__(self) -> str:
+        return f"<FakeGuild id={self.id} name={self.name!r}>"
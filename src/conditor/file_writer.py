@@ -0,0 +1,198 @@
+"""Shared off-loop file writer.
+
+All runtime, audit and backup writes go through one dedicated thread fed by
+a bounded queue, so slow disks never block the event loop. Coroutines await
+the outcome of their write (exceptions are re-raised in the caller). When the
+queue is full, submitters wait without blocking the loop, which is the
+backpressure. Jobs run in submission order, so successive writes to the same
+file land in order.
+
+Durability is controlled by the fsync policy (`CONDITOR_FSYNC`):
+- `atomic` (default) fsyncs atomic replacements (state files, archives) but
+  not appends.
+- `always` fsyncs every write.
+- `never` leaves flushing to the OS.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+FSYNC_ALWAYS = "always"
+FSYNC_ATOMIC = "atomic"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_ATOMIC, FSYNC_NEVER)
+
+_STOP = object()
+
+
+def _to_bytes(data: Union[str, bytes]) -> bytes:
+    return data.encode("utf-8") if isinstance(data, str) else bytes(data)
+
+
+def _fsync_dir(path: Path):
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: Union[str, bytes], fsync: bool = True) -> Path:
+    """Write `data` to a temp file next to `path` and rename it into place (blocking)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        fh.write(_to_bytes(data))
+        if fsync:
+            fh.flush()
+            os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    if fsync:
+        _fsync_dir(path.parent)
+    return path
+
+
+def append_file(path: Path, data: Union[str, bytes], fsync: bool = False) -> Path:
+    """Append `data` to `path`, creating it and its directory when missing (blocking)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as fh:
+        fh.write(_to_bytes(data))
+        if fsync:
+            fh.flush()
+            os.fsync(fh.fileno())
+    return path
+
+
+class FileWriter:
+    def __init__(self, maxsize: int = 256, fsync: str = FSYNC_ATOMIC):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.maxsize = maxsize
+        self.fsync = fsync
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._admitter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conditor-file-admit")
+        self._backlog = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="conditor-file-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                fn, args, kwargs, loop, fut = job
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    self.failed += 1
+                    if fut is None:
+                        logger.exception("Background write %s failed", getattr(fn, "__name__", fn))
+                    else:
+                        self._resolve(loop, fut, fut.set_exception, exc)
+                else:
+                    self.completed += 1
+                    if fut is not None:
+                        self._resolve(loop, fut, fut.set_result, result)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _resolve(loop, fut, setter, value):
+        def _set():
+            if not fut.done():
+                setter(value)
+        try:
+            loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # the submitting loop is gone; nobody is waiting for the result
+            pass
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run blocking `fn(*args, **kwargs)` on the writer thread and await its result."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        job = (fn, args, kwargs, loop, fut)
+        queued = False
+        if not self._backlog:
+            try:
+                self._queue.put_nowait(job)
+                queued = True
+            except queue.Full:
+                pass
+        if not queued:
+            # backpressure: wait for room on a single helper thread (keeps FIFO order), not on the loop
+            self._backlog += 1
+            try:
+                await loop.run_in_executor(self._admitter, self._queue.put, job)
+            finally:
+                self._backlog -= 1
+        return await fut
+
+    def submit_nowait(self, fn: Callable[..., Any], *args, **kwargs):
+        """Fire-and-forget variant for synchronous callers; failures are logged."""
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs, None, None))
+
+    def _want_fsync(self, fsync: Optional[bool], atomic: bool) -> bool:
+        if fsync is not None:
+            return fsync
+        return self.fsync == FSYNC_ALWAYS or (atomic and self.fsync == FSYNC_ATOMIC)
+
+    async def write_atomic(self, path: Path, data: Union[str, bytes], fsync: Optional[bool] = None) -> Path:
+        return await self.submit(atomic_write, path, data, self._want_fsync(fsync, True))
+
+    async def append(self, path: Path, data: Union[str, bytes], fsync: Optional[bool] = None) -> Path:
+        return await self.submit(append_file, path, data, self._want_fsync(fsync, False))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write has finished (for shutdown and tests)."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((done.set, (), {}, None, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._admitter.shutdown(wait=False)
+
+
+# module-level singleton
+file_writer = FileWriter(
+    maxsize=int(os.getenv("CONDITOR_WRITE_QUEUE", "256") or 256),
+    fsync=(os.getenv("CONDITOR_FSYNC") or FSYNC_ATOMIC).lower(),
+)
+atexit.register(file_writer.close)
+registry.gauge("conditor_file_writer_pending", "Writes queued for the background file writer.").set_function(file_writer.pending)
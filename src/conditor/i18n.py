@@ -3,11 +3,19 @@
 Provides `Localizer` for JSON bundles, simple pluralization, and RTL detection.
 """
 from pathlib import Path
+import asyncio
 import json
-from typing import Dict
+import logging
+import string
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from . import data_snapshot
 
-BASE = Path(__file__).parent.parent / "data" / "locales"
+
+logger = logging.getLogger(__name__)
+
+BASE = data_snapshot.DATA_DIR / "locales"
 
 
 def is_rtl_locale(code: str) -> bool:
@@ -56,57 +64,262 @@ def select_plural_form(locale: str, n: int) -> str:
     return _plural_form_en(n)
 
 
+def normalize_locale(code: str) -> str:
+    """Canonical cache key for a locale code: `en-GB`, `en_gb` and `EN_GB` all become `en_gb`."""
+    return (code or "en").strip().replace("-", "_").lower() or "en"
+
+
+def fallback_chain(locale: str, supported: Iterable[str]) -> List[str]:
+    """Supported bundles for `locale`, most specific first: exact -> language -> 'en'."""
+    code = normalize_locale(locale)
+    chain = []
+    for cand in (code, code.split("_")[0], "en"):
+        if cand in supported and cand not in chain:
+            chain.append(cand)
+    return chain
+
+
+_FORMATTER = string.Formatter()
+
+
+def compile_message(source: str) -> Callable[[Dict[str, object]], str]:
+    """Compile a format string once into the cheapest renderer equivalent to `source.format(**kwargs)`.
+
+    Strings without fields render to themselves. Plain `{name}` fields are
+    translated to a `%(name)s` template, the fastest formatting path in
+    CPython. Anything else (format specs, conversions, positional or indexed
+    fields) uses the bound `str.format_map`.
+    """
+    try:
+        parts = list(_FORMATTER.parse(source))
+    except ValueError:
+        # malformed template: let str.format raise so callers fall back to the source
+        return source.format_map
+    if all(name is None for _, name, _, _ in parts):
+        text = source.replace("{{", "{").replace("}}", "}")
+        return lambda kwargs: text
+    if all(name is None or (name.isidentifier() and not spec and not conversion) for _, name, spec, conversion in parts):
+        template = "".join(
+            literal.replace("%", "%%") + (f"%({name})s" if name is not None else "")
+            for literal, name, _, _ in parts
+        )
+        return template.__mod__
+    return source.format_map
+
+
+class CompiledBundle:
+    """Messages for one locale, merged per key along its fallback chain, with precompiled renderers."""
+
+    __slots__ = ("locale", "chain", "messages", "renderers")
+
+    def __init__(self, locale: str, chain: List[str], raw: Dict[str, Dict[str, str]]):
+        self.locale = locale
+        self.chain = chain
+        self.messages: Dict[str, str] = {}
+        # least specific first, so more specific bundles override per key
+        for code in reversed(chain):
+            self.messages.update({k: v for k, v in raw.get(code, {}).items() if isinstance(v, str)})
+        self.renderers: Dict[str, Callable[[Dict[str, object]], str]] = {k: compile_message(v) for k, v in self.messages.items()}
+
+
+class _Generation:
+    """One immutable view of the locale files: parsed bundles plus the compiled bundles built from them."""
+
+    __slots__ = ("version", "stamps", "raw", "compiled")
+
+    def __init__(self, version: int, stamps: Dict[str, Tuple[int, int]], raw: Dict[str, Dict[str, str]]):
+        self.version = version
+        self.stamps = stamps
+        self.raw = raw
+        self.compiled: Dict[str, CompiledBundle] = {}
+
+    def bundle(self, locale: str) -> CompiledBundle:
+        chain = fallback_chain(locale, self.raw)
+        key = chain[0] if chain else ""
+        bundle = self.compiled.get(key)
+        if bundle is None:
+            bundle = self.compiled[key] = CompiledBundle(key, chain, self.raw)
+        return bundle
+
+
+class LocaleRegistry:
+    """Parsed, compiled locale bundles with hot reload.
+
+    `check()` stats the bundle files, reparses the ones whose mtime or size
+    changed, compiles every locale, and then swaps the new generation in with
+    a single assignment. A Localizer keeps the bundle it was created with, so
+    renders already in progress keep a consistent view, and new Localizers
+    see the new files. A file that fails to parse keeps its previous content
+    until it is fixed. `watch()` polls in the background (started by the bot,
+    `CONDITOR_LOCALE_POLL_SECONDS`).
+    """
+
+    def __init__(self, base: Optional[Path] = None):
+        self.base = base
+        self._generation: Optional[_Generation] = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self.generation.version
+
+    @property
+    def generation(self) -> _Generation:
+        gen = self._generation
+        if gen is None:
+            gen = self._initial()
+        return gen
+
+    def _dir(self) -> Path:
+        return self.base or BASE
+
+    def _stamps(self) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        for path in self._dir().glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            stamps[path.name] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def _initial(self) -> _Generation:
+        with self._lock:
+            if self._generation is not None:
+                return self._generation
+            snapshot = data_snapshot.current()
+            if snapshot is not None and self.base is None:
+                # trust the snapshot's manifest so the first poll does not reparse every file
+                stamps = {
+                    rel.split("/", 1)[1]: (mtime, size)
+                    for rel, (size, mtime, _) in snapshot.manifest.items()
+                    if rel.startswith("locales/")
+                }
+                raw = {normalize_locale(code): data for code, data in snapshot.locales.items()}
+                self._generation = _Generation(1, stamps, raw)
+            else:
+                self._generation = self._build(1, self._stamps(), None)
+            return self._generation
+
+    def _build(self, version: int, stamps: Dict[str, Tuple[int, int]], previous: Optional[_Generation]) -> _Generation:
+        raw: Dict[str, Dict[str, str]] = {}
+        for name in sorted(stamps):
+            code = normalize_locale(Path(name).stem)
+            if previous is not None and previous.stamps.get(name) == stamps[name] and code in previous.raw:
+                raw[code] = previous.raw[code]
+                continue
+            try:
+                raw[code] = json.loads((self._dir() / name).read_text(encoding="utf-8"))
+            except Exception:
+                if previous is not None and code in previous.raw:
+                    logger.warning("Locale bundle %s failed to parse; keeping the previous version", name, exc_info=True)
+                    # the new stamp is kept, so the file is reparsed on its next change, not every poll
+                    raw[code] = previous.raw[code]
+                else:
+                    logger.warning("Skipping unreadable locale bundle %s", name, exc_info=True)
+        gen = _Generation(version, stamps, raw)
+        for code in raw:
+            gen.bundle(code)
+        return gen
+
+    def check(self) -> bool:
+        """Reload changed bundle files; returns True when a new generation was swapped in."""
+        current = self.generation
+        stamps = self._stamps()
+        if stamps == current.stamps:
+            return False
+        with self._lock:
+            current = self._generation
+            new = self._build(current.version + 1, stamps, current)
+            if new.raw == current.raw and set(new.stamps) == set(current.stamps):
+                # touched but unchanged: remember the stamps without recompiling
+                new = _Generation(current.version, new.stamps, current.raw)
+                new.compiled = current.compiled
+                self._generation = new
+                return False
+            self._generation = new
+        logger.info("Reloaded locale bundles (generation %d: %s)", new.version, ", ".join(sorted(new.raw)))
+        return True
+
+    async def watch(self, interval: float = 5.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception:
+                logger.exception("Locale reload check failed")
+
+    def bundle(self, locale: str) -> CompiledBundle:
+        return self.generation.bundle(locale)
+
+    def supported_locales(self) -> List[str]:
+        return sorted(self.generation.raw)
+
+    def reset(self):
+        with self._lock:
+            self._generation = None
+
+
+# module-level singleton
+locale_registry = LocaleRegistry()
+
+
 class Localizer:
     """Loads locale JSON and formats messages.
 
-    Fallback order: exact code -> primary language -> 'en' -> key literal.
+    Bundles are merged per key along the fallback chain (exact code -> primary
+    language -> 'en'), so a key missing from `de.json` renders in English and
+    only keys missing everywhere render as the key literal. Merged bundles are
+    compiled once per supported locale by `locale_registry`; any other locale
+    string resolves to the closest supported one, so the cache cannot grow
+    past the set of bundles. A Localizer renders from the bundle generation
+    current when it was created, even if the files are reloaded meanwhile.
     Supports selecting plural forms by looking for keys like '<base>.one', '<base>.few', etc.
     Also provides `direction()` and `rtl_wrap()` helpers for RTL locales.
     """
 
-    _cache: Dict[str, Dict[str, str]] = {}
+    registry: LocaleRegistry = locale_registry
 
     def __init__(self, locale: str = None):
         self.locale = (locale or "en").lower()
-        self.bundle = self._load_bundle(self.locale)
+        self.compiled = self._load_bundle(self.locale)
+        self.bundle = self.compiled.messages
 
     @classmethod
-    def _load_bundle(cls, locale: str) -> Dict[str, str]:
-        if locale in cls._cache:
-            return cls._cache[locale]
-        candidates = [locale, locale.split("-")[0], locale.split("_")[0], "en"]
-        for cand in candidates:
-            path = BASE / f"{cand}.json"
-            if path.exists():
-                try:
-                    data = json.loads(path.read_text(encoding="utf-8"))
-                    cls._cache[locale] = data
-                    return data
-                except Exception:
-                    continue
-        cls._cache[locale] = {}
-        return {}
+    def supported_locales(cls) -> List[str]:
+        return cls.registry.supported_locales()
+
+    @classmethod
+    def _load_bundle(cls, locale: str) -> CompiledBundle:
+        return cls.registry.bundle(locale)
+
+    @classmethod
+    def clear_cache(cls):
+        cls.registry.reset()
 
     def get(self, key: str, **kwargs) -> str:
-        template = self.bundle.get(key)
-        if template is None:
+        render = self.compiled.renderers.get(key)
+        if render is None:
             # fallback to key if not found
             try:
                 return key.format(**kwargs) if kwargs else key
             except Exception:
                 return key
+        if not kwargs:
+            return self.bundle[key]
         try:
-            return template.format(**kwargs) if kwargs else template
+            return render(kwargs)
         except Exception:
-            return template
+            return self.bundle[key]
 
     def get_plural(self, base_key: str, n: int, **kwargs) -> str:
         form = select_plural_form(self.locale, n)
         # Try specific form keys then common fallbacks
+        renderers = self.compiled.renderers
         for k in (f"{base_key}.{form}", f"{base_key}.other", base_key):
-            if k in self.bundle:
+            if k in renderers:
                 try:
-                    return self.bundle[k].format(n=n, **kwargs)
+                    return renderers[k](dict(kwargs, n=n))
                 except Exception:
                     return self.bundle[k]
         # last resort
@@ -0,0 +1,177 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine wakes every `interval` seconds and records how late it
+was scheduled; that lateness is the loop lag. A daemon thread watches the
+heartbeat: when it has not beaten for longer than `interval + threshold` the
+loop is blocked, and the thread grabs the loop thread's current Python stack
+via `sys._current_frames()`. Once the loop recovers the measured lag is
+charged to the code site that was running (the innermost frame inside this
+package, else the innermost frame), so `report()` lists the worst offenders.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import LOOP_LAG, registry
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = str(Path(__file__).resolve().parent)
+
+LOOP_TICK = registry.histogram(
+    "conditor_event_loop_tick_lag_seconds", "Heartbeat scheduling delay per tick.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = registry.counter("conditor_event_loop_stalls_total", "Ticks over the lag threshold, by blocking code site.", ["site"])
+LOOP_LAG_MAX = registry.gauge("conditor_event_loop_lag_max_seconds", "Worst loop lag seen since start.")
+
+
+@dataclass
+class Offender:
+    site: str
+    count: int = 0
+    total: float = 0.0
+    worst: float = 0.0
+    stack: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"site": self.site, "count": self.count, "total": self.total, "worst": self.worst, "stack": self.stack}
+
+
+def _site_and_stack(frame, depth: int = 8) -> Tuple[str, List[str]]:
+    site_frame = None
+    f = frame
+    while f is not None:
+        if f.f_code.co_filename.startswith(PACKAGE_DIR):
+            site_frame = f
+            break
+        f = f.f_back
+    site_frame = site_frame or frame
+    code = site_frame.f_code
+    try:
+        filename = os.path.relpath(code.co_filename, os.path.dirname(PACKAGE_DIR))
+    except ValueError:
+        filename = code.co_filename
+    site = f"{filename}:{site_frame.f_lineno} in {code.co_name}"
+    stack = [line.rstrip() for line in traceback.format_stack(frame)[-depth:]]
+    return site, stack
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, max_offenders: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_offenders = max_offenders
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.offenders: Dict[str, Offender] = {}
+        self._last_beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._sample: Optional[Tuple[str, List[str]]] = None
+        self._sampled_beat: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running loop; must be called from the loop thread."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="conditor-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            self._record_tick(max(0.0, now - expected))
+
+    def _record_tick(self, lag: float):
+        self.last_lag = lag
+        LOOP_LAG.set(lag)
+        LOOP_TICK.observe(lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+            LOOP_LAG_MAX.set(lag)
+        if lag < self.threshold:
+            self._sample = None
+            return
+        self.stalls += 1
+        sample, self._sample = self._sample, None
+        site, stack = sample or ("unknown (stall ended before it was sampled)", [])
+        offender = self.offenders.get(site)
+        if offender is None:
+            if len(self.offenders) >= self.max_offenders:
+                # forget the mildest offender to keep memory bounded
+                del self.offenders[min(self.offenders.values(), key=lambda o: o.worst).site]
+            offender = self.offenders[site] = Offender(site)
+        offender.count += 1
+        offender.total += lag
+        if lag >= offender.worst:
+            offender.worst = lag
+            offender.stack = stack
+        LOOP_STALLS.inc(site=site)
+        logger.warning("Event loop blocked for %.3fs at %s", lag, site)
+
+    def _monitor(self):
+        poll = max(0.01, min(self.interval, self.threshold) / 2)
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            if time.monotonic() - beat < self.interval + self.threshold or self._sampled_beat == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._sample = _site_and_stack(frame)
+            self._sampled_beat = beat
+
+    def report(self, limit: int = 5) -> List[Offender]:
+        """Worst offenders first."""
+        return sorted(self.offenders.values(), key=lambda o: o.worst, reverse=True)[:limit]
+
+    def reset(self):
+        self.offenders.clear()
+        self.max_lag = 0.0
+        self.stalls = 0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# module-level singleton, tuned with CONDITOR_LOOP_LAG_THRESHOLD_MS / CONDITOR_LOOP_LAG_INTERVAL_MS
+watchdog = LoopWatchdog(
+    interval=_env_float("CONDITOR_LOOP_LAG_INTERVAL_MS", 100) / 1000,
+    threshold=_env_float("CONDITOR_LOOP_LAG_THRESHOLD_MS", 250) / 1000,
+)
@@ -0,0 +1,298 @@
+"""In-process metrics with a Prometheus text exposition endpoint.
+
+Counters, gauges and histograms live in a `Registry`; the module-level
+`registry` is what the bot instruments and what `MetricsServer` serves on
+`GET /metrics`. The server is a tiny asyncio HTTP responder bound to
+localhost, started only when `CONDITOR_METRICS_PORT` is set. Loop lag is fed
+by `loop_watchdog`.
+
+Executor metrics are collected through the executor's event hooks
+(`instrument_executor`), so uninstrumented executors pay nothing.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        return [(self.name, _format_labels(self.labelnames, k), v) for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """Read the value from `func()` at scrape time."""
+        self._functions[self._key(labels)] = func
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return float(self._functions[key]())
+        return self._values.get(key, 0.0)
+
+    def samples(self):
+        values = dict(self._values)
+        for key, func in self._functions.items():
+            try:
+                values[key] = float(func())
+            except Exception:
+                logger.exception("Gauge callback for %s failed", self.name)
+        return [(self.name, _format_labels(self.labelnames, k), v) for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        data = self._values.get(key)
+        if data is None:
+            data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[i] += 1
+                break
+        data[-2] += value
+        data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        data = self._values.get(self._key(labels))
+        return int(data[-1]) if data else 0
+
+    def samples(self):
+        out = []
+        for key, data in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, data):
+                cumulative += n
+                out.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", _format_value(bound))]), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            out.append((f"{self.name}_sum", labels, data[-2]))
+            out.append((f"{self.name}_count", labels, data[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs):
+        existing = self._metrics.get(name)
+        if existing is not None:
+            if not isinstance(existing, cls) or existing.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered with a different type or labels")
+            return existing
+        metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# module-level singleton
+registry = Registry()
+
+BUILDS = registry.counter("conditor_builds_total", "Build plans finished, by outcome.", ["result"])
+BUILD_DURATION = registry.histogram("conditor_build_duration_seconds", "Wall time of a build plan run.", buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+BUILD_STEPS = registry.counter("conditor_build_steps_total", "Plan steps finished, by step type and status.", ["type", "status"])
+STEP_DURATION = registry.histogram("conditor_step_duration_seconds", "Time per plan step including retries.", ["type"])
+STEP_RETRIES = registry.counter("conditor_step_retries_total", "Plan step retries, by error class.", ["error_class"])
+API_ERRORS = registry.counter("conditor_api_errors_total", "Failed Discord API attempts, by error class (rate_limited counts 429s).", ["error_class"])
+RATE_LIMIT_WAIT = registry.histogram("conditor_rate_limiter_wait_seconds", "Time spent waiting for the per-key rate limiter lock.")
+RATE_LIMIT_CALLS = registry.counter("conditor_rate_limiter_calls_total", "Calls admitted through the rate limiter.")
+SCHEDULER_WAITING = registry.gauge("conditor_scheduler_waiting", "API calls queued in the priority scheduler.", ["priority"])
+SCHEDULER_WAIT = registry.histogram("conditor_scheduler_wait_seconds", "Queue wait in the priority scheduler.", ["priority"])
+BUILD_QUEUE_DEPTH = registry.gauge("conditor_build_queue_depth", "Items waiting on the build queue.")
+STORAGE_CALLS = registry.histogram("conditor_storage_call_seconds", "Duration of storage calls.", ["op"])
+STORAGE_ERRORS = registry.counter("conditor_storage_errors_total", "Storage calls that raised.", ["op"])
+LOOP_LAG = registry.gauge("conditor_event_loop_lag_seconds", "Most recent event-loop scheduling delay.")
+
+
+def instrument_executor(executor) -> Callable[[], None]:
+    """Record build, step and retry metrics from `executor`'s events; returns a detach function."""
+    def _step_done(event):
+        status = "skipped" if event.skipped else ("success" if event.name == "step_succeeded" else "failed")
+        step_type = getattr(event.step.type, "value", str(event.step.type))
+        BUILD_STEPS.inc(type=step_type, status=status)
+        if not event.skipped:
+            STEP_DURATION.observe(event.elapsed, type=step_type)
+
+    def _retried(event):
+        STEP_RETRIES.inc(error_class=event.error_class or "unknown")
+
+    def _finished(event):
+        steps = (event.state or {}).get("steps", {}).values()
+        BUILDS.inc(result="failed" if any(s.get("status") == "failed" for s in steps) else "success")
+        BUILD_DURATION.observe(event.elapsed)
+
+    detach = [
+        executor.subscribe("step_succeeded", _step_done),
+        executor.subscribe("step_failed", _step_done),
+        executor.subscribe("step_retried", _retried),
+        executor.subscribe("plan_finished", _finished),
+    ]
+    return lambda: [d() for d in detach]
+
+
+class MetricsServer:
+    """Serve `registry.render()` over HTTP on `host:port` (port 0 picks a free one)."""
+
+    def __init__(self, registry: Registry = registry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Metrics endpoint listening on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            # drain headers
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+                status, ctype, body = "200 OK", CONTENT_TYPE, self.registry.render().encode("utf-8")
+            else:
+                status, ctype, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def start_metrics_server() -> Optional[MetricsServer]:
+    """Start the endpoint when `CONDITOR_METRICS_PORT` is set (bind host: `CONDITOR_METRICS_HOST`)."""
+    port = os.getenv("CONDITOR_METRICS_PORT")
+    if not port:
+        return None
+    server = MetricsServer(registry, host=os.getenv("CONDITOR_METRICS_HOST", "127.0.0.1"), port=int(port))
+    await server.start()
+    return server
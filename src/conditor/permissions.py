@@ -1,7 +1,7 @@
 from typing import Dict, Any
 
 import discord
-from .rate_limiter import run_with_rate_limit
+from .request_scheduler import Priority, run_scheduled
 
 
 async def ensure_bot_role_position(guild: discord.Guild) -> None:
@@ -17,9 +17,27 @@ async def ensure_bot_role_position(guild: discord.Guild) -> None:
     return bot_top
 
 
+def missing_build_permissions(guild: discord.Guild) -> Dict[str, str]:
+    """Return `route -> reason` for build routes the bot cannot use in `guild`.
+
+    Routes match `circuit_breaker.STEP_ROUTES`; callers trip those breakers so
+    a plan fails fast instead of retrying calls that can only return 403.
+    """
+    me = getattr(guild, "me", None)
+    perms = getattr(me, "guild_permissions", None)
+    if perms is None or getattr(perms, "administrator", False):
+        return {}
+    missing = {}
+    if not perms.manage_roles:
+        missing["roles"] = "bot lacks Manage Roles"
+    if not perms.manage_channels:
+        missing["channels"] = "bot lacks Manage Channels"
+    return missing
+
+
 async def apply_channel_overwrites(guild: discord.Guild, channel: discord.abc.GuildChannel, overwrites: Dict[str, Any]):
     """Apply permission overwrites to a channel. `overwrites` is a mapping of role_name -> {allow:[], deny:[]}.
-    Uses rate-limited calls.
+    Runs as bulk traffic through the request scheduler.
     """
     role_map = {r.name: r for r in guild.roles}
     perms_map = {}
@@ -39,4 +57,4 @@ async def apply_channel_overwrites(guild: discord.Guild, channel: discord.abc.Gu
     async def _edit():
         await channel.edit(permission_overwrites=perms_map)
 
-    await run_with_rate_limit(guild.id, _edit)
+    await run_scheduled(Priority.BULK, guild.id, _edit)
@@ -1,17 +1,21 @@
 import asyncio
-import math
-import random
 import time
-from typing import Callable, Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Hashable
 
-import discord
+from .metrics import RATE_LIMIT_CALLS, RATE_LIMIT_WAIT
+from .retry import DEFAULT_POLICY, call_with_retry, retry_active
 
 
 class RateLimiter:
-    """Simple centralized retry manager with per-guild locks and exponential backoff.
+    """Centralized per-guild serialization of API calls.
 
     Usage: await RateLimiter.run(guild_id, coro_func, *args, **kwargs)
     where coro_func is an async callable.
+
+    Retries are delegated to the shared engine in `retry`: when the caller is
+    already inside `call_with_retry` (e.g. an executor step) the call runs once,
+    otherwise it is retried with the default policy.
     """
 
     def __init__(self):
@@ -22,32 +26,22 @@ class RateLimiter:
             self.locks[guild_id] = asyncio.Lock()
         return self.locks[guild_id]
 
-    async def run(self, guild_id: int, func: Callable[..., Any], *args, **kwargs):
+    @asynccontextmanager
+    async def hold(self, guild_id: Hashable) -> AsyncIterator[None]:
+        """Serialize with other calls for `guild_id`; no retries, the caller owns them."""
         lock = self._get_lock(guild_id)
-        # serialize operations per-guild
+        queued_at = time.perf_counter()
         async with lock:
-            attempt = 0
-            base_delay = 0.5
-            while True:
-                try:
-                    return await func(*args, **kwargs)
-                except discord.HTTPException as exc:
-                    attempt += 1
-                    if getattr(exc, "status", None) == 429 or getattr(exc, "code", None) == 429:
-                        retry_after = getattr(exc, "retry_after", None) or (base_delay * (2 ** attempt))
-                        # jitter
-                        jitter = random.uniform(0, 0.5)
-                        await asyncio.sleep(retry_after + jitter)
-                        continue
-                    # other HTTP errors: backoff and retry a few times
-                    if attempt >= 4:
-                        raise
-                    await asyncio.sleep(min(10, base_delay * (2 ** attempt)))
-                except Exception:
-                    attempt += 1
-                    if attempt >= 4:
-                        raise
-                    await asyncio.sleep(min(5, base_delay * (2 ** attempt)))
+            RATE_LIMIT_WAIT.observe(time.perf_counter() - queued_at)
+            RATE_LIMIT_CALLS.inc()
+            yield
+
+    async def run(self, guild_id: int, func: Callable[..., Any], *args, **kwargs):
+        # serialize operations per-guild
+        async with self.hold(guild_id):
+            if retry_active():
+                return await func(*args, **kwargs)
+            return await call_with_retry(lambda: func(*args, **kwargs), DEFAULT_POLICY)
 
 
 # module-level singleton
@@ -56,3 +50,8 @@ _rl = RateLimiter()
 
 async def run_with_rate_limit(guild_id: int, func: Callable[..., Any], *args, **kwargs):
     return await _rl.run(guild_id, func, *args, **kwargs)
+
+
+def guild_lock(guild_id: Hashable):
+    """Async context manager holding the per-guild serialization lock."""
+    return _rl.hold(guild_id)
@@ -0,0 +1,154 @@
+"""Central priority scheduler for Discord API traffic.
+
+Every API call is admitted through `run_scheduled(priority, key, func)`. A fixed
+number of calls may be in flight at once (`CONDITOR_SCHEDULER_MAX_INFLIGHT`,
+default 8); when a slot frees up it goes to the oldest waiter of the most
+urgent class, so interactive replies overtake progress edits and both overtake
+bulk build/replay work. `CONDITOR_SCHEDULER_RESERVED` slots (default 1) are
+kept for non-bulk traffic so user-facing calls never queue behind a full pipe
+of bulk steps.
+
+Calls with a key (a guild id) first take that key's serialization lock from
+`rate_limiter` and only then queue for a slot, so calls waiting behind another
+call for the same guild do not hold slots. A slot covers a single attempt:
+retry sleeps (429 `retry_after`, backoff) happen with the slot released, so a
+busy or rate-limited guild never blocks other guilds' calls. Inside
+`call_with_retry` (executor steps) the outer engine owns the retries;
+otherwise keyed calls are retried here with the default policy. Calls without
+a key (e.g. interaction responses) run once, directly.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .metrics import SCHEDULER_WAIT, SCHEDULER_WAITING
+from .rate_limiter import guild_lock
+from .retry import DEFAULT_POLICY, call_with_retry, retry_active
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    PROGRESS = 1
+    BULK = 2
+
+
+class RequestScheduler:
+    """Admission control for API calls with per-class queue-wait metrics."""
+
+    def __init__(self, max_inflight: int = 8, reserved: int = 1):
+        self.max_inflight = max(1, int(max_inflight))
+        self.reserved = max(0, min(int(reserved), self.max_inflight - 1))
+        self._inflight = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._stats: Dict[Priority, Dict[str, float]] = {
+            p: {"submitted": 0, "completed": 0, "waiting": 0, "wait_total": 0.0, "wait_max": 0.0} for p in Priority
+        }
+
+    def _limit(self, priority: Priority) -> int:
+        return self.max_inflight - (self.reserved if priority == Priority.BULK else 0)
+
+    def _drop_cancelled(self):
+        while self._waiters and self._waiters[0][2] is None:
+            heapq.heappop(self._waiters)
+
+    def _wake(self):
+        self._drop_cancelled()
+        while self._waiters and self._inflight < self._limit(self._waiters[0][0]):
+            _, _, fut = heapq.heappop(self._waiters)
+            self._inflight += 1
+            fut.set_result(None)
+            self._drop_cancelled()
+
+    async def _acquire(self, priority: Priority):
+        self._drop_cancelled()
+        queued_ahead = self._waiters and self._waiters[0][0] <= priority
+        if not queued_ahead and self._inflight < self._limit(priority):
+            self._inflight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), fut]
+        heapq.heappush(self._waiters, entry)
+        stats = self._stats[priority]
+        stats["waiting"] += 1
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # the slot was handed over just before cancellation: pass it on
+                self._release()
+            else:
+                entry[2] = None
+            raise
+        finally:
+            stats["waiting"] -= 1
+
+    def _release(self):
+        self._inflight -= 1
+        self._wake()
+
+    async def _attempt(self, priority: Priority, func: Callable[..., Any], *args, **kwargs):
+        """Run `func` once inside an admission slot."""
+        stats = self._stats[priority]
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        waited = time.perf_counter() - queued_at
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        SCHEDULER_WAIT.observe(waited, priority=priority.name.lower())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._release()
+
+    async def run(self, priority: Priority, key: Optional[Hashable], func: Callable[..., Any], *args, **kwargs):
+        priority = Priority(priority)
+        stats = self._stats[priority]
+        stats["submitted"] += 1
+        try:
+            if key is None:
+                return await self._attempt(priority, func, *args, **kwargs)
+            async with guild_lock(key):
+                if retry_active():
+                    return await self._attempt(priority, func, *args, **kwargs)
+                return await call_with_retry(lambda: self._attempt(priority, func, *args, **kwargs), DEFAULT_POLICY)
+        finally:
+            stats["completed"] += 1
+
+    def waiting(self, priority: Optional[Priority] = None) -> int:
+        if priority is None:
+            return sum(int(s["waiting"]) for s in self._stats.values())
+        return int(self._stats[Priority(priority)]["waiting"])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return queue-wait metrics per priority class, keyed by class name."""
+        out = {}
+        for p, s in self._stats.items():
+            done = s["submitted"] - s["waiting"]
+            out[p.name.lower()] = dict(s, wait_avg=(s["wait_total"] / done) if done else 0.0)
+        return out
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        return cls(
+            max_inflight=int(os.getenv("CONDITOR_SCHEDULER_MAX_INFLIGHT") or 8),
+            reserved=int(os.getenv("CONDITOR_SCHEDULER_RESERVED") or 1),
+        )
+
+
+# module-level singleton
+_scheduler = RequestScheduler.from_env()
+for _p in Priority:
+    SCHEDULER_WAITING.set_function(lambda p=_p: _scheduler.waiting(p), priority=_p.name.lower())
+
+
+async def run_scheduled(priority: Priority, key: Optional[Hashable], func: Callable[..., Any], *args, **kwargs):
+    return await _scheduler.run(priority, key, func, *args, **kwargs)
+
+
+def scheduler_stats() -> Dict[str, Dict[str, float]]:
+    return _scheduler.stats()
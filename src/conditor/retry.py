@@ -0,0 +1,187 @@
+"""Single retry policy engine shared by the executor and the rate limiter.
+
+Errors are classified once (`classify_error`): 429s wait for `retry_after`,
+5xx and network errors back off with decorrelated jitter, and permanent
+(401/403/404), other client and unknown errors fail immediately. Retries are
+bounded per call by `RetryPolicy.max_attempts` and, optionally, across a whole
+plan by a shared `RetryBudget`.
+
+While `call_with_retry` runs, nested calls to `rate_limiter.run_with_rate_limit`
+and `request_scheduler.run_scheduled` execute exactly once, so a failing call is never retried by two layers.
+"""
+import asyncio
+import contextvars
+import inspect
+import random
+import time
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+import discord
+
+from .metrics import API_ERRORS
+
+
+class ErrorClass(str, Enum):
+    RATE_LIMITED = "rate_limited"
+    SERVER = "server"
+    NETWORK = "network"
+    PERMANENT = "permanent"
+    CLIENT = "client"
+    UNKNOWN = "unknown"
+
+
+RETRYABLE = {ErrorClass.RATE_LIMITED, ErrorClass.SERVER, ErrorClass.NETWORK}
+
+_retry_active: contextvars.ContextVar = contextvars.ContextVar("conditor_retry_active", default=False)
+
+
+def retry_active() -> bool:
+    """True while running inside `call_with_retry` (outer layer owns retries)."""
+    return _retry_active.get()
+
+
+def classify_error(exc: BaseException) -> ErrorClass:
+    status = getattr(exc, "status", None)
+    if isinstance(exc, discord.HTTPException) or isinstance(status, int):
+        if status == 429:
+            return ErrorClass.RATE_LIMITED
+        if isinstance(status, int) and status >= 500:
+            return ErrorClass.SERVER
+        if status in (401, 403, 404):
+            return ErrorClass.PERMANENT
+        return ErrorClass.CLIENT
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError, aiohttp.ClientError)):
+        return ErrorClass.NETWORK
+    return ErrorClass.UNKNOWN
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        value = headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    @classmethod
+    def from_step(cls, retry_policy: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        """Build a policy from a `BuildStep.retry_policy` dict.
+
+        `retries` is the number of retries after the first attempt (default 0,
+        as before the engine existed). The legacy `backoff` key was an exponent
+        base: retry `n` slept `backoff ** n`. It becomes a base delay of
+        `backoff` and a cap of `backoff ** retries` unless `base_delay` or
+        `max_delay` are given.
+        """
+        rp = retry_policy or {}
+        retries = max(0, int(rp.get("retries", 0)))
+        base_delay = rp.get("base_delay")
+        max_delay = rp.get("max_delay")
+        if "backoff" in rp:
+            backoff = float(rp["backoff"])
+            if base_delay is None:
+                base_delay = backoff
+            if max_delay is None:
+                max_delay = max(backoff, backoff ** retries)
+        return cls(
+            max_attempts=retries + 1,
+            base_delay=float(cls.base_delay if base_delay is None else base_delay),
+            max_delay=float(cls.max_delay if max_delay is None else max_delay),
+        )
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between the base and 3x the previous delay, capped."""
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+class RetryBudget:
+    """Retries shared by every step of a plan; `None` means unlimited."""
+
+    def __init__(self, retries: Optional[int] = None):
+        self.total = retries
+        self.remaining = retries
+
+    def consume(self) -> bool:
+        if self.remaining is None:
+            return True
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return {"total": self.total, "remaining": self.remaining}
+
+
+@dataclass
+class Attempt:
+    attempt: int
+    error: str
+    error_class: str
+    elapsed: float
+    delay: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+async def call_with_retry(
+    func: Callable[[], Awaitable[Any]],
+    policy: RetryPolicy = DEFAULT_POLICY,
+    budget: Optional[RetryBudget] = None,
+    attempts: Optional[List[Attempt]] = None,
+    on_retry: Optional[Callable[[Attempt], Any]] = None,
+):
+    """Await `func()` until it succeeds or the error is not worth retrying.
+
+    Every failed attempt is appended to `attempts`; `on_retry` (sync or async)
+    is called before sleeping. The last exception is re-raised on give-up.
+    """
+    if attempts is None:
+        attempts = []
+    token = _retry_active.set(True)
+    try:
+        delay = policy.base_delay
+        n = 0
+        while True:
+            n += 1
+            started = time.perf_counter()
+            try:
+                return await func()
+            except Exception as exc:
+                kind = classify_error(exc)
+                record = Attempt(attempt=n, error=str(exc) or type(exc).__name__, error_class=kind.value, elapsed=time.perf_counter() - started)
+                attempts.append(record)
+                API_ERRORS.inc(error_class=kind.value)
+                if kind not in RETRYABLE or n >= policy.max_attempts:
+                    raise
+                if budget is not None and not budget.consume():
+                    raise
+                if kind == ErrorClass.RATE_LIMITED and retry_after(exc) is not None:
+                    record.delay = retry_after(exc) + random.uniform(0, 0.25)
+                else:
+                    delay = policy.next_delay(delay)
+                    record.delay = delay
+                if on_retry is not None:
+                    res = on_retry(record)
+                    if inspect.isawaitable(res):
+                        await res
+                await asyncio.sleep(record.delay)
+    finally:
+        _retry_active.reset(token)
@@ -0,0 +1,206 @@
+"""Cog loading and the startup timing report.
+
+`load_cogs` loads every extension in `cogs/` in three steps:
+
+1. The package modules each cog imports (planner, executor, persistence, ...)
+   are found by parsing the cog source and imported on worker threads in
+   parallel, off the event loop. An import that fails here is only logged;
+   `load_extension` reports the real error.
+2. The eager cogs are loaded with concurrent `load_extension` calls. By then
+   their dependencies are cached, so each call only executes the cog module
+   and its `setup()`.
+3. Cogs listed in `CONDITOR_LAZY_COGS` (default: `backup,engine_cog`) are
+   deferred. They load in the background once the bot is ready
+   (`load_deferred_cogs`). Deferred cogs must not register application
+   commands, because the command tree is synced before they load.
+
+Each cog's dependency-import and load times, the startup phases, and the time
+from process start to ready are collected in `startup_report`.
+`C!startup_report` (AdminTools) shows them.
+"""
+import ast
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+COGS_DIR = Path(__file__).parent / "cogs"
+DEFAULT_LAZY_COGS = ("backup", "engine_cog")
+
+COG_LOAD_SECONDS = registry.gauge("conditor_cog_load_seconds", "Time to import dependencies of and load each cog.", ["cog", "phase"])
+STARTUP_PHASE = registry.gauge("conditor_startup_phase_seconds", "Seconds from process start to each startup phase.", ["phase"])
+
+
+def _process_start_time() -> float:
+    """Wall-clock start of this process (Linux /proc), else the time this module was imported."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as fh:
+            # field 22 (starttime, in clock ticks since boot); the command name may contain spaces
+            ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat", encoding="ascii") as fh:
+            boot = next(int(line.split()[1]) for line in fh if line.startswith("btime"))
+        return boot + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        return time.time()
+
+
+PROCESS_START = _process_start_time()
+
+
+@dataclass
+class CogTiming:
+    name: str
+    deferred: bool = False
+    import_seconds: float = 0.0
+    load_seconds: float = 0.0
+    status: str = "pending"
+    error: Optional[str] = None
+
+
+@dataclass
+class StartupReport:
+    started_at: float = PROCESS_START
+    phases: Dict[str, float] = field(default_factory=dict)
+    cogs: Dict[str, CogTiming] = field(default_factory=dict)
+
+    def mark(self, phase: str, when: Optional[float] = None) -> float:
+        """Record `phase` as reached now (first occurrence wins); returns seconds since process start."""
+        if phase not in self.phases:
+            self.phases[phase] = (when or time.time()) - self.started_at
+            STARTUP_PHASE.set(self.phases[phase], phase=phase)
+        return self.phases[phase]
+
+    def cog(self, name: str) -> CogTiming:
+        timing = self.cogs.get(name)
+        if timing is None:
+            timing = self.cogs[name] = CogTiming(name)
+        return timing
+
+    def render(self) -> str:
+        lines = [f"{phase:<16} +{seconds:.3f}s" for phase, seconds in sorted(self.phases.items(), key=lambda p: p[1])]
+        for t in sorted(self.cogs.values(), key=lambda t: t.import_seconds + t.load_seconds, reverse=True):
+            note = " (deferred)" if t.deferred else ""
+            lines.append(
+                f"{t.name:<16} deps={t.import_seconds * 1000:.0f}ms load={t.load_seconds * 1000:.0f}ms {t.status}{note}"
+                + (f": {t.error}" if t.error else "")
+            )
+        return "\n".join(lines)
+
+
+# module-level singleton
+startup_report = StartupReport()
+
+
+def discover_cogs(cogs_dir: Path = COGS_DIR) -> List[str]:
+    return sorted(p.stem for p in cogs_dir.glob("*.py") if not p.name.startswith("_"))
+
+
+def lazy_cogs_from_env() -> Set[str]:
+    value = os.getenv("CONDITOR_LAZY_COGS")
+    if value is None:
+        return set(DEFAULT_LAZY_COGS)
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def cog_dependencies(path: Path, package: str) -> List[str]:
+    """Absolute names of the package modules `path` imports (relative imports resolved against `package`)."""
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    root = package.split(".")
+    deps: List[str] = []
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        if node.level:
+            base = root[: len(root) - node.level + 1]
+            module = ".".join(base + ([node.module] if node.module else []))
+            if node.module:
+                deps.append(module)
+            else:
+                # `from .. import storage`: the names are submodules
+                deps.extend(f"{module}.{alias.name}" for alias in node.names)
+        elif node.module and node.module.split(".")[0] == root[0]:
+            deps.append(node.module)
+    return deps
+
+
+def _import_all(modules: Iterable[str]) -> float:
+    import importlib
+
+    started = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            logger.debug("Pre-import of %s failed; load_extension will report it", module, exc_info=True)
+    return time.perf_counter() - started
+
+
+async def _load_extension(bot, package: str, name: str, report: StartupReport):
+    timing = report.cog(name)
+    ext = f"{package}.cogs.{name}"
+    started = time.perf_counter()
+    try:
+        await bot.load_extension(ext)
+    except Exception as exc:
+        timing.status = "failed"
+        timing.error = f"{exc.__class__.__name__}: {exc}"
+        logger.exception("Failed to load cog %s", ext)
+    else:
+        timing.status = "loaded"
+    finally:
+        timing.load_seconds = time.perf_counter() - started
+        COG_LOAD_SECONDS.set(timing.load_seconds, cog=name, phase="load")
+    logger.info("Cog %s %s in %.0fms (deps %.0fms)", name, timing.status, timing.load_seconds * 1000, timing.import_seconds * 1000)
+
+
+async def _load(bot, names: List[str], package: str, report: StartupReport, concurrency: int):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="conditor-cog-import") as pool:
+        deps = {}
+        for name in names:
+            try:
+                deps[name] = cog_dependencies(COGS_DIR / f"{name}.py", f"{package}.cogs")
+            except (OSError, SyntaxError):
+                deps[name] = []
+        durations = await asyncio.gather(*(loop.run_in_executor(pool, _import_all, deps[n]) for n in names))
+    for name, seconds in zip(names, durations):
+        report.cog(name).import_seconds = seconds
+        COG_LOAD_SECONDS.set(seconds, cog=name, phase="import")
+    await asyncio.gather(*(_load_extension(bot, package, n, report) for n in names))
+
+
+async def load_cogs(bot, package: str = __package__, report: StartupReport = startup_report,
+                    lazy: Optional[Set[str]] = None, concurrency: int = 4) -> List[str]:
+    """Load the eager cogs now; returns the names deferred for `load_deferred_cogs`."""
+    report.mark("cogs_started")
+    lazy = lazy_cogs_from_env() if lazy is None else lazy
+    names = discover_cogs()
+    eager = [n for n in names if n not in lazy]
+    deferred = [n for n in names if n in lazy]
+    for name in deferred:
+        report.cog(name).deferred = True
+    logger.info("Loading cogs %s; deferring %s", eager, deferred)
+    await _load(bot, eager, package, report, concurrency)
+    report.mark("cogs_loaded")
+    return deferred
+
+
+async def load_deferred_cogs(bot, names: List[str], package: str = __package__,
+                             report: StartupReport = startup_report, concurrency: int = 2):
+    """Load cogs held back by `load_cogs` (call once the bot is ready)."""
+    pending = [n for n in names if report.cog(n).status == "pending"]
+    if not pending:
+        return
+    before = len(bot.tree.get_commands())
+    await _load(bot, pending, package, report, concurrency)
+    if len(bot.tree.get_commands()) != before:
+        logger.warning("Deferred cogs %s registered application commands; they are not synced until the next start", pending)
+    report.mark("deferred_loaded")
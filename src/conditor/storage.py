@@ -1,10 +1,37 @@
+import bisect
+import difflib
+import functools
+import hashlib
+import json
 import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterable, Optional, List, Tuple
+
+from .file_writer import file_writer
+from .metrics import STORAGE_CALLS, STORAGE_ERRORS
 
 DB_PATH = Path(__file__).parent.parent / "data" / "storage.db"
 
 
+def _timed(func):
+    """Record duration and failures of a storage call under its function name."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            STORAGE_ERRORS.inc(op=func.__name__)
+            raise
+        finally:
+            STORAGE_CALLS.observe(time.perf_counter() - started, op=func.__name__)
+    return wrapper
+
+
+@_timed
 def init_db() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
@@ -17,27 +44,336 @@ def init_db() -> None:
         )
         """
     )
+    # template history: every distinct content once (compressed), versions point at it by hash
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS template_blobs (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS template_versions (
+            name TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            hash TEXT NOT NULL REFERENCES template_blobs (hash),
+            created_at REAL NOT NULL,
+            author_id INTEGER,
+            PRIMARY KEY (name, version)
+        )
+        """
+    )
+    # templates saved before versioning become version 1
+    cur.execute(
+        "SELECT name, content FROM templates WHERE name NOT IN (SELECT DISTINCT name FROM template_versions)"
+    )
+    for name, content in cur.fetchall():
+        _store_version(cur, name, content, None, time.time())
+    _create_search_table(cur)
+    cur.execute(f"SELECT name, content FROM templates WHERE name NOT IN (SELECT name FROM {_search_table()})")
+    for name, content in cur.fetchall():
+        _index_template(cur, name, content)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backup_schedule (
+            guild_id INTEGER PRIMARY KEY,
+            enabled INTEGER NOT NULL DEFAULT 1
+        )
+        """
+    )
+    # hash of the last application-command payload synced per scope (see command_sync)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS command_sync (
+            scope TEXT PRIMARY KEY,
+            hash TEXT NOT NULL,
+            synced_at REAL NOT NULL
+        )
+        """
+    )
+    # per-guild banned word lists (guild_id 0 holds words banned everywhere, see core.safety.wordfilter)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS banned_words (
+            guild_id INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            added_by INTEGER,
+            added_at REAL NOT NULL,
+            PRIMARY KEY (guild_id, word)
+        )
+        """
+    )
+    # append-only audit trail (build approvals, template edits); `data` holds the full record as JSON
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            kind TEXT NOT NULL,
+            guild_id INTEGER,
+            user_id INTEGER,
+            user_name TEXT,
+            plan_name TEXT,
+            template TEXT,
+            data TEXT
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_guild ON audit_log (guild_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log (user_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_plan ON audit_log (plan_name, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_log (ts)")
+    migrated = _migrate_legacy_audit(cur)
     conn.commit()
     conn.close()
+    for path in migrated:
+        path.replace(path.with_name(path.name + ".migrated"))
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
 
-def save_template(name: str, content: str) -> None:
+def _store_version(cur, name: str, content: str, author_id: Optional[int], created_at: float) -> int:
+    """Add `content` as the next version of `name` unless it equals the latest; returns the version number."""
+    digest = _content_hash(content)
+    cur.execute("SELECT version, hash FROM template_versions WHERE name = ? ORDER BY version DESC LIMIT 1", (name,))
+    latest = cur.fetchone()
+    if latest and latest[1] == digest:
+        return latest[0]
+    raw = content.encode("utf-8")
+    cur.execute("INSERT OR IGNORE INTO template_blobs (hash, size, data) VALUES (?,?,?)", (digest, len(raw), zlib.compress(raw, 9)))
+    version = (latest[0] if latest else 0) + 1
+    cur.execute(
+        "INSERT INTO template_versions (name, version, hash, created_at, author_id) VALUES (?,?,?,?,?)",
+        (name, version, digest, created_at, author_id),
+    )
+    return version
+
+
+@_timed
+def save_template(name: str, content: str, author_id: Optional[int] = None) -> int:
+    """Save `content` as the current template and return its version number.
+
+    Every distinct content is kept as a zlib-compressed blob keyed by its
+    sha256, so re-saving an unchanged template (or reverting to an old one)
+    adds no blob; saving the same content as the latest adds no version.
+    """
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
+    version = _store_version(cur, name, content, author_id, time.time())
     cur.execute("REPLACE INTO templates (name, content) VALUES (?,?)", (name, content))
+    _index_template(cur, name, content)
     conn.commit()
     conn.close()
+    _name_index().add(name)
+    return version
+
 
+@_timed
+def load_template(name: str, version: Optional[int] = None) -> Optional[str]:
+    if version is None:
+        conn = sqlite3.connect(DB_PATH)
+        cur = conn.cursor()
+        cur.execute("SELECT content FROM templates WHERE name = ?", (name,))
+        row = cur.fetchone()
+        conn.close()
+        return row[0] if row else None
+    found = load_template_version(name, version)
+    return found[1] if found else None
 
-def load_template(name: str) -> Optional[str]:
+
+@functools.lru_cache(maxsize=64)
+def _blob_text(digest: str) -> str:
+    # blobs are immutable (keyed by content hash), so caching them is always safe
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("SELECT content FROM templates WHERE name = ?", (name,))
+    cur.execute("SELECT data FROM template_blobs WHERE hash = ?", (digest,))
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else None
+    if row is None:
+        raise KeyError(digest)
+    return zlib.decompress(row[0]).decode("utf-8")
+
+
+@_timed
+def load_template_version(name: str, version: Optional[int] = None) -> Optional[Tuple[int, str]]:
+    """Return `(version, content)` for `version` of `name` (latest when None)."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    if version is None:
+        cur.execute("SELECT version, hash FROM template_versions WHERE name = ? ORDER BY version DESC LIMIT 1", (name,))
+    else:
+        cur.execute("SELECT version, hash FROM template_versions WHERE name = ? AND version = ?", (name, int(version)))
+    row = cur.fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return row[0], _blob_text(row[1])
+
+
+@_timed
+def list_template_versions(name: str, limit: int = 25) -> List[dict]:
+    """Newest-first version metadata for `name` (no content is decompressed)."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT v.version, v.hash, v.created_at, v.author_id, b.size
+        FROM template_versions v JOIN template_blobs b ON b.hash = v.hash
+        WHERE v.name = ? ORDER BY v.version DESC LIMIT ?
+        """,
+        (name, int(limit)),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(zip(("version", "hash", "created_at", "author_id", "size"), r)) for r in rows]
+
+
+def diff_template_versions(name: str, old: int, new: Optional[int] = None, context: int = 3) -> Optional[str]:
+    """Unified diff between two versions of `name` (`new` defaults to the latest); None if either is missing."""
+    a = load_template_version(name, old)
+    b = load_template_version(name, new)
+    if a is None or b is None:
+        return None
+    if a[1] == b[1]:
+        return ""
+    return "".join(difflib.unified_diff(
+        a[1].splitlines(keepends=True), b[1].splitlines(keepends=True),
+        fromfile=f"{name}@v{a[0]}", tofile=f"{name}@v{b[0]}", n=context,
+    ))
+
+
+_FTS5: Optional[bool] = None
+
+
+def _fts_available() -> bool:
+    global _FTS5
+    if _FTS5 is None:
+        try:
+            sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+            _FTS5 = True
+        except sqlite3.OperationalError:
+            _FTS5 = False
+    return _FTS5
+
+
+def _search_table() -> str:
+    return "template_search" if _fts_available() else "template_search_plain"
+
+
+def _create_search_table(cur) -> None:
+    if _fts_available():
+        cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS template_search USING fts5(name, meta, roles, channels, tokenize='unicode61')")
+    else:
+        # LIKE-based fallback for SQLite builds without FTS5
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS template_search_plain (name TEXT PRIMARY KEY, meta TEXT, roles TEXT, channels TEXT)"
+        )
+
+
+def _search_document(content: str) -> Tuple[str, str, str]:
+    """Flatten a template into (meta, roles, channels) text for the search index."""
+    try:
+        tpl = json.loads(content)
+    except ValueError:
+        return "", "", ""
+    if not isinstance(tpl, dict):
+        return "", "", ""
+
+    def names(items) -> str:
+        out = []
+        for item in items or []:
+            if isinstance(item, dict):
+                out.extend(str(item[k]) for k in ("name", "name_key", "key") if item.get(k))
+        return " ".join(out)
+
+    meta_parts = []
+    for value in (tpl.get("meta") or {}).values():
+        meta_parts.extend(str(v) for v in (value if isinstance(value, list) else [value]) if isinstance(v, (str, int, float)))
+    channels = names(tpl.get("channels")) + " " + names(tpl.get("categories"))
+    return " ".join(meta_parts), names(tpl.get("roles")), channels.strip()
+
+
+def _index_template(cur, name: str, content: str) -> None:
+    table = _search_table()
+    cur.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+    cur.execute(f"INSERT INTO {table} (name, meta, roles, channels) VALUES (?,?,?,?)", (name, *_search_document(content)))
+
+
+@_timed
+def search_templates(query: str, limit: int = 25) -> List[str]:
+    """Names of templates whose name, meta, roles or channels match every word of `query` (word prefixes match)."""
+    terms = [t for t in query.replace('"', " ").split() if t]
+    if not terms:
+        return list_templates()[:limit]
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    if _fts_available():
+        match = " ".join(f'"{t}"*' for t in terms)
+        cur.execute("SELECT name FROM template_search WHERE template_search MATCH ? ORDER BY rank LIMIT ?", (match, int(limit)))
+    else:
+        clause = " AND ".join("(name || ' ' || meta || ' ' || roles || ' ' || channels) LIKE ?" for _ in terms)
+        cur.execute(
+            f"SELECT name FROM template_search_plain WHERE {clause} ORDER BY name LIMIT ?",
+            (*[f"%{t}%" for t in terms], int(limit)),
+        )
+    rows = cur.fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+class PrefixIndex:
+    """Sorted, case-insensitive name list answering prefix queries with `bisect`."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._keys: List[Tuple[str, str]] = sorted({(n.casefold(), n) for n in names})
 
+    def __len__(self) -> int:
+        return len(self._keys)
 
+    def add(self, name: str) -> None:
+        entry = (name.casefold(), name)
+        i = bisect.bisect_left(self._keys, entry)
+        if i == len(self._keys) or self._keys[i] != entry:
+            self._keys.insert(i, entry)
+
+    def remove(self, name: str) -> None:
+        entry = (name.casefold(), name)
+        i = bisect.bisect_left(self._keys, entry)
+        if i < len(self._keys) and self._keys[i] == entry:
+            del self._keys[i]
+
+    def complete(self, prefix: str, limit: int = 25) -> List[str]:
+        key = prefix.casefold()
+        i = bisect.bisect_left(self._keys, (key, ""))
+        out = []
+        while i < len(self._keys) and len(out) < limit and self._keys[i][0].startswith(key):
+            out.append(self._keys[i][1])
+            i += 1
+        return out
+
+
+# in-memory template name index for autocomplete, rebuilt when DB_PATH changes
+_NAME_INDEX: Optional[Tuple[Path, PrefixIndex]] = None
+
+
+def _name_index() -> PrefixIndex:
+    global _NAME_INDEX
+    if _NAME_INDEX is None or _NAME_INDEX[0] != DB_PATH:
+        _NAME_INDEX = (DB_PATH, PrefixIndex(list_templates() if DB_PATH.exists() else []))
+    return _NAME_INDEX[1]
+
+
+def complete_template_names(prefix: str, limit: int = 25) -> List[str]:
+    """Template names starting with `prefix` (case-insensitive), served from memory."""
+    return _name_index().complete(prefix, limit)
+
+
+@_timed
 def list_templates() -> List[str]:
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
@@ -47,33 +383,242 @@ def list_templates() -> List[str]:
     return [r[0] for r in rows]
 
 
+@_timed
+def set_backup_schedule(guild_id: int, enabled: bool) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("REPLACE INTO backup_schedule (guild_id, enabled) VALUES (?,?)", (int(guild_id), 1 if enabled else 0))
+    conn.commit()
+    conn.close()
+
+
+@_timed
+def list_backup_schedule() -> List[int]:
+    """Return ids of guilds that opted in to scheduled backups."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT guild_id FROM backup_schedule WHERE enabled = 1 ORDER BY guild_id")
+    rows = cur.fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+@_timed
+def get_command_hash(scope: str) -> Optional[str]:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT hash FROM command_sync WHERE scope = ?", (scope,))
+    row = cur.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+@_timed
+def set_command_hash(scope: str, digest: str) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("REPLACE INTO command_sync (scope, hash, synced_at) VALUES (?,?,?)", (scope, digest, time.time()))
+    conn.commit()
+    conn.close()
+
+
+@_timed
+def load_banned_words(guild_id: int) -> List[str]:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT word FROM banned_words WHERE guild_id = ? ORDER BY word", (guild_id,))
+    rows = [r[0] for r in cur.fetchall()]
+    conn.close()
+    return rows
+
+
+@_timed
+def add_banned_words(guild_id: int, words: Iterable[str], added_by: Optional[int] = None) -> int:
+    """Add `words` to a guild's list; returns how many were new."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    now = time.time()
+    cur.executemany(
+        "INSERT OR IGNORE INTO banned_words (guild_id, word, added_by, added_at) VALUES (?,?,?,?)",
+        [(guild_id, w, added_by, now) for w in words],
+    )
+    added = conn.total_changes
+    conn.commit()
+    conn.close()
+    return added
+
+
+@_timed
+def remove_banned_words(guild_id: int, words: Iterable[str]) -> int:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.executemany("DELETE FROM banned_words WHERE guild_id = ? AND word = ?", [(guild_id, w) for w in words])
+    removed = conn.total_changes
+    conn.commit()
+    conn.close()
+    return removed
+
+
 def _approvals_path() -> Path:
     p = Path(__file__).parent.parent / "data" / "runtime"
     p.mkdir(parents=True, exist_ok=True)
-    return p / "approvals.json"
+    return p / "approvals.jsonl"
+
+
+# template edit log written by template_cog before the audit table existed
+LEGACY_TEMPLATE_LOG = Path(__file__).resolve().parents[2] / "data" / "audit" / "templates.log"
 
+AUDIT_COLUMNS = ("id", "ts", "kind", "guild_id", "user_id", "user_name", "plan_name", "template", "data")
 
-def append_approval(entry: dict) -> None:
-    path = _approvals_path()
+
+def _iso_to_ts(value: Optional[str]) -> float:
     try:
+        when = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return time.time()
+    return (when if when.tzinfo else when.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _insert_audit(cur, kind: str, ts: float, guild_id, user_id, user_name, plan_name, template, data) -> int:
+    cur.execute(
+        "INSERT INTO audit_log (ts, kind, guild_id, user_id, user_name, plan_name, template, data) VALUES (?,?,?,?,?,?,?,?)",
+        (ts, kind, guild_id, user_id, user_name, plan_name, template, json.dumps(data, ensure_ascii=False) if data is not None else None),
+    )
+    return cur.lastrowid
+
+
+def _approval_row(entry: dict) -> dict:
+    by = entry.get("approved_by") or {}
+    return {
+        "kind": "approval",
+        "ts": _iso_to_ts(entry.get("approved_at")),
+        "guild_id": entry.get("guild_id"),
+        "user_id": by.get("id"),
+        "user_name": by.get("name"),
+        "plan_name": entry.get("plan_name"),
+        "template": entry.get("template"),
+        "data": entry,
+    }
+
+
+def _template_row(rec: dict) -> dict:
+    return {
+        "kind": f"template_{rec.get('action', 'edit')}",
+        "ts": _iso_to_ts(rec.get("ts")),
+        "guild_id": rec.get("guild_id"),
+        "user_id": rec.get("user_id"),
+        "user_name": rec.get("user_name"),
+        "plan_name": None,
+        "template": rec.get("template"),
+        "data": rec,
+    }
+
+
+def _migrate_legacy_audit(cur) -> List[Path]:
+    """Import approvals.json(l) and templates.log; returns the files to rename once committed."""
+    sources = []
+    approvals = _approvals_path()
+    for path in (approvals.with_name("approvals.json"), approvals):
         if path.exists():
-            data = json.loads(path.read_text(encoding='utf-8')) or []
+            sources.append((path, _approval_row))
+    if LEGACY_TEMPLATE_LOG.exists():
+        sources.append((LEGACY_TEMPLATE_LOG, _template_row))
+    migrated = []
+    for path, to_row in sources:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            continue
+        if path.suffix == ".json":
+            try:
+                records = json.loads(text) or []
+            except ValueError:
+                records = []
         else:
-            data = []
-    except Exception:
-        data = []
-    data.append(entry)
+            records = []
+            for line in text.splitlines():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        for rec in records:
+            if isinstance(rec, dict):
+                _insert_audit(cur, **to_row(rec))
+        migrated.append(path)
+    return migrated
+
+
+@_timed
+def append_audit(kind: str, guild_id: Optional[int] = None, user_id: Optional[int] = None, user_name: Optional[str] = None,
+                 plan_name: Optional[str] = None, template: Optional[str] = None, data: Optional[dict] = None,
+                 ts: Optional[float] = None) -> int:
+    """Insert one audit record and return its id (blocking; see `record_audit`)."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    row_id = _insert_audit(cur, kind, time.time() if ts is None else ts, guild_id, user_id, user_name, plan_name, template, data)
+    conn.commit()
+    conn.close()
+    return row_id
+
+
+async def record_audit(kind: str, **fields) -> int:
+    """Append an audit record from a coroutine; the insert runs on the background writer."""
+    return await file_writer.submit(append_audit, kind, **fields)
+
+
+@_timed
+def query_audit(guild_id: Optional[int] = None, user_id: Optional[int] = None, plan_name: Optional[str] = None,
+                kind: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                before_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+    """Return up to `limit` audit records, newest first.
+
+    Pages are keyset-based: pass the smallest `id` of the previous page as
+    `before_id` to continue, so deep pages cost the same as the first one.
+    `kind` ending in `*` matches a prefix (e.g. `template_*`).
+    """
+    clauses, params = [], []
+    for column, value in (("guild_id", guild_id), ("user_id", user_id), ("plan_name", plan_name)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if kind:
+        if kind.endswith("*"):
+            clauses.append("kind LIKE ?")
+            params.append(kind[:-1] + "%")
+        else:
+            clauses.append("kind = ?")
+            params.append(kind)
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("ts < ?")
+        params.append(until)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute(f"SELECT {', '.join(AUDIT_COLUMNS)} FROM audit_log {where} ORDER BY id DESC LIMIT ?", (*params, int(limit)))
+    rows = cur.fetchall()
+    conn.close()
+    out = []
+    for row in rows:
+        rec = dict(zip(AUDIT_COLUMNS, row))
+        rec["data"] = json.loads(rec["data"]) if rec["data"] else None
+        out.append(rec)
+    return out
+
+
+async def append_approval(entry: dict) -> None:
+    """Record a build approval in the audit log."""
     try:
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        await record_audit(**_approval_row(entry))
     except Exception:
         pass
 
 
-def load_approvals() -> List[dict]:
-    path = _approvals_path()
-    try:
-        if path.exists():
-            return json.loads(path.read_text(encoding='utf-8')) or []
-    except Exception:
-        return []
-    return []
+def load_approvals(guild_id: Optional[int] = None, limit: int = 100) -> List[dict]:
+    """Return the most recent approval entries (newest first)."""
+    return [r["data"] for r in query_audit(guild_id=guild_id, kind="approval", limit=limit)]
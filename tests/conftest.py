@@ -0,0 +1,17 @@
+import pytest
+
+from src.conditor import storage
+
+
+@pytest.fixture
+def db(request, tmp_path, monkeypatch):
+    """Point storage at files under `tmp_path`; tests call `storage.init_db()` themselves.
+
+    Parametrize indirectly with True/False to force the FTS5 or LIKE search backend.
+    """
+    monkeypatch.setattr(storage, 'DB_PATH', tmp_path / 'storage.db')
+    monkeypatch.setattr(storage, '_approvals_path', lambda: tmp_path / 'approvals.jsonl')
+    monkeypatch.setattr(storage, 'LEGACY_TEMPLATE_LOG', tmp_path / 'templates.log')
+    if hasattr(request, 'param'):
+        monkeypatch.setattr(storage, '_FTS5', request.param)
+    return tmp_path
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from discord.ext import commands
+
+from src.conditor import storage
+from src.conditor.cogs.audit import parse_filters
+
+
+def test_keyset_pages_and_filters(db):
+    storage.init_db()
+    for i in range(25):
+        storage.append_audit('approval' if i % 2 else 'template_save', guild_id=1 if i < 20 else 2, user_id=10 + i % 3,
+                             plan_name=f'plan{i % 5}', ts=1000.0 + i)
+
+    first = storage.query_audit(guild_id=1, limit=8)
+    second = storage.query_audit(guild_id=1, limit=8, before_id=first[-1]['id'])
+    third = storage.query_audit(guild_id=1, limit=8, before_id=second[-1]['id'])
+    ids = [r['id'] for r in first + second + third]
+    assert ids == sorted(ids, reverse=True) and len(ids) == 20 == len(set(ids))
+
+    assert {r['user_id'] for r in storage.query_audit(user_id=11, limit=100)} == {11}
+    assert all(r['plan_name'] == 'plan3' for r in storage.query_audit(plan_name='plan3'))
+    assert len(storage.query_audit(kind='template_*', limit=100)) == 13
+    window = storage.query_audit(since=1005.0, until=1010.0, limit=100)
+    assert sorted(r['ts'] for r in window) == [1005.0 + i for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_legacy_files_are_migrated_and_approvals_recorded(db):
+    (db / 'approvals.json').write_text(json.dumps([
+        {'approved_by': {'id': 7, 'name': 'old'}, 'approved_at': '2024-01-01T00:00:00Z', 'guild_id': 5, 'plan_name': 'legacy'},
+    ]))
+    (db / 'templates.log').write_text(json.dumps({'ts': '2024-01-02T00:00:00Z', 'user_id': 8, 'guild_id': 5, 'template': 't', 'action': 'save'}) + '\n')
+    storage.init_db()
+    storage.init_db()  # migration runs once
+    assert not (db / 'approvals.json').exists() and (db / 'approvals.json.migrated').exists()
+
+    await storage.append_approval({'approved_by': {'id': 9, 'name': 'new'}, 'approved_at': '2024-02-01T00:00:00Z', 'guild_id': 5, 'plan_name': 'fresh'})
+    assert [a['plan_name'] for a in storage.load_approvals(guild_id=5)] == ['fresh', 'legacy']
+    edits = storage.query_audit(kind='template_*')
+    assert len(edits) == 1 and edits[0]['template'] == 't' and edits[0]['user_id'] == 8
+
+
+def test_parse_filters():
+    f = parse_filters(['user:<@123>', 'plan:my-plan', 'kind:template', 'since:2024-01-01'])
+    assert f['user_id'] == 123 and f['plan_name'] == 'my-plan' and f['kind'] == 'template_*'
+    assert f['since'] == 1704067200.0
+    with pytest.raises(commands.BadArgument):
+        parse_filters(['colour:red'])
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.conditor.core.persistence.archive import SnapshotArchive
+from src.conditor.core.persistence.scheduler import (
+    ApiBudget,
+    BackupScheduler,
+    TIMESTAMP_FORMAT,
+    guild_backup_dir,
+    list_snapshots,
+)
+
+
+class FakeGuild:
+    def __init__(self, gid):
+        self.id = gid
+        self.name = f"guild-{gid}"
+        self.roles = []
+        self.categories = []
+        self.channels = []
+        self.text_channels = []
+
+
+class FakeBot:
+    def __init__(self, guilds):
+        self._guilds = {g.id: g for g in guilds}
+
+    def get_guild(self, gid):
+        return self._guilds.get(gid)
+
+
+@pytest.mark.asyncio
+async def test_run_once_snapshots_due_guilds_and_respects_min_interval(tmp_path):
+    bot = FakeBot([FakeGuild(1), FakeGuild(2)])
+    sched = BackupScheduler(bot, lambda: [1, 2, 3], backup_dir=tmp_path, jitter=0, min_interval=3600)
+
+    written = await sched.run_once()
+    assert len(written) == 2
+    with SnapshotArchive(written[0]) as arc:
+        assert arc.to_plan().steps[-1].type.value == 'register_metadata'
+
+    # second pass inside the minimum interval is a no-op
+    assert await sched.run_once() == []
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap(tmp_path, monkeypatch):
+    active = 0
+    peak = 0
+
+    async def slow_snapshot(guild, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        from src.conditor.core.planner.models import BuildPlan
+        return BuildPlan(name=f"backup-{guild.id}")
+
+    monkeypatch.setattr('src.conditor.core.persistence.scheduler.snapshot_guild_to_plan_async', slow_snapshot)
+    guilds = [FakeGuild(i) for i in range(1, 7)]
+    sched = BackupScheduler(FakeBot(guilds), lambda: [g.id for g in guilds], backup_dir=tmp_path, jitter=0, max_concurrency=2)
+    written = await sched.run_once()
+    assert len(written) == 6
+    assert peak == 2
+
+
+def test_collect_garbage_by_count_and_age(tmp_path):
+    sched = BackupScheduler(FakeBot([]), lambda: [], backup_dir=tmp_path, keep=3, max_age=10 * 86400)
+    d = guild_backup_dir(5, tmp_path)
+    d.mkdir(parents=True)
+    now = datetime.now(timezone.utc)
+    for days in (40, 5, 4, 3, 2, 1):
+        ts = (now - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+        (d / f"snapshot_{ts}.cnda").write_text("{}", encoding='utf-8')
+
+    removed = sched.collect_garbage(5)
+    assert len(removed) == 3
+    remaining = list_snapshots(5, tmp_path)
+    assert len(remaining) == 3
+    assert all(now - ts < timedelta(days=4) for ts, _ in remaining)
+
+
+@pytest.mark.asyncio
+async def test_api_budget_waits_for_refill():
+    budget = ApiBudget(calls=10, window=0.2)
+    await budget.acquire(10)
+    start = time.monotonic()
+    await budget.acquire(5)
+    assert time.monotonic() - start >= 0.08
@@ -0,0 +1,32 @@
+import pytest
+
+from src.conditor.benchmarks import BENCHMARKS, compare, regressions, run_benchmarks
+
+
+@pytest.mark.asyncio
+async def test_quick_suite_runs_every_benchmark(tmp_path):
+    results = await run_benchmarks(repeat=1, quick=True, workdir=tmp_path)
+    assert set(results['results']) == set(BENCHMARKS)
+    for name, result in results['results'].items():
+        assert result['seconds'] > 0 and len(result['runs']) == 1, name
+    assert results['results']['execute_simulated']['metrics']['failed_steps'] == 0
+    assert results['results']['backup_restore_roundtrip']['metrics']['failed_steps'] == 0
+    assert results['config'] == {'quick': True, 'repeat': 1}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {'results': {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}, 'c': {'seconds': 1.0}, 'tiny': {'seconds': 0.001}}}
+    current = {'results': {'a': {'seconds': 1.2}, 'b': {'seconds': 1.5}, 'c': {'seconds': 0.5}, 'tiny': {'seconds': 0.003}, 'new': {'seconds': 1.0}}}
+    result = compare(current, baseline, threshold=0.25)
+    assert {name: entry['status'] for name, entry in result.items()} == {
+        'a': 'ok', 'b': 'regressed', 'c': 'improved', 'tiny': 'ok', 'new': 'new',
+    }
+    assert result['b']['ratio'] == 1.5
+    assert regressions(result) == ['b']
+
+
+@pytest.mark.asyncio
+async def test_unknown_benchmark_is_rejected():
+    with pytest.raises(KeyError):
+        await run_benchmarks(['nope'], repeat=1, quick=True)
@@ -0,0 +1,47 @@
+import discord
+import pytest
+
+from src.conditor.cache_policy import PROFILES, CachePolicy, policy_from_env
+
+ENV = ('CONDITOR_CACHE_PROFILE', 'CONDITOR_MEMBERS_INTENT', 'CONDITOR_MEMBER_CACHE',
+       'CONDITOR_CHUNK_AT_STARTUP', 'CONDITOR_MAX_MESSAGES', 'CONDITOR_MESSAGE_CONTENT')
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_default_is_low_memory():
+    policy = policy_from_env()
+    assert policy == PROFILES['low']
+    kwargs = policy.client_kwargs()
+    assert kwargs['intents'].members is False
+    assert kwargs['intents'].message_content is True
+    assert kwargs['member_cache_flags'].value == discord.MemberCacheFlags.none().value
+    assert kwargs['chunk_guilds_at_startup'] is False
+    assert kwargs['max_messages'] == 100
+    # the client accepts the combination without complaining
+    discord.Client(**kwargs)
+
+
+def test_full_profile_and_overrides(monkeypatch):
+    monkeypatch.setenv('CONDITOR_CACHE_PROFILE', 'full')
+    policy = policy_from_env()
+    assert policy.client_kwargs()['member_cache_flags'].joined
+    monkeypatch.setenv('CONDITOR_MAX_MESSAGES', '0')
+    monkeypatch.setenv('CONDITOR_MEMBERS_INTENT', '0')
+    policy = policy_from_env()
+    assert policy.member_cache == 'none' and not policy.chunk_guilds_at_startup
+    assert policy.client_kwargs()['max_messages'] is None
+
+
+def test_invalid_combinations_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        CachePolicy(member_cache='joined')
+    with pytest.raises(ValueError):
+        CachePolicy(chunk_guilds_at_startup=True)
+    monkeypatch.setenv('CONDITOR_CACHE_PROFILE', 'huge')
+    with pytest.raises(ValueError):
+        policy_from_env()
@@ -0,0 +1,95 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+from src.conditor.circuit_breaker import BreakerRegistry, CircuitBreaker
+from src.conditor.core.executor.worker import Executor
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+
+
+def forbidden():
+    resp = types.SimpleNamespace(status=403, reason='Forbidden', headers={})
+    return discord.Forbidden(resp, {'code': 50013, 'message': 'Missing Permissions'})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_and_half_opens_after_cooldown():
+    clock = FakeClock()
+    b = CircuitBreaker(threshold=2, cooldown=10, clock=clock)
+    b.record_failure(forbidden())
+    assert b.allow()
+    b.record_failure(forbidden())
+    assert b.state == CircuitBreaker.OPEN and not b.allow()
+
+    clock.now = 11
+    assert b.allow()          # single trial call
+    assert not b.allow()
+    b.record_failure(forbidden())
+    assert b.state == CircuitBreaker.OPEN
+
+    clock.now = 30
+    assert b.allow()
+    b.record_success()
+    assert b.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_executor_fails_fast_once_route_is_open(tmp_path):
+    plan = BuildPlan(name='no-perms')
+    for i in range(5):
+        plan.add_step(BuildStep(id=f'cat{i}', type=StepType.CREATE_CATEGORY, payload={'name': f'Cat{i}'}, estimated_delay=0.0))
+    plan.add_step(BuildStep(id='chan', type=StepType.CREATE_CHANNEL, payload={'name': 'general', 'category': 'Cat0'}, estimated_delay=0.0))
+    plan.add_step(BuildStep(id='role', type=StepType.CREATE_ROLE, payload={'name': 'Member'}, estimated_delay=0.0))
+    calls = []
+
+    async def handler(step):
+        calls.append(step.id)
+        if step.type == StepType.CREATE_CATEGORY:
+            raise forbidden()
+        return {'ok': True}
+
+    registry = BreakerRegistry(threshold=2, cooldown=300)
+    state = await Executor(storage_dir=tmp_path, breakers=registry).run_plan(plan, handler, resume=False, guild_id=7)
+
+    # two permission failures trip the channels route; the rest never reach Discord
+    assert calls == ['cat0', 'cat1', 'role']
+    steps = state['steps']
+    assert steps['cat2']['error_class'] == 'circuit_open'
+    assert 'Missing Permissions' in steps['cat4']['error']
+    assert steps['chan']['error_class'] == 'dependency_failed'
+    assert steps['role']['status'] == 'success'
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_trial_frees_the_slot(tmp_path):
+    clock = FakeClock()
+    registry = BreakerRegistry(threshold=1, cooldown=10, clock=clock)
+    registry.trip(7, 'roles', 'Missing Permissions')
+    clock.now = 11
+    plan = BuildPlan(name='trial')
+    plan.add_step(BuildStep(id='role', type=StepType.CREATE_ROLE, payload={'name': 'Member'}, estimated_delay=0.0))
+    started = asyncio.Event()
+
+    async def handler(step):
+        started.set()
+        await asyncio.sleep(30)
+
+    task = asyncio.create_task(Executor(storage_dir=tmp_path, breakers=registry).run_plan(plan, handler, resume=False, guild_id=7))
+    await started.wait()
+    breaker = registry.get(7, 'roles')
+    assert breaker.state == CircuitBreaker.HALF_OPEN and not breaker.allow()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
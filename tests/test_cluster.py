@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from src.conditor.cluster import ClusterConfig, ClusterRouter, JobQueue, shard_for_guild
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+
+
+def guild_on_shard(shard, shard_count, n=0):
+    return ((shard + n * shard_count) << 22) | 12345
+
+
+def make_item(guild_id):
+    plan = BuildPlan(name=f'build-{guild_id}', meta={'template': {'name': 't', 'version': 2}})
+    plan.add_step(BuildStep(id='r1', type=StepType.CREATE_ROLE, payload={'name': 'Mod'}))
+    return {'type': 'plan', 'plan': plan, 'dry_run': False, 'guild_id': guild_id, 'reporter': object()}
+
+
+def test_shard_ranges_cover_every_shard_once():
+    configs = [ClusterConfig(cluster_id=i, cluster_count=3, shard_count=8) for i in range(3)]
+    owned = [s for c in configs for s in c.shard_ids]
+    assert sorted(owned) == list(range(8))
+    assert configs[0].client_kwargs() == {'shard_count': 8, 'shard_ids': configs[0].shard_ids}
+    for shard in range(8):
+        gid = guild_on_shard(shard, 8)
+        assert shard_for_guild(gid, 8) == shard
+        owners = [c.cluster_id for c in configs if c.owns_guild(gid)]
+        assert owners == [configs[0].cluster_for_guild(gid)]
+        assert shard in configs[owners[0]].shard_ids
+
+
+def test_invalid_configs():
+    with pytest.raises(ValueError):
+        ClusterConfig(cluster_id=0, cluster_count=2)
+    with pytest.raises(ValueError):
+        ClusterConfig(cluster_id=2, cluster_count=2, shard_count=4)
+    assert ClusterConfig().client_kwargs() == {}
+
+
+@pytest.mark.asyncio
+async def test_router_keeps_owned_guilds_local(tmp_path):
+    config = ClusterConfig(cluster_id=0, cluster_count=2, shard_count=2, queue_path=tmp_path / 'q.db')
+    queue = JobQueue(config.queue_path)
+    local = []
+
+    async def put(item):
+        local.append(item)
+
+    router = ClusterRouter(config, put, queue)
+    assert await router.submit(make_item(guild_on_shard(0, 2))) == 0
+    assert await router.submit(make_item(guild_on_shard(1, 2))) == 1
+    assert len(local) == 1
+    job = queue.claim(1)
+    assert job.guild_id == guild_on_shard(1, 2)
+    assert job.payload['plan']['meta']['template']['version'] == 2
+    assert 'reporter' not in job.payload
+    assert queue.claim(1) is None
+    assert queue.release_claims(1) == 1
+    assert queue.claim(1).id == job.id
+
+
+def _cluster_process(cluster_id, path, expected):
+    async def main():
+        config = ClusterConfig(cluster_id=cluster_id, cluster_count=3, shard_count=6, queue_path=path)
+        router = ClusterRouter(config, None, JobQueue(path))
+        stop = asyncio.Event()
+        handled = []
+
+        async def run(item):
+            # stand-in for the build worker
+            assert config.owns_guild(item['guild_id'])
+            assert item['plan'].steps[0].type is StepType.CREATE_ROLE
+            handled.append(item['guild_id'])
+            await router.complete(item)
+            if len(handled) == expected:
+                stop.set()
+
+        router.local_put = run
+        await asyncio.wait_for(router.poll(interval=0.02, stop=stop), 30)
+
+    asyncio.run(main())
+
+
+def test_jobs_routed_to_owning_processes(tmp_path):
+    path = tmp_path / 'cluster.db'
+    config = ClusterConfig(cluster_id=0, cluster_count=3, shard_count=6, queue_path=path)
+    queue = JobQueue(path)
+    local = []
+
+    async def put(item):
+        local.append(item['guild_id'])
+
+    router = ClusterRouter(config, put, queue)
+    guilds = [guild_on_shard(shard, 6, n) for shard in range(6) for n in range(5)]
+    expected = {cid: sum(1 for g in guilds if config.cluster_for_guild(g) == cid) for cid in (1, 2)}
+
+    ctx = multiprocessing.get_context('spawn')
+    procs = [ctx.Process(target=_cluster_process, args=(cid, path, expected[cid])) for cid in (1, 2)]
+    for p in procs:
+        p.start()
+
+    async def produce():
+        for gid in guilds:
+            await router.submit(make_item(gid))
+
+    asyncio.run(produce())
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    assert sorted(local) == sorted(g for g in guilds if config.owns_guild(g))
+    assert queue.counts(1) == {'done': expected[1]}
+    assert queue.counts(2) == {'done': expected[2]}
@@ -0,0 +1,80 @@
+import discord
+import pytest
+from discord import app_commands
+
+from src.conditor import command_sync, storage
+
+
+def make_tree(calls):
+    client = discord.Client(intents=discord.Intents.none(), application_id=42)
+    tree = app_commands.CommandTree(client)
+
+    async def fake_sync(*, guild=None):
+        calls.append(guild.id if guild else None)
+        return []
+
+    tree.sync = fake_sync
+
+    @tree.command(name='ping', description='Ping')
+    async def ping(interaction: discord.Interaction):
+        pass
+
+    return tree
+
+
+@pytest.mark.asyncio
+async def test_sync_only_when_tree_changes(db):
+    storage.init_db()
+    calls = []
+    tree = make_tree(calls)
+    assert await command_sync.sync_commands(tree) is True
+    assert await command_sync.sync_commands(tree) is False
+
+    guild = discord.Object(id=7)
+    tree.copy_global_to(guild=guild)
+    assert await command_sync.sync_commands(tree, guild=guild) is True
+    assert await command_sync.sync_commands(tree, guild=guild) is False
+
+    @tree.command(name='pong', description='Pong')
+    async def pong(interaction: discord.Interaction):
+        pass
+
+    assert await command_sync.sync_commands(tree) is True
+    assert await command_sync.sync_commands(tree, force=True) is True
+    assert calls == [None, 7, None, None]
+
+
+@pytest.mark.asyncio
+async def test_hash_is_stable_across_registration_order(db):
+    storage.init_db()
+    a, b = make_tree([]), make_tree([])
+
+    @a.command(name='zeta', description='z')
+    async def zeta_a(interaction: discord.Interaction):
+        pass
+
+    b.remove_command('ping')
+
+    @b.command(name='zeta', description='z')
+    async def zeta_b(interaction: discord.Interaction):
+        pass
+
+    @b.command(name='ping', description='Ping')
+    async def ping_b(interaction: discord.Interaction):
+        pass
+
+    assert command_sync.tree_hash(a) == command_sync.tree_hash(b)
+    assert command_sync.tree_hash(a) != command_sync.tree_hash(a, guild=discord.Object(id=1))
+
+
+def test_payload_supports_to_dict_without_tree():
+    # discord.py 2.3 commands serialize without the tree argument
+    class OldCommand:
+        def to_dict(self):
+            return {'name': 'legacy', 'type': 1}
+
+    class Tree:
+        def get_commands(self, guild=None):
+            return [OldCommand()]
+
+    assert command_sync.tree_payload(Tree()) == [{'name': 'legacy', 'type': 1}]
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from src.conditor import data_snapshot, i18n
+from src.conditor.data_snapshot import Snapshot, compile_snapshot, is_fresh, load_snapshot, read_snapshot, write_snapshot
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / 'data'
+    (d / 'templates').mkdir(parents=True)
+    (d / 'locales').mkdir()
+    (d / 'questionnaire').mkdir()
+    (d / 'templates' / 'club.json').write_text(json.dumps({'meta': {'name': 'club'}, 'roles': [{'name': 'Member'}]}), encoding='utf-8')
+    (d / 'locales' / 'en.json').write_text(json.dumps({'hello': 'Hello {name}'}), encoding='utf-8')
+    (d / 'locales' / 'de.json').write_text(json.dumps({'hello': 'Hallo {name}'}), encoding='utf-8')
+    return d
+
+
+@pytest.fixture(autouse=True)
+def reset_current(monkeypatch):
+    monkeypatch.setattr(data_snapshot, '_current', None)
+    i18n.Localizer.clear_cache()
+    yield
+    i18n.Localizer.clear_cache()
+
+
+def test_roundtrip_and_freshness(data_dir, tmp_path):
+    snap = compile_snapshot(data_dir)
+    assert set(snap.templates) == {'club'} and set(snap.locales) == {'en', 'de'}
+    assert {'auto', 'club'} <= set(snap.plans)
+    assert snap.plan('club').steps
+
+    path = tmp_path / 'startup.snapshot'
+    write_snapshot(snap, path)
+    loaded = read_snapshot(path)
+    assert loaded.from_cache and loaded.source_hash == snap.source_hash
+    assert loaded.templates == snap.templates
+    assert is_fresh(loaded, data_dir)
+
+    # a touch without a content change keeps it fresh (content hash matches)
+    tpl = data_dir / 'templates' / 'club.json'
+    os.utime(tpl, ns=(tpl.stat().st_atime_ns, tpl.stat().st_mtime_ns + 10**9))
+    assert is_fresh(loaded, data_dir)
+    tpl.write_text(json.dumps({'meta': {'name': 'club2'}}), encoding='utf-8')
+    assert not is_fresh(loaded, data_dir)
+    # so does a new source file
+    current = compile_snapshot(data_dir)
+    (data_dir / 'locales' / 'es.json').write_text('{}', encoding='utf-8')
+    assert not is_fresh(current, data_dir)
+
+
+def test_corrupt_or_foreign_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'startup.snapshot'
+    path.write_bytes(b'not a snapshot')
+    assert read_snapshot(path) is None
+    path.write_bytes(data_snapshot._header() + b'\x00garbage')
+    assert read_snapshot(path) is None
+    assert read_snapshot(tmp_path / 'missing') is None
+
+
+def test_load_falls_back_to_json_and_serves_localizer(data_dir, tmp_path):
+    path = tmp_path / 'startup.snapshot'
+    snap = load_snapshot(path, data_dir, rebuild=False)
+    assert not snap.from_cache and data_snapshot.current() is snap
+    assert not path.exists()
+    assert i18n.Localizer('de-DE').get('hello', name='Ada') == 'Hallo Ada'
+
+    write_snapshot(snap, path)
+    again = load_snapshot(path, data_dir, rebuild=False)
+    assert again.from_cache and again.source_hash == snap.source_hash
+    assert isinstance(again, Snapshot)
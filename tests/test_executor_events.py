@@ -0,0 +1,82 @@
+import types
+
+import discord
+import pytest
+
+from src.conditor.core.executor import Executor
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+
+
+def http_error(status, code=0):
+    resp = types.SimpleNamespace(status=status, reason='test', headers={})
+    return discord.HTTPException(resp, {'code': code, 'message': 'boom'})
+
+
+def make_plan(name='events-plan'):
+    plan = BuildPlan(name=name)
+    plan.add_step(BuildStep(id='a', type=StepType.CREATE_ROLE, payload={}, retry_policy={'retries': 2, 'base_delay': 0.001, 'max_delay': 0.001}, estimated_delay=0.0))
+    plan.add_step(BuildStep(id='b', type=StepType.CREATE_ROLE, payload={}, estimated_delay=0.0))
+    return plan
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_events_are_emitted_in_order(tmp_path):
+    plan = make_plan()
+    calls = {'a': 0}
+
+    async def handler(step):
+        if step.id == 'a':
+            calls['a'] += 1
+            if calls['a'] == 1:
+                raise http_error(502)
+            return 'ok'
+        raise http_error(403, 50013)
+
+    executor = Executor(storage_dir=tmp_path)
+    seen = []
+    for name in ('step_started', 'step_succeeded', 'step_retried', 'step_failed', 'plan_finished'):
+        executor.subscribe(name, seen.append)
+
+    await executor.run_plan(plan, handler, resume=False)
+    assert [(e.name, e.step.id if e.step else None) for e in seen] == [
+        ('step_started', 'a'),
+        ('step_retried', 'a'),
+        ('step_succeeded', 'a'),
+        ('step_started', 'b'),
+        ('step_failed', 'b'),
+        ('plan_finished', None),
+    ]
+    retried, succeeded, failed = seen[1], seen[2], seen[4]
+    assert retried.error_class == 'server' and retried.delay is not None
+    assert succeeded.attempt == 2 and succeeded.result == 'ok' and succeeded.elapsed >= 0
+    assert failed.error_class == 'permanent' and isinstance(failed.error, discord.HTTPException)
+    assert seen[-1].state['steps']['b']['status'] == 'failed'
+
+
+@pytest.mark.asyncio
+async def test_plan_filter_unsubscribe_and_failing_hook(tmp_path):
+    executor = Executor(storage_dir=tmp_path)
+    plan, other = make_plan('p1'), make_plan('p2')
+    seen = []
+
+    async def record(event):
+        seen.append(event.plan.name)
+
+    def broken(event):
+        raise RuntimeError('hook bug')
+
+    unsubscribe = executor.subscribe('plan_finished', record, plan=plan)
+    executor.subscribe('step_started', broken)
+
+    async def handler(step):
+        return None
+
+    await executor.run_plan(other, handler, resume=False)
+    await executor.run_plan(plan, handler, resume=False)
+    assert seen == ['p1']
+
+    unsubscribe()
+    await executor.run_plan(plan, handler, resume=False)
+    assert seen == ['p1']
+    with pytest.raises(ValueError):
+        executor.subscribe('nope', record)
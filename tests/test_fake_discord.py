@@ -0,0 +1,124 @@
+import pytest
+
+from src.conditor.core.executor import Executor
+from src.conditor.core.executor.discord_handler import make_discord_handler
+from src.conditor.core.persistence.backup import snapshot_guild_to_plan_async
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+from src.conditor.fake_discord import ERROR_MAX_ROLES, FakeDiscord, SimConfig
+from src.conditor.rate_limiter import RateLimiter
+from src.conditor.retry import ErrorClass, classify_error, retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fast_plan():
+    plan = BuildPlan(name='fake-plan')
+    steps = [
+        BuildStep(id='r1', type=StepType.CREATE_ROLE, payload={'name': 'Mods', 'color': '#ff0000'}),
+        BuildStep(id='c1', type=StepType.CREATE_CATEGORY, payload={'name': 'Info'}),
+        BuildStep(id='ch1', type=StepType.CREATE_CHANNEL, payload={'name': 'rules', 'category': 'c1', 'overwrites': {'r1': {'allow': ['view_channel'], 'deny': ['send_messages']}}}),
+        BuildStep(id='ch2', type=StepType.CREATE_CHANNEL, payload={'name': 'lounge', 'type': 'voice', 'category': 'Info'}),
+        BuildStep(id='m1', type=StepType.POST_MESSAGE, payload={'channel': 'ch1', 'content': 'hello'}),
+    ]
+    for step in steps:
+        step.estimated_delay = 0.0
+        plan.add_step(step)
+    return plan
+
+
+@pytest.mark.asyncio
+async def test_handler_builds_plan_against_fake_guild(tmp_path):
+    backend = FakeDiscord(SimConfig(latency=0.001))
+    guild = backend.guild()
+    state = await Executor(storage_dir=tmp_path).run_plan(fast_plan(), make_discord_handler(None, guild), resume=False)
+    assert all(s['status'] == 'success' for s in state['steps'].values())
+    rules = next(c for c in guild.text_channels if c.name == 'rules')
+    assert rules.category.name == 'Info' and rules.messages[0].content == 'hello'
+    mods = next(r for r in guild.roles if r.name == 'Mods')
+    assert mods.colour.value == 0xFF0000
+    assert rules.overwrites[mods].send_messages is False
+    assert [c.name for c in guild.voice_channels] == ['lounge']
+    stats = backend.stats()
+    assert stats['calls']['create_channel'] == 3 and stats['api_seconds'] == pytest.approx(0.001 * sum(stats['calls'].values()))
+
+
+@pytest.mark.asyncio
+async def test_buckets_return_429_with_retry_after():
+    clock = FakeClock()
+    backend = FakeDiscord(SimConfig(buckets={'create_role': (2, 10.0)}), clock=clock)
+    guild = backend.guild()
+    await guild.create_role(name='a')
+    await guild.create_role(name='b')
+    clock.now = 4.0
+    with pytest.raises(Exception) as info:
+        await guild.create_role(name='c')
+    assert classify_error(info.value) == ErrorClass.RATE_LIMITED
+    assert retry_after(info.value) == pytest.approx(6.0)
+    assert backend.rate_limited['create_role'] == 1
+    # another guild has its own bucket; the window resets after `per`
+    await backend.guild().create_role(name='c')
+    clock.now = 10.0
+    await guild.create_role(name='c')
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_retries_through_429s():
+    backend = FakeDiscord(SimConfig(buckets={'create_role': (3, 0.05)}, global_bucket=None))
+    guild = backend.guild()
+    limiter = RateLimiter()
+    for i in range(7):
+        await limiter.run(guild.id, guild.create_role, name=f'r{i}')
+    assert len([r for r in guild.roles if r.name.startswith('r')]) == 7
+    assert backend.rate_limited['create_role'] >= 2
+
+
+@pytest.mark.asyncio
+async def test_resource_limits_use_discord_error_codes():
+    backend = FakeDiscord(SimConfig(buckets={}, global_bucket=None, max_roles=5, max_channels_per_category=1))
+    guild = backend.guild()
+    while len(guild.roles) < 5:
+        await guild.create_role(name='x')
+    with pytest.raises(Exception) as info:
+        await guild.create_role(name='y')
+    assert info.value.code == ERROR_MAX_ROLES and classify_error(info.value) == ErrorClass.CLIENT
+    category = await guild.create_category('full')
+    await guild.create_text_channel('one', category=category)
+    with pytest.raises(Exception):
+        await guild.create_text_channel('two', category=category)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_of_synthetic_guild():
+    backend = FakeDiscord(SimConfig(buckets={}, global_bucket=None))
+    guild = backend.guild().populate(categories=10, channels_per_category=49, roles=5, messages_per_channel=2)
+    plan = await snapshot_guild_to_plan_async(guild, messages_per_channel=2)
+    channels = [s for s in plan.steps if s.type == StepType.CREATE_CHANNEL]
+    # categories are snapshotted once, as categories
+    assert len(channels) == 490
+    assert len([s for s in plan.steps if s.type == StepType.CREATE_CATEGORY]) == 10
+    kinds = {s.payload['type'] for s in channels}
+    assert kinds == {'text', 'voice'}
+    assert any('overwrites' in s.payload for s in channels)
+    messages = [s for s in plan.steps if s.type == StepType.POST_MESSAGE]
+    text_channels = len(guild.text_channels)
+    assert len(messages) == 2 * text_channels and messages[0].payload['content'].startswith('message 0')
+    assert backend.calls['history'] == text_channels
+
+
+def test_latency_is_deterministic_for_a_seed():
+    import asyncio
+
+    async def run(seed):
+        backend = FakeDiscord(SimConfig(jitter=0.002, seed=seed, buckets={}, global_bucket=None))
+        guild = backend.guild()
+        for i in range(5):
+            await guild.create_role(name=str(i))
+        return backend.api_seconds
+
+    assert asyncio.run(run(1)) == asyncio.run(run(1)) != asyncio.run(run(2))
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.conditor.file_writer import FileWriter
+
+
+@pytest.mark.asyncio
+async def test_writes_run_off_loop_in_order(tmp_path):
+    writer = FileWriter(maxsize=4, fsync='never')
+    target = tmp_path / 'log.txt'
+    threads = set()
+
+    def record_thread():
+        threads.add(threading.get_ident())
+
+    await asyncio.gather(*(writer.append(target, f'{i}\n') for i in range(20)))
+    await writer.submit(record_thread)
+    await writer.write_atomic(tmp_path / 'state.json', '{"a": 1}')
+    writer.close()
+
+    assert target.read_text().split() == [str(i) for i in range(20)]
+    assert (tmp_path / 'state.json').read_text() == '{"a": 1}'
+    assert not (tmp_path / 'state.json.tmp').exists()
+    assert threads and threading.get_ident() not in threads
+    assert writer.completed == 22
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_full_queue_applies_backpressure(tmp_path):
+    writer = FileWriter(maxsize=1, fsync='never')
+    gate = threading.Event()
+
+    def boom():
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        await writer.submit(boom)
+
+    blocked = asyncio.ensure_future(writer.submit(gate.wait))
+    queued = [asyncio.ensure_future(writer.append(tmp_path / 'x', 'y')) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    # the loop stays responsive while submitters wait for room
+    assert not blocked.done() and writer.pending() <= 1
+    gate.set()
+    await asyncio.gather(blocked, *queued)
+    writer.close()
+    assert (tmp_path / 'x').read_text() == 'yyy'
+    assert writer.failed == 1
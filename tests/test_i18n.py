@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+from src.conditor import data_snapshot, i18n
+from src.conditor.i18n import LocaleRegistry, Localizer, compile_message, fallback_chain
+
+
+@pytest.fixture
+def locales(tmp_path, monkeypatch):
+    base = tmp_path / 'locales'
+    base.mkdir()
+    bundles = {
+        'en': {'hello': 'Hello {name}', 'bye': 'Bye', 'items.one': '{n} item', 'items.other': '{n} items'},
+        'en_GB': {'hello': 'Hiya {name}'},
+        'de': {'hello': 'Hallo {name}'},
+    }
+    for code, data in bundles.items():
+        (base / f'{code}.json').write_text(json.dumps(data), encoding='utf-8')
+    monkeypatch.setattr(i18n, 'BASE', base)
+    monkeypatch.setattr(data_snapshot, '_current', None)
+    Localizer.clear_cache()
+    yield base
+    Localizer.clear_cache()
+
+
+def test_keys_fall_back_per_key_to_english(locales):
+    de = Localizer('de')
+    assert de.get('hello', name='Ada') == 'Hallo Ada'
+    assert de.get('bye') == 'Bye'
+    assert de.get('missing.key') == 'missing.key'
+    gb = Localizer('en-GB')
+    assert gb.compiled.chain == ['en_gb', 'en']
+    assert gb.get('hello', name='Ada') == 'Hiya Ada'
+    assert Localizer('de').get_plural('items', 2) == '2 items'
+
+
+def test_cache_is_bounded_by_supported_locales(locales):
+    for code in ('de-DE', 'de-AT', 'fr', 'pt-BR', 'xx', 'EN_gb', 'en-US'):
+        Localizer(code)
+    assert set(Localizer.registry.generation.compiled) <= set(Localizer.supported_locales())
+    assert fallback_chain('fr-CA', ['de', 'en']) == ['en']
+
+
+@pytest.mark.parametrize('source', ['plain', '100% {a}', '{a}', '{a}-{b}!', '{a:>6}|{b!r}', '{{literal}} {a}', '{a:.2f}', '{0}', '{a[0]}'])
+def test_compiled_messages_match_str_format(source):
+    kwargs = {'a': 3.14159, 'b': 'x'} if '[' not in source else {'a': 'xyz'}
+    if source == '{0}':
+        with pytest.raises(Exception):
+            compile_message(source)(kwargs)
+        return
+    assert compile_message(source)(kwargs) == source.format(**kwargs)
+
+
+def test_bad_kwargs_return_template(locales):
+    assert Localizer('en').get('hello', other=1) == 'Hello {name}'
+
+
+def _rewrite(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    st = path.stat()
+    # make sure the mtime moves even on coarse-grained filesystems
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_registry_hot_reload_swaps_atomically(locales):
+    registry = LocaleRegistry(locales)
+    Localizer.registry = registry
+    try:
+        before = Localizer('de')
+        assert registry.check() is False
+        _rewrite(locales / 'de.json', {'hello': 'Servus {name}', 'bye': 'Tschuess'})
+        assert registry.check() is True
+        after = Localizer('de')
+        # a localizer created before the reload keeps its view
+        assert before.get('hello', name='Ada') == 'Hallo Ada' and before.get('bye') == 'Bye'
+        assert after.get('hello', name='Ada') == 'Servus Ada' and after.get('bye') == 'Tschuess'
+        assert registry.version == 2
+
+        # a broken file keeps the previous content until it is fixed
+        (locales / 'de.json').write_text('{broken', encoding='utf-8')
+        registry.check()
+        assert Localizer('de').get('bye') == 'Tschuess'
+
+        # new bundles become supported locales
+        _rewrite(locales / 'fr.json', {'hello': 'Bonjour {name}'})
+        registry.check()
+        assert Localizer('fr-CA').get('hello', name='Ada') == 'Bonjour Ada'
+    finally:
+        Localizer.registry = i18n.locale_registry
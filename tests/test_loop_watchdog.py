@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+from src.conditor.loop_watchdog import LoopWatchdog
+
+
+def blocking_helper(seconds):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_attributed_to_its_stack():
+    dog = LoopWatchdog(interval=0.02, threshold=0.05)
+    dog.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_helper(0.3)
+        await asyncio.sleep(0.1)
+    finally:
+        await dog.stop()
+
+    assert dog.stalls >= 1
+    assert dog.max_lag >= 0.2
+    worst = dog.report(1)[0]
+    assert 'blocking_helper' in worst.site
+    assert worst.worst >= 0.2
+    assert any('blocking_helper' in line for line in worst.stack)
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_records_no_stalls():
+    dog = LoopWatchdog(interval=0.01, threshold=0.2)
+    dog.start()
+    await asyncio.sleep(0.1)
+    await dog.stop()
+    assert dog.stalls == 0 and not dog.offenders
+    assert not dog.running
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.conditor import metrics, request_scheduler, storage  # noqa: F401 (registers scheduler gauges)
+from src.conditor.core.executor import Executor
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+from src.conditor.metrics import MetricsServer, Registry
+
+
+async def scrape(port, path='/metrics'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.decode().partition('\r\n\r\n')
+    return head.split('\r\n')[0], body
+
+
+def test_text_exposition_format():
+    reg = Registry()
+    c = reg.counter('jobs_total', 'Jobs.', ['kind'])
+    c.inc(kind='a')
+    c.inc(2, kind='say "hi"')
+    g = reg.gauge('depth', 'Depth.')
+    g.set_function(lambda: 7)
+    h = reg.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(5)
+    text = reg.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="a"} 1' in text
+    assert 'jobs_total{kind="say \\"hi\\""} 2' in text
+    assert 'depth 7' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    with pytest.raises(ValueError):
+        c.inc(kind='a', extra='x')
+    with pytest.raises(ValueError):
+        reg.gauge('jobs_total', 'clash')
+
+
+@pytest.mark.asyncio
+async def test_scrape_after_build_and_storage_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'DB_PATH', tmp_path / 'storage.db')
+    storage.init_db()
+    storage.list_templates()
+
+    plan = BuildPlan(name='metrics-plan')
+    for i in range(3):
+        plan.add_step(BuildStep(id=f'r{i}', type=StepType.CREATE_ROLE, payload={}, estimated_delay=0.0))
+    executor = Executor(storage_dir=tmp_path)
+    detach = metrics.instrument_executor(executor)
+    before = metrics.BUILD_STEPS.value(type='create_role', status='success')
+
+    async def handler(step):
+        return None
+
+    await executor.run_plan(plan, handler, resume=False)
+    detach()
+
+    server = MetricsServer(port=0)
+    await server.start()
+    try:
+        status, body = await scrape(server.port)
+        missing, _ = await scrape(server.port, '/nope')
+    finally:
+        await server.stop()
+
+    assert status.endswith('200 OK')
+    assert missing.endswith('404 Not Found')
+    assert metrics.BUILD_STEPS.value(type='create_role', status='success') == before + 3
+    assert 'conditor_build_duration_seconds_count' in body
+    assert 'conditor_storage_call_seconds_count{op="list_templates"}' in body
+    assert 'conditor_scheduler_waiting{priority="bulk"} 0' in body
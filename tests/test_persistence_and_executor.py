@@ -7,7 +7,7 @@ import pytest
 
 from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
 from src.conditor.core.executor.worker import Executor, default_noop_handler
-from src.conditor.core.persistence.backup import export_plan, import_plan
+from src.conditor.core.persistence.backup import export_plan, export_plan_async, import_plan
 
 
 def make_sample_plan():
@@ -29,6 +29,15 @@ def test_export_import_plan(tmp_path: Path):
     assert len(imported.steps) == len(plan.steps)
 
 
+
+@pytest.mark.asyncio
+async def test_export_plan_async(tmp_path: Path):
+    plan = make_sample_plan()
+    p = tmp_path / 'plan.json'
+    await export_plan_async(plan, p)
+    assert [s.id for s in import_plan(p).steps] == [s.id for s in plan.steps]
+
+
 @pytest.mark.asyncio
 async def test_executor_noop_runs():
     plan = make_sample_plan()
@@ -0,0 +1,46 @@
+import gzip
+import json
+
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+from src.conditor.core.planner.preview import MESSAGE_LIMIT, PlanPreview
+
+
+def make_plan(n=200):
+    plan = BuildPlan(name="big plan")
+    types = [StepType.CREATE_ROLE, StepType.CREATE_CHANNEL, StepType.POST_MESSAGE]
+    for i in range(n):
+        plan.add_step(BuildStep(id=f"s{i}", type=types[i % 3], payload={"name": f"step-{i}", "content": "x" * 500}))
+    return plan
+
+
+def test_every_page_fits_the_message_limit():
+    preview = PlanPreview(make_plan(), title="Plan: " + "t" * 1000)
+    assert preview.page_count == 17
+    for page in range(preview.page_count):
+        text = preview.render_page(page)
+        assert len(text) <= MESSAGE_LIMIT
+        assert f"Page {page + 1}/17" in text
+    # out-of-range pages clamp to the last one
+    assert preview.render_page(99) == preview.render_page(16)
+
+
+def test_summary_groups_steps_by_type():
+    preview = PlanPreview(make_plan(10))
+    assert preview.counts() == {"create_role": 4, "create_channel": 3, "post_message": 3}
+    assert "create_role x4, create_channel x3, post_message x3" in preview.summary()
+    assert "(empty plan)" in PlanPreview(BuildPlan(name="empty")).render_page(0)
+
+
+def test_pages_render_lazily():
+    preview = PlanPreview(make_plan())
+    assert preview._pages == {}
+    preview.render_page(3)
+    assert list(preview._pages) == [3]
+    assert preview.render_page(3) is preview._pages[3]
+
+
+def test_full_plan_file_is_gzipped_json():
+    plan = make_plan(30)
+    f = PlanPreview(plan).full_plan_file()
+    assert f.filename == "bigplan.json.gz"
+    assert json.loads(gzip.decompress(f.fp.read())) == plan.to_dict()
@@ -0,0 +1,149 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+from src.conditor.cogs.builder import ProgressReporter
+from src.conditor.core.executor.worker import Executor
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+
+
+class FakeMessage:
+    def __init__(self, ctx, content, fail_edits=False):
+        self.ctx = ctx
+        self.content = content
+        self.fail_edits = fail_edits
+
+    async def edit(self, content):
+        if self.fail_edits:
+            raise discord.NotFound(types.SimpleNamespace(status=404, reason='gone', headers={}), 'Unknown Message')
+        self.ctx.edits.append(content)
+        self.content = content
+
+
+class FakeCtx:
+    def __init__(self, fail_edits=False):
+        self.channel = types.SimpleNamespace(id=55)
+        self.sent = []
+        self.edits = []
+        self.fail_edits = fail_edits
+
+    async def send(self, content):
+        self.sent.append(content)
+        msg = FakeMessage(self, content, self.fail_edits)
+        # only the first message refuses edits
+        self.fail_edits = False
+        return msg
+
+
+@pytest.mark.asyncio
+async def test_updates_are_coalesced_and_final_state_flushed():
+    ctx = FakeCtx()
+    reporter = ProgressReporter(ctx, interval=0.05)
+    await reporter.start('starting')
+    for i in range(50):
+        await reporter.update(f'step {i}')
+    await reporter.flush()
+    assert len(ctx.edits) <= 2
+    assert ctx.edits[-1] == 'step 49'
+    assert ctx.sent == ['starting']
+
+
+@pytest.mark.asyncio
+async def test_failed_edit_posts_single_replacement():
+    ctx = FakeCtx(fail_edits=True)
+    reporter = ProgressReporter(ctx, interval=0)
+    await reporter.start('starting')
+    for i in range(5):
+        await reporter.update(f'step {i}')
+        # let the background flush send each update
+        await asyncio.sleep(0.01)
+    await reporter.flush()
+    assert ctx.sent == ['starting', 'step 0']
+    assert ctx.edits[-1] == 'step 4'
+
+
+@pytest.mark.asyncio
+async def test_reporter_driven_by_executor(tmp_path):
+    plan = BuildPlan(name='progress-plan')
+    for i in range(10):
+        plan.add_step(BuildStep(id=f'c{i}', type=StepType.CREATE_CHANNEL, payload={'name': f'c{i}'}, estimated_delay=0.0))
+
+    async def handler(step):
+        return {'ok': True}
+
+    ctx = FakeCtx()
+    reporter = ProgressReporter(ctx, interval=10)
+    await reporter.start('starting')
+    executor = Executor(storage_dir=tmp_path)
+    detach = reporter.attach(executor, plan)
+    await executor.run_plan(plan, handler, resume=False)
+    detach()
+    await reporter.finish_task
+    assert not executor._subscribers
+    # the interval never elapsed: only the final state is written
+    assert len(ctx.edits) == 1
+    assert ctx.edits[0] == reporter.localizer.get('build_complete', roles=0, channels=10)
+
+
+def executor_plan(n=10):
+    plan = BuildPlan(name='slow-edit-plan')
+    for i in range(n):
+        plan.add_step(BuildStep(id=f'c{i}', type=StepType.CREATE_CHANNEL, payload={'name': f'c{i}'}, estimated_delay=0.0))
+    return plan
+
+
+async def ok_handler(step):
+    return {'ok': True}
+
+
+@pytest.mark.asyncio
+async def test_blocked_edit_does_not_delay_run_plan(tmp_path):
+    release = asyncio.Event()
+    ctx = FakeCtx()
+    reporter = ProgressReporter(ctx, interval=0)
+    await reporter.start('starting')
+    message = reporter.message
+
+    async def stuck_edit(content):
+        await release.wait()
+        ctx.edits.append(content)
+
+    message.edit = stuck_edit
+    executor = Executor(storage_dir=tmp_path)
+    plan = executor_plan()
+    detach = reporter.attach(executor, plan)
+    await asyncio.wait_for(executor.run_plan(plan, ok_handler, resume=False), 5)
+    detach()
+    assert ctx.edits == []
+    release.set()
+    await reporter.finish_task
+    assert ctx.edits[-1] == reporter.localizer.get('build_complete', roles=0, channels=10)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_edit_retries_in_background(tmp_path):
+    ctx = FakeCtx()
+    reporter = ProgressReporter(ctx, interval=0)
+    await reporter.start('starting')
+    calls = []
+
+    async def limited_edit(content):
+        calls.append(content)
+        exc = discord.HTTPException(types.SimpleNamespace(status=429, reason='limited', headers={}), {'code': 0, 'message': 'limited'})
+        exc.retry_after = 30.0
+        raise exc
+
+    reporter.message.edit = limited_edit
+    executor = Executor(storage_dir=tmp_path)
+    plan = executor_plan()
+    detach = reporter.attach(executor, plan)
+    await asyncio.wait_for(executor.run_plan(plan, ok_handler, resume=False), 5)
+    detach()
+    assert calls  # the edit was attempted and is now sleeping out its retry_after
+    pending = [t for t in (reporter._flush_task, reporter.finish_task) if t is not None]
+    assert pending and not any(t.done() for t in pending)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
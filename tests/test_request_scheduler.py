@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from src.conditor.request_scheduler import Priority, RequestScheduler
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_by_priority_class():
+    sched = RequestScheduler(max_inflight=1, reserved=0)
+    gate = asyncio.Event()
+    order = []
+
+    async def hold():
+        await gate.wait()
+
+    async def record(label):
+        order.append(label)
+
+    first = asyncio.create_task(sched.run(Priority.BULK, None, hold))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(sched.run(Priority.BULK, None, record, 'bulk')),
+        asyncio.create_task(sched.run(Priority.PROGRESS, None, record, 'progress')),
+        asyncio.create_task(sched.run(Priority.INTERACTIVE, None, record, 'interactive')),
+    ]
+    await asyncio.sleep(0)
+    assert sched.waiting() == 3
+
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    assert order == ['interactive', 'progress', 'bulk']
+    stats = sched.stats()
+    assert stats['bulk']['completed'] == 2
+    assert stats['interactive']['wait_max'] > 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_cannot_take_reserved_slot():
+    sched = RequestScheduler(max_inflight=2, reserved=1)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    async def quick():
+        return 'ok'
+
+    bulk1 = asyncio.create_task(sched.run(Priority.BULK, None, hold))
+    await asyncio.sleep(0)
+    bulk2 = asyncio.create_task(sched.run(Priority.BULK, None, quick))
+    await asyncio.sleep(0)
+    assert sched.waiting(Priority.BULK) == 1
+
+    # the reserved slot is still free for user-facing traffic
+    assert await asyncio.wait_for(sched.run(Priority.INTERACTIVE, None, quick), 1) == 'ok'
+
+    gate.set()
+    await asyncio.gather(bulk1, bulk2)
+    assert bulk2.result() == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    sched = RequestScheduler(max_inflight=1, reserved=0)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    async def quick():
+        return 1
+
+    holder = asyncio.create_task(sched.run(Priority.BULK, None, hold))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(sched.run(Priority.BULK, None, quick))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    gate.set()
+    await holder
+    assert await asyncio.wait_for(sched.run(Priority.BULK, None, quick), 1) == 1
+
+
+def rate_limited(retry_after):
+    import types
+
+    import discord
+
+    exc = discord.HTTPException(types.SimpleNamespace(status=429, reason='limited', headers={}), {'code': 0, 'message': 'limited'})
+    exc.retry_after = retry_after
+    return exc
+
+
+@pytest.mark.asyncio
+async def test_guilds_waiting_on_their_lock_hold_no_slots():
+    sched = RequestScheduler(max_inflight=2, reserved=0)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    async def quick(label):
+        return label
+
+    # guild 1: one call in flight, three more queued behind its per-guild lock
+    busy = [asyncio.create_task(sched.run(Priority.BULK, 9001, hold)) for _ in range(4)]
+    await asyncio.sleep(0)
+    # guild 2's bulk work still gets the second slot
+    assert await asyncio.wait_for(sched.run(Priority.BULK, 9002, quick, 'b'), 1) == 'b'
+    gate.set()
+    await asyncio.gather(*busy)
+
+
+@pytest.mark.asyncio
+async def test_retry_sleep_releases_the_slot():
+    sched = RequestScheduler(max_inflight=1, reserved=0)
+    order = []
+    attempts = []
+
+    async def limited_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise rate_limited(0.3)
+        order.append('a')
+
+    async def other(i):
+        order.append(f'b{i}')
+
+    first = asyncio.create_task(sched.run(Priority.BULK, 9101, limited_once))
+    await asyncio.sleep(0.01)
+    # guild 1 is sleeping out its retry_after; guild 2 runs in the only slot meanwhile
+    for i in range(3):
+        await asyncio.wait_for(sched.run(Priority.BULK, 9102, other, i), 1)
+    assert order == ['b0', 'b1', 'b2']
+    await first
+    assert order[-1] == 'a' and len(attempts) == 2
+    assert sched.stats()['bulk']['completed'] == 4
+
+
+def test_limits_from_env(monkeypatch):
+    monkeypatch.setenv('CONDITOR_SCHEDULER_MAX_INFLIGHT', '16')
+    monkeypatch.setenv('CONDITOR_SCHEDULER_RESERVED', '3')
+    sched = RequestScheduler.from_env()
+    assert (sched.max_inflight, sched.reserved) == (16, 3)
+
+
+@pytest.mark.asyncio
+async def test_full_restore_runs_as_bulk_traffic(tmp_path, monkeypatch):
+    import json
+    import types
+
+    from src.conditor import request_scheduler
+    from src.conditor.cogs.backup import BackupCog
+    from src.conditor.fake_discord import FakeDiscord, SimConfig
+
+    sched = RequestScheduler(max_inflight=2, reserved=1)
+    monkeypatch.setattr(request_scheduler, '_scheduler', sched)
+    guild = FakeDiscord(SimConfig(buckets={}, global_bucket=None)).guild('restore')
+    snapshot = tmp_path / 'guild.json'
+    snapshot.write_text(json.dumps({
+        'roles': [{'name': 'Admin', 'color': '#ff0000', 'permissions': 8}],
+        'categories': [{'name': 'Community'}],
+        'channels': [{'name': 'general', 'type': 'text', 'category': 'Community'}, {'name': 'Lounge', 'type': 'voice'}],
+        'messages': {'general': [{'content': 'two', 'author': 'b'}, {'content': 'one', 'author': 'a'}]},
+    }), encoding='utf-8')
+    cog = BackupCog(types.SimpleNamespace())
+    monkeypatch.setattr(cog, '_snapshot_path', lambda g: snapshot)
+    sent = []
+
+    async def send(content):
+        sent.append(content)
+
+    await BackupCog.cmd_restore.callback(cog, types.SimpleNamespace(guild=guild, send=send))
+
+    # role, category, two channels, the replay webhook and two messages
+    assert sched.stats()['bulk']['completed'] == 7
+    assert sorted(c.name for c in guild.channels) == ['Community', 'Lounge', 'general']
+    general = next(c for c in guild.channels if c.name == 'general')
+    assert [m.content for m in general.messages] == ['one', 'two']
@@ -0,0 +1,138 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+from src.conditor import rate_limiter
+from src.conditor.core.executor.worker import Executor
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+from src.conditor.retry import (
+    ErrorClass,
+    RetryBudget,
+    RetryPolicy,
+    call_with_retry,
+    classify_error,
+)
+
+
+def http_error(status, code=0, retry_after=None):
+    resp = types.SimpleNamespace(status=status, reason='test', headers={})
+    exc = discord.HTTPException(resp, {'code': code, 'message': 'boom'})
+    if retry_after is not None:
+        exc.retry_after = retry_after
+    return exc
+
+
+FAST = RetryPolicy(max_attempts=4, base_delay=0.001, max_delay=0.005)
+
+
+def test_classify_error():
+    assert classify_error(http_error(429)) == ErrorClass.RATE_LIMITED
+    assert classify_error(http_error(503)) == ErrorClass.SERVER
+    assert classify_error(http_error(403, 50013)) == ErrorClass.PERMANENT
+    assert classify_error(http_error(404)) == ErrorClass.PERMANENT
+    assert classify_error(http_error(400)) == ErrorClass.CLIENT
+    assert classify_error(asyncio.TimeoutError()) == ErrorClass.NETWORK
+    assert classify_error(KeyError('x')) == ErrorClass.UNKNOWN
+
+
+def test_decorrelated_jitter_is_bounded():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    delay = policy.base_delay
+    for _ in range(50):
+        delay = policy.next_delay(delay)
+        assert 1.0 <= delay <= 10.0
+
+
+
+def test_step_policy_keeps_legacy_defaults():
+    assert RetryPolicy.from_step(None) == RetryPolicy(max_attempts=1)
+    assert RetryPolicy.from_step({}) == RetryPolicy(max_attempts=1)
+    # `backoff ** attempt` sleeps of 2s, 4s, 8s: same first delay and cap
+    assert RetryPolicy.from_step({'retries': 3, 'backoff': 2}) == RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=8.0)
+    assert RetryPolicy.from_step({'retries': 2, 'backoff': 2, 'max_delay': 30}) == RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=30.0)
+    assert RetryPolicy.from_step({'retries': 1, 'base_delay': 0.1}) == RetryPolicy(max_attempts=2, base_delay=0.1)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_then_succeeds():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise http_error(502)
+        return 'ok'
+
+    attempts = []
+    assert await call_with_retry(flaky, FAST, attempts=attempts) == 'ok'
+    assert [a.error_class for a in attempts] == ['server', 'server']
+
+
+@pytest.mark.asyncio
+async def test_permanent_and_unknown_errors_are_not_retried():
+    for exc in (http_error(403, 50013), ValueError('bug')):
+        calls = []
+
+        async def fail():
+            calls.append(1)
+            raise exc
+
+        with pytest.raises(type(exc)):
+            await call_with_retry(fail, FAST)
+        assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_budget_is_shared():
+    budget = RetryBudget(2)
+
+    async def always_5xx():
+        raise http_error(500)
+
+    attempts = []
+    with pytest.raises(discord.HTTPException):
+        await call_with_retry(always_5xx, FAST, budget=budget, attempts=attempts)
+    assert len(attempts) == 3
+    assert budget.remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_does_not_retry_inside_engine():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        raise http_error(500)
+
+    async def step():
+        return await rate_limiter.run_with_rate_limit(1, fail)
+
+    with pytest.raises(discord.HTTPException):
+        await call_with_retry(step, RetryPolicy(max_attempts=2, base_delay=0.001, max_delay=0.001))
+    # one call per engine attempt, no nested retries
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_executor_records_attempts(tmp_path):
+    plan = BuildPlan(name='retry-plan')
+    plan.add_step(BuildStep(id='a', type=StepType.CREATE_ROLE, payload={}, retry_policy={'retries': 3, 'base_delay': 0.001, 'max_delay': 0.001}, estimated_delay=0.0))
+    plan.add_step(BuildStep(id='b', type=StepType.CREATE_ROLE, payload={}, retry_policy={'retries': 3, 'base_delay': 0.001}, estimated_delay=0.0))
+    seen = {'a': 0}
+
+    async def handler(step):
+        if step.id == 'a':
+            seen['a'] += 1
+            if seen['a'] == 1:
+                raise http_error(503)
+            return {'ok': True}
+        raise http_error(403, 50013)
+
+    state = await Executor(storage_dir=tmp_path).run_plan(plan, handler, resume=False)
+    a, b = state['steps']['a'], state['steps']['b']
+    assert a['status'] == 'success' and a['attempts'] == 2
+    assert a['attempts_log'][0]['error_class'] == 'server'
+    assert b['status'] == 'failed' and b['attempts'] == 1 and b['error_class'] == 'permanent'
+    assert state['retry_budget']['remaining'] == state['retry_budget']['total'] - 1
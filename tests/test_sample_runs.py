@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from src.conditor.core.executor import SampleRunner, SimulatedHandler
+from src.conditor.core.executor.sample_runs import RUN_CANCELLED, RUN_FINISHED
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+
+
+def make_plan(n, delay=0.0):
+    plan = BuildPlan(name='sample')
+    for i in range(n):
+        plan.add_step(BuildStep(id=f's{i}', type=StepType.CREATE_ROLE, payload={'name': f'r{i}'}, estimated_delay=delay))
+    return plan
+
+
+async def slow(step):
+    await asyncio.sleep(0.01)
+    return {'ok': True}
+
+
+@pytest.mark.asyncio
+async def test_run_finishes_in_background_with_report(tmp_path):
+    runner = SampleRunner(storage_dir=tmp_path)
+    reports = []
+
+    async def on_finish(run):
+        reports.append(run.report())
+
+    run = runner.start(make_plan(5), handler=SimulatedHandler(slow), on_finish=on_finish)
+    assert run.active and run.done == 0
+    await run.task
+    assert run.status == RUN_FINISHED
+    assert (run.done, run.successes, run.failures) == (5, 5, 0)
+    assert run.api_seconds >= 0.05 and run.steps_per_second > 0
+    assert 'steps/s' in reports[0] and 'simulated API' in reports[0]
+    # executor state for the run is cleaned up
+    assert not list(tmp_path.glob('plan_state_*'))
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_a_run(tmp_path):
+    runner = SampleRunner(storage_dir=tmp_path)
+    finished = asyncio.Event()
+
+    async def on_finish(run):
+        finished.set()
+
+    run = runner.start(make_plan(50, delay=0.01), handler=SimulatedHandler(slow), on_finish=on_finish)
+    await asyncio.sleep(0.05)
+    assert runner.cancel(run.run_id)
+    await asyncio.wait_for(finished.wait(), 2)
+    assert run.status == RUN_CANCELLED and 0 < run.done < 50
+    assert not runner.cancel(run.run_id)
+    assert runner.get(run.run_id) is run and runner.active() == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_are_limited_and_kept_apart(tmp_path):
+    runner = SampleRunner(storage_dir=tmp_path, max_active=2)
+    a = runner.start(make_plan(3), handler=SimulatedHandler(slow))
+    b = runner.start(make_plan(3), handler=SimulatedHandler(slow))
+    assert a.plan_name != b.plan_name
+    with pytest.raises(RuntimeError):
+        runner.start(make_plan(3))
+    await asyncio.gather(a.task, b.task)
+    assert a.done == b.done == 3
+    assert [r.run_id for r in runner.runs()] == [b.run_id, a.run_id]
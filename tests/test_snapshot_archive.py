@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.conditor.core.planner.models import BuildPlan, BuildStep, StepType
+from src.conditor.core.persistence.archive import (
+    SnapshotArchive,
+    TIMESTAMP_FORMAT,
+    find_snapshot,
+    guild_backup_dir,
+    list_snapshots,
+    load_snapshot_plan,
+    parse_snapshot_time,
+    write_archive,
+)
+
+
+def make_snapshot_plan():
+    plan = BuildPlan(name='backup-1')
+    plan.add_step(BuildStep(id='role-1', type=StepType.CREATE_ROLE, payload={'name': 'Admin'}))
+    plan.add_step(BuildStep(id='role-2', type=StepType.CREATE_ROLE, payload={'name': 'Member'}))
+    plan.add_step(BuildStep(id='cat-1', type=StepType.CREATE_CATEGORY, payload={'name': 'Community'}))
+    plan.add_step(BuildStep(id='cat-2', type=StepType.CREATE_CATEGORY, payload={'name': 'Games'}))
+    for cid, name, cat in ((1, 'general', 'Community'), (2, 'lfg', 'Games')):
+        plan.add_step(BuildStep(id=f'chan-{cid}', type=StepType.CREATE_CHANNEL, payload={'name': name, 'category': cat, 'type': 'text'}))
+        for i in range(3):
+            plan.add_step(BuildStep(id=f'msg-{cid}-{i}', type=StepType.POST_MESSAGE, payload={'channel': name, 'content': f'{name} {i}', 'author_name': 'a'}))
+    plan.add_step(BuildStep(id='meta-1', type=StepType.REGISTER_METADATA, payload={'guild_id': 1}))
+    return plan
+
+
+def test_archive_round_trip_preserves_order(tmp_path):
+    plan = make_snapshot_plan()
+    path = write_archive(plan, tmp_path / 'snapshot.cnda')
+    restored = load_snapshot_plan(path)
+    assert [s.id for s in restored.steps] == [s.id for s in plan.steps]
+
+
+def test_channel_steps_read_only_that_channel(tmp_path):
+    path = write_archive(make_snapshot_plan(), tmp_path / 'snapshot.cnda')
+    with SnapshotArchive(path) as arc:
+        steps = arc.channel_steps('chan-2')
+        assert [s.id for s in steps] == ['cat-2', 'chan-2', 'msg-2-0', 'msg-2-1', 'msg-2-2']
+        assert arc.message_count('chan-1') == 3
+        assert arc.channel_steps('missing') == []
+        assert [s.payload['name'] for s in arc.role_steps(['Member'])] == ['Member']
+
+
+def test_same_named_channels_keep_separate_segments(tmp_path):
+    plan = make_snapshot_plan()
+    plan.add_step(BuildStep(id='chan-3', type=StepType.CREATE_CHANNEL, payload={'name': 'general', 'category': 'Games', 'type': 'text'}))
+    plan.add_step(BuildStep(id='msg-3-0', type=StepType.POST_MESSAGE, payload={'channel': 'general', 'content': 'games general', 'author_name': 'a'}))
+    path = write_archive(plan, tmp_path / 'snapshot.cnda')
+    with SnapshotArchive(path) as arc:
+        assert [c['key'] for c in arc.find_channels('general')] == ['chan-1', 'chan-3']
+        assert [c['key'] for c in arc.find_channels('<#3>')] == ['chan-3']
+        assert [c['key'] for c in arc.find_channels('1')] == ['chan-1']
+        assert [c['key'] for c in arc.find_channels('#LFG')] == ['chan-2']
+        assert arc.find_channels('<#99>') == []
+        assert [s.id for s in arc.channel_steps('chan-3')] == ['cat-2', 'chan-3', 'msg-3-0']
+        assert arc.message_count('chan-1') == 3
+        assert [s.id for s in arc.to_plan().steps] == [s.id for s in plan.steps[:-3]] + ['chan-3', 'msg-3-0', 'meta-1']
+
+
+def test_archive_rejects_foreign_files(tmp_path):
+    p = tmp_path / 'bogus.cnda'
+    p.write_bytes(b'{"not": "an archive"}' + b' ' * 32)
+    with pytest.raises(ValueError):
+        SnapshotArchive(p)
+
+
+def test_find_snapshot_by_time(tmp_path):
+    d = guild_backup_dir(9, tmp_path)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    stamps = [now - timedelta(days=n) for n in (3, 2, 1)]
+    for ts in stamps:
+        write_archive(make_snapshot_plan(), d / f'snapshot_{ts.strftime(TIMESTAMP_FORMAT)}.cnda')
+
+    assert find_snapshot(9, base=tmp_path).name.startswith(f'snapshot_{stamps[-1].strftime(TIMESTAMP_FORMAT)}')
+    picked = find_snapshot(9, now - timedelta(days=1, hours=12), base=tmp_path)
+    assert picked.name.startswith(f'snapshot_{stamps[1].strftime(TIMESTAMP_FORMAT)}')
+    assert find_snapshot(9, now - timedelta(days=10), base=tmp_path) is None
+
+
+def test_partial_archive_writes_are_not_snapshots(tmp_path):
+    d = guild_backup_dir(9, tmp_path)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    done = write_archive(make_snapshot_plan(), d / f'snapshot_{(now - timedelta(days=1)).strftime(TIMESTAMP_FORMAT)}.cnda')
+    (d / f'snapshot_{now.strftime(TIMESTAMP_FORMAT)}.cnda.tmp').write_bytes(b'partial')
+
+    assert list_snapshots(9, base=tmp_path) == [(parse_snapshot_time(done), done)]
+    assert find_snapshot(9, base=tmp_path) == done
+
+
+def test_restore_roles_args_fall_back_to_names():
+    from src.conditor.cogs.backup import parse_restore_args
+
+    assert parse_restore_args(()) == (None, ())
+    assert parse_restore_args(('Admin', 'Member')) == (None, ('Admin', 'Member'))
+    assert parse_restore_args(('latest', 'Admin')) == ('latest', ('Admin',))
+    assert parse_restore_args(('2024-05-01T12:00:00Z', 'Admin')) == ('2024-05-01T12:00:00Z', ('Admin',))
@@ -0,0 +1,35 @@
+import discord
+import pytest
+from discord.ext import commands
+
+from src.conditor import startup, storage
+from src.conditor.startup import StartupReport, cog_dependencies, load_cogs, load_deferred_cogs
+
+
+def test_cog_dependencies_resolve_relative_imports():
+    deps = cog_dependencies(startup.COGS_DIR / 'engine_cog.py', 'src.conditor.cogs')
+    assert 'src.conditor.core.planner' in deps
+    assert 'src.conditor.core.executor' in deps
+    deps = cog_dependencies(startup.COGS_DIR / 'audit.py', 'src.conditor.cogs')
+    assert deps == ['src.conditor.storage']
+
+
+@pytest.mark.asyncio
+async def test_load_cogs_times_and_defers(db):
+    bot = commands.Bot(command_prefix='C!', intents=discord.Intents.none())
+    report = StartupReport(started_at=0.0)
+    deferred = await load_cogs(bot, package='src.conditor', report=report, lazy={'backup', 'engine_cog'})
+    assert deferred == ['backup', 'engine_cog']
+    assert 'src.conditor.cogs.builder' in bot.extensions
+    assert 'src.conditor.cogs.backup' not in bot.extensions
+    assert report.cog('builder').status == 'loaded'
+    assert report.cog('builder').load_seconds > 0
+    assert report.cog('backup').deferred and report.cog('backup').status == 'pending'
+    assert 'cogs_loaded' in report.phases
+
+    await load_deferred_cogs(bot, deferred, package='src.conditor', report=report)
+    assert 'src.conditor.cogs.backup' in bot.extensions
+    assert report.cog('engine_cog').status == 'loaded'
+    assert 'engine_cog' in report.render()
+    for ext in list(bot.extensions):
+        await bot.unload_extension(ext)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from src.conditor import storage
+from src.conditor.storage import PrefixIndex
+
+
+BACKENDS = pytest.mark.parametrize('db', [True, False], ids=['fts5', 'like'], indirect=True)
+
+
+def tpl(name_key, roles=(), channels=()):
+    return json.dumps({
+        'meta': {'name_key': name_key, 'languages': ['en', 'de']},
+        'roles': [{'name': r} for r in roles],
+        'channels': [{'name': c} for c in channels],
+    })
+
+
+@BACKENDS
+def test_search_covers_names_meta_roles_and_channels(db):
+    storage.init_db()
+    storage.save_template('gaming', tpl('tpl_gaming', ['Raid Leader'], ['lfg']))
+    storage.save_template('study', tpl('tpl_study', ['Tutor'], ['homework-help']))
+    assert storage.search_templates('gaming') == ['gaming']
+    assert storage.search_templates('raid') == ['gaming']
+    assert storage.search_templates('homework') == ['study']
+    assert sorted(storage.search_templates('de')) == ['gaming', 'study']
+    assert storage.search_templates('tutor lfg') == []
+
+    # the index follows edits
+    storage.save_template('study', tpl('tpl_study', ['Tutor'], ['raid-planning']))
+    assert sorted(storage.search_templates('raid')) == ['gaming', 'study']
+
+
+@BACKENDS
+def test_autocomplete_prefix_index(db):
+    storage.init_db()
+    for name in ('Gaming', 'gamejam', 'guild-ops', 'study'):
+        storage.save_template(name, '{}')
+    assert storage.complete_template_names('gam') == ['gamejam', 'Gaming']
+    assert storage.complete_template_names('G', limit=2) == ['gamejam', 'Gaming']
+    storage.save_template('gallery', '{}')
+    assert storage.complete_template_names('ga') == ['gallery', 'gamejam', 'Gaming']
+    assert storage.complete_template_names('zzz') == []
+
+
+def test_prefix_index_large_catalog():
+    # speed is tracked by the template_autocomplete benchmark
+    index = PrefixIndex(f'template-{i:05d}' for i in range(20000))
+    assert len(index) == 20000
+    hits = index.complete('template-123', 25)
+    assert hits == [f'template-{i:05d}' for i in range(12300, 12325)]
+    assert index.complete('TEMPLATE-1999') == [f'template-{i:05d}' for i in range(19990, 20000)]
+    index.remove('template-12300')
+    assert index.complete('template-12300') == []
+    assert index.complete('template-123', 25)[0] == 'template-12301'
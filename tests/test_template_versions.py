@@ -0,0 +1,50 @@
+import sqlite3
+
+from src.conditor import storage
+from src.conditor.cogs.builder import parse_template_ref
+
+
+def test_versions_are_deduplicated_and_retrievable(db):
+    storage.init_db()
+    v1 = '{"roles": []}'
+    v2 = '{"roles": [{"name": "Mod"}]}\n' * 50
+    assert storage.save_template('base', v1, author_id=1) == 1
+    assert storage.save_template('base', v1) == 1  # unchanged: no new version
+    assert storage.save_template('base', v2, author_id=2) == 2
+    assert storage.save_template('base', v1) == 3  # revert: new version, same blob
+    assert storage.save_template('other', v2) == 1
+
+    conn = sqlite3.connect(storage.DB_PATH)
+    blobs = conn.execute('SELECT size, length(data) FROM template_blobs').fetchall()
+    conn.close()
+    assert len(blobs) == 2
+    assert any(stored < size for size, stored in blobs)  # compressed
+
+    assert storage.load_template('base') == v1
+    assert storage.load_template('base', 2) == v2
+    assert storage.load_template_version('base') == (3, v1)
+    assert storage.load_template('base', 9) is None
+    assert [v['version'] for v in storage.list_template_versions('base')] == [3, 2, 1]
+    assert storage.list_template_versions('base')[-1]['author_id'] == 1
+
+    diff = storage.diff_template_versions('base', 1, 2)
+    assert diff.startswith('--- base@v1\n+++ base@v2') and '+{"roles": [{"name": "Mod"}]}' in diff
+    assert storage.diff_template_versions('base', 1, 3) == ''
+    assert storage.diff_template_versions('base', 1, 7) is None
+
+
+def test_existing_templates_get_a_first_version(db):
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute('CREATE TABLE templates (name TEXT PRIMARY KEY, content TEXT NOT NULL)')
+    conn.execute("INSERT INTO templates VALUES ('legacy', '{}')")
+    conn.commit()
+    conn.close()
+    storage.init_db()
+    storage.init_db()
+    assert [v['version'] for v in storage.list_template_versions('legacy')] == [1]
+
+
+def test_parse_template_ref():
+    assert parse_template_ref('base') == ('base', None)
+    assert parse_template_ref('base@v4') == ('base', 4)
+    assert parse_template_ref('team@home@2') == ('team@home', 2)
@@ -0,0 +1,53 @@
+import random
+import re
+import string
+
+from src.conditor import storage
+from src.conditor.core.safety.wordfilter import Automaton, WordFilter, normalize_word
+
+
+def naive(text, words):
+    t = re.sub(r"[^a-z0-9]", "", text.lower())
+    return any(w in t for w in words)
+
+
+def test_automaton_matches_naive_scan():
+    rng = random.Random(7)
+    words = {''.join(rng.choices('abcde', k=rng.randint(2, 5))) for _ in range(200)}
+    automaton = Automaton(words)
+    for _ in range(500):
+        text = ''.join(rng.choices('abcdeABCDE -_!é', k=rng.randint(0, 40)))
+        assert automaton.contains(text) == naive(text, words), text
+
+
+def test_normalization_and_overlaps():
+    automaton = Automaton(['he', 'she', 'hers', 'Bad-Word'])
+    assert automaton.find('uSHErs') in {'he', 'she'}
+    assert automaton.contains('a b.a d w*o*r*d')
+    assert not automaton.contains('x-ray shot')
+    assert normalize_word('Ünïcode-Bad!') == 'ncodebad'
+    assert not Automaton([]).contains('anything')
+
+
+def test_guild_lists_and_rebuild_on_change(db):
+    storage.init_db()
+    wf = WordFilter(defaults={'globalbad'})
+    assert wf.contains('this is GLOBAL-bad', 1)
+    assert not wf.contains('spoiler', 1)
+    assert wf.add_words(1, ['Spoiler', 'spoiler']) == 1
+    assert wf.contains('no spoilers please', 1)
+    assert not wf.contains('no spoilers please', 2)
+
+    builds = wf.builds
+    for _ in range(5):
+        wf.contains('hello', 1)
+    assert wf.builds == builds
+    assert wf.add_words(1, ['spoiler']) == 0
+    assert wf.builds == builds
+
+    # a global word reaches every guild
+    wf.add_words(None, ['everywhere'])
+    assert wf.contains('EVERY where', 2) and wf.contains('everywhere', 1)
+    assert wf.remove_words(1, ['spoiler']) == 1
+    assert not wf.contains('spoiler', 1)
+    assert storage.load_banned_words(0) == ['everywhere']